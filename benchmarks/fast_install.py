@@ -0,0 +1,115 @@
+"""Compare --fast-install and --link-install against 'pip install'.
+
+Usage: python benchmarks/fast_install.py [WHEEL ...] [--repeat N]
+
+If no wheels are given, a synthetic wheel with many modules is generated. The shared
+tree of the link installs is extracted before the measurement starts.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from os import path
+
+# The project has to be on the path for the import below. isort:skip_file
+sys.path.insert(0, path.abspath(path.join(path.dirname(__file__), "..")))
+
+from pytorch_wheel_installer.unpack import get_scheme, install_wheels  # noqa: E402
+
+
+def make_synthetic_wheel(dir, num_files=2000, file_size=64 * 1024):
+    name, version = "synthetic", "1.0"
+    dist_info = f"{name}-{version}.dist-info"
+    wheel = path.join(dir, f"{name}-{version}-py3-none-any.whl")
+    payload = os.urandom(file_size // 2).hex()
+    with zipfile.ZipFile(wheel, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for idx in range(num_files):
+            zf.writestr(f"{name}/module_{idx}.py", f"DATA = '{payload}'\n")
+        zf.writestr(
+            f"{dist_info}/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+        zf.writestr(
+            f"{dist_info}/WHEEL",
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        zf.writestr(f"{dist_info}/RECORD", "")
+    return wheel
+
+
+def pip_install(wheels, prefix):
+    subprocess.check_call(
+        (
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--quiet",
+            "--no-deps",
+            "--no-compile",
+            "--disable-pip-version-check",
+            "--prefix",
+            prefix,
+            *wheels,
+        )
+    )
+
+
+def fast_install(wheels, prefix):
+    install_wheels(wheels, scheme=get_scheme(prefix=prefix))
+
+
+def link_install(link_mode):
+    def install(wheels, prefix):
+        install_wheels(
+            wheels,
+            scheme=get_scheme(prefix=prefix),
+            link_mode=link_mode,
+            store_dir=path.join(path.dirname(prefix), "store"),
+        )
+
+    return install
+
+
+def measure(fn, wheels, work_dir, repeat):
+    durations = []
+    for _ in range(repeat):
+        prefix = tempfile.mkdtemp(dir=work_dir)
+        start = time.perf_counter()
+        fn(wheels, prefix)
+        durations.append(time.perf_counter() - start)
+        shutil.rmtree(prefix)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wheels", nargs="*", help="wheel files to install")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        wheels = args.wheels or [make_synthetic_wheel(work_dir)]
+        measure(link_install("copy"), wheels, work_dir, 1)
+        for name, fn in (
+            ("pip install", pip_install),
+            ("fast install", fast_install),
+            ("hardlink install", link_install("hardlink")),
+            ("reflink install", link_install("reflink")),
+            ("copy install", link_install("copy")),
+        ):
+            durations = measure(fn, wheels, work_dir, args.repeat)
+            print(
+                f"{name:>16}: median {statistics.median(durations):.3f} s, "
+                f"min {min(durations):.3f} s ({args.repeat} runs)"
+            )
+
+
+if __name__ == "__main__":
+    main()
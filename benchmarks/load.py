@@ -0,0 +1,181 @@
+"""Load test the resolution against a local replay server and report JSON.
+
+Usage: python benchmarks/load.py [--page FILE] [--mode {resolver,cli}]
+    [--rate RPS] [--requests N] [--concurrency N] [--latency SECONDS]
+    [--failure-rate P] [--max-age SECONDS] [--no-cache] [--output FILE]
+
+Requests are started at a fixed rate regardless of how long the previous ones take.
+Each request resolves the distributions like an independent call to find_links()
+(--mode resolver) or runs 'pwi --no-install' in a fresh interpreter (--mode cli).
+The latencies are measured from the scheduled start and thus include the time a
+request waited for a free worker. A request is a cache hit if it did not fetch the
+index page from the server. Cache hits are only known in the resolver mode.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The project is only importable after utils put it on the path. isort:skip_file
+from utils import PROJECT_ROOT, make_stable_page
+
+from pip._internal.network.session import PipSession
+from pytorch_wheel_installer.computation_backend import CPUBackend
+from pytorch_wheel_installer.find import Resolver
+from tests.utils import LocalServer
+
+PAGE_PATH = "/whl/torch_stable.html"
+
+
+class CountingSession(PipSession):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_requests = 0
+
+    def request(self, method, url, *args, **kwargs):
+        if url.endswith(PAGE_PATH):
+            self.page_requests += 1
+        return super().request(method, url, *args, **kwargs)
+
+
+def resolve_in_process(url, distributions, cache_dir, max_age, cache):
+    session = CountingSession()
+    resolver = Resolver(
+        session=session,
+        computation_backend=CPUBackend(),
+        sources=[url],
+        cache=cache,
+        cache_dir=cache_dir,
+        max_age=max_age,
+    )
+    resolver.resolve(distributions)
+    return session.page_requests == 0
+
+
+def resolve_in_subprocess(url, distributions, cache_dir, max_age, cache):
+    env = os.environ.copy()
+    env["PWI_CACHE_DIR"] = cache_dir
+    cmd = [sys.executable, "-W", "ignore", "-m", "pytorch_wheel_installer"]
+    cmd.extend(("--no-install", "-b", "cpu", "-f", url, *distributions))
+    if not cache:
+        cmd.append("--no-cache")
+    subprocess.run(
+        cmd,
+        cwd=PROJECT_ROOT,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return None
+
+
+def percentile(values, p):
+    # Nearest-rank method
+    if not values:
+        return None
+    values = sorted(values)
+    idx = max(int(round(p / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(idx, len(values) - 1)]
+
+
+def run(args, url, cache_dir):
+    resolve = resolve_in_process if args.mode == "resolver" else resolve_in_subprocess
+    lock = threading.Lock()
+    latencies = []
+    hits = []
+    errors = []
+
+    def request(scheduled):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            hit = resolve(
+                url, args.distributions, cache_dir, args.max_age, not args.no_cache
+            )
+        except Exception as error:
+            with lock:
+                errors.append(type(error).__name__)
+            return
+        latency = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(latency)
+            if hit is not None:
+                hits.append(hit)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for idx in range(args.requests):
+            executor.submit(request, start + idx / args.rate)
+    duration = time.perf_counter() - start
+
+    return {
+        "requests": args.requests,
+        "completed": len(latencies),
+        "errors": len(errors),
+        "error_types": {name: errors.count(name) for name in sorted(set(errors))},
+        "duration": duration,
+        "throughput": len(latencies) / duration,
+        "latency": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=None),
+        },
+        "cache": {
+            "hits": sum(hits),
+            "misses": len(hits) - sum(hits),
+            "hit_rate": sum(hits) / len(hits) if hits else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", help="recorded torch_stable.html to serve")
+    parser.add_argument("--mode", choices=("resolver", "cli"), default="resolver")
+    parser.add_argument("--rate", type=float, default=20.0, help="requests/s")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-age", type=float, default=600.0)
+    parser.add_argument("--no-cache", action="store_true", default=False)
+    parser.add_argument("--distributions", nargs="+", default=["torch", "torchvision"])
+    parser.add_argument("--output", help="write the report to this file")
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page) as fh:
+            page = fh.read()
+    else:
+        page = make_stable_page()
+
+    with LocalServer(
+        {PAGE_PATH: page}, delay=args.latency, failure_rate=args.failure_rate
+    ) as server, tempfile.TemporaryDirectory() as cache_dir:
+        report = run(args, server.url + PAGE_PATH, cache_dir)
+        report["server"] = {
+            "requests": len(server.requests),
+            "failures": server.failures,
+        }
+    report["config"] = {
+        key: value for key, value in vars(args).items() if key not in ("output",)
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
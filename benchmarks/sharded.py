@@ -0,0 +1,64 @@
+"""Measure parsing and evaluating a large wheel index serially and in a process pool.
+
+Usage: python benchmarks/sharded.py [--page FILE] [--num-versions N] [--jobs N]
+
+Without --page a synthetic page resembling the PyTorch index with all nightlies is
+generated. The time to create the worker processes is included.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# The project is only importable after utils put it on the path. isort:skip_file
+from utils import make_stable_page
+
+from pytorch_wheel_installer.computation_backend import CPUBackend
+from pytorch_wheel_installer.find import make_pytorch_packager_finder
+from pytorch_wheel_installer.index import PYTORCH_STABLE_URL, parse_index
+
+
+def measure(page, executor=None):
+    start = time.perf_counter()
+    index = parse_index(page, PYTORCH_STABLE_URL, executor=executor)
+    parsed = time.perf_counter()
+    finder = make_pytorch_packager_finder(
+        computation_backend=CPUBackend(), index=index, executor=executor
+    )
+    for project in index.projects:
+        finder.find_all_candidates(project)
+    evaluated = time.perf_counter()
+    return len(index), parsed - start, evaluated - parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", help="recorded index page to parse")
+    parser.add_argument("--num-versions", type=int, default=700)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page) as fh:
+            page = fh.read()
+    else:
+        page = make_stable_page(num_versions=args.num_versions)
+
+    num_links, parse, evaluate = measure(page)
+    print(
+        f"  serial: parse {parse:.3f} s, evaluate {evaluate:.3f} s "
+        f"({num_links} links, {len(page) / 1e6:.1f} MB)"
+    )
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.jobs) as executor:
+        _, parse, evaluate = measure(page, executor=executor)
+    total = time.perf_counter() - start
+    print(
+        f"{args.jobs:>2} jobs: parse {parse:.3f} s, evaluate {evaluate:.3f} s, "
+        f"total including pool {total:.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure the cold end-to-end resolution latency with and without the speculative
+startup pipeline.
+
+Usage: python benchmarks/startup.py [--page FILE] [--latency SECONDS]
+    [--nvcc-delay SECONDS] [--repeat N]
+
+Each measurement runs in a fresh interpreter against a local stand-in server. With
+--nvcc-delay a fake nvcc that takes the given time is put on the PATH.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os import path
+
+# The project is only importable after utils put it on the path. isort:skip_file
+from utils import PROJECT_ROOT, make_stable_page
+
+from tests.utils import LocalServer
+
+SCRIPT = """
+from pytorch_wheel_installer.find import Resolver
+Resolver(cache=False, sources=[{url!r}], speculative={speculative}).resolve(["torch"])
+"""
+
+
+def make_fake_nvcc(dir, delay):
+    file = path.join(dir, "nvcc")
+    with open(file, "w") as fh:
+        fh.write(
+            f"#!/bin/sh\nsleep {delay}\n"
+            "echo 'Cuda compilation tools, release 10.2, V10.2.89'\n"
+        )
+    os.chmod(file, 0o755)
+
+
+def measure(url, speculative, repeat, env=None):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call(
+            (
+                sys.executable,
+                "-W",
+                "ignore",
+                "-c",
+                SCRIPT.format(url=url, speculative=speculative),
+            ),
+            cwd=PROJECT_ROOT,
+            env=env,
+        )
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", help="recorded torch_stable.html to serve")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--nvcc-delay", type=float)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    env = None
+    tmp_dir = tempfile.TemporaryDirectory()
+    if args.nvcc_delay is not None:
+        make_fake_nvcc(tmp_dir.name, args.nvcc_delay)
+        env = os.environ.copy()
+        env["PATH"] = os.pathsep.join((tmp_dir.name, env.get("PATH", "")))
+
+    if args.page:
+        with open(args.page) as fh:
+            page = fh.read()
+    else:
+        page = make_stable_page()
+
+    with LocalServer({"/whl/torch_stable.html": page}, delay=args.latency) as server:
+        url = f"{server.url}/whl/torch_stable.html"
+        for name, speculative in (("sequential", False), ("speculative", True)):
+            durations = measure(url, speculative, args.repeat, env=env)
+            print(
+                f"{name:>11}: median {statistics.median(durations):.3f} s, "
+                f"min {min(durations):.3f} s ({args.repeat} runs)"
+            )
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
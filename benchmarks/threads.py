@@ -0,0 +1,81 @@
+"""Measure the resolution throughput of a shared resolver for multiple threads.
+
+Usage: python benchmarks/threads.py [--page FILE] [--latency SECONDS]
+    [--requests N] [--threads N [N ...]]
+
+The requirements are resolved against a local stand-in server. For comparison, the
+same workload is also run with a fresh resolver per request, which corresponds to
+calling find_links() from each thread.
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The project is only importable after utils put it on the path. isort:skip_file
+from utils import make_stable_page
+
+from pytorch_wheel_installer.computation_backend import CPUBackend
+from pytorch_wheel_installer.find import Resolver
+from tests.utils import LocalServer
+
+
+def make_requirements(num_requests, num_versions=50):
+    requirements = itertools.cycle(
+        [
+            f"{project}==1.{version}.0"
+            for version in range(num_versions)
+            for project in ("torch", "torchvision", "torchaudio")
+        ]
+    )
+    return [(next(requirements),) for _ in range(num_requests)]
+
+
+def make_resolver(url):
+    return Resolver(computation_backend=CPUBackend(), cache=False, sources=[url])
+
+
+def measure(num_threads, requirements, resolve):
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(resolve, requirements))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", help="recorded torch_stable.html to serve")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--threads", type=int, nargs="+", default=(1, 4, 16, 64))
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page) as fh:
+            page = fh.read()
+    else:
+        page = make_stable_page()
+    requirements = make_requirements(args.requests)
+
+    with LocalServer({"/whl/torch_stable.html": page}, delay=args.latency) as server:
+        url = f"{server.url}/whl/torch_stable.html"
+        for num_threads in args.threads:
+            resolver = make_resolver(url)
+            shared = measure(num_threads, requirements, resolver.resolve)
+
+            num_fresh = max(args.requests // 20, num_threads)
+            fresh = measure(
+                num_threads,
+                requirements[:num_fresh],
+                lambda distributions: make_resolver(url).resolve(distributions),
+            )
+
+            print(
+                f"{num_threads:>3} threads: "
+                f"shared {args.requests / shared:8.1f} resolutions/s, "
+                f"fresh {num_fresh / fresh:8.1f} resolutions/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import itertools
+import sys
+from os import path
+
+PROJECT_ROOT = path.abspath(path.join(path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+__all__ = ["PROJECT_ROOT", "make_stable_page"]
+
+
+def make_stable_page(
+    projects=("torch", "torchvision", "torchaudio"),
+    num_versions=50,
+    locals=("cpu", "cu92", "cu101", "cu102", "cu110"),
+    tags=(
+        "cp36-cp36m-linux_x86_64",
+        "cp37-cp37m-linux_x86_64",
+        "cp38-cp38-linux_x86_64",
+        "cp38-cp38-win_amd64",
+        "py3-none-any",
+    ),
+):
+    """Generate a page resembling https://download.pytorch.org/whl/torch_stable.html."""
+    lines = ["<!DOCTYPE html>", "<html>", "<body>"]
+    for project, version, local, tag in itertools.product(
+        projects, range(num_versions), locals, tags
+    ):
+        filename = f"{local}/{project}-1.{version}.0%2B{local}-{tag}.whl"
+        lines.append(f'<a href="{filename}">{filename}</a><br>')
+    lines.extend(("</body>", "</html>"))
+    return "\n".join(lines)
@@ -1,4 +1,8 @@
-from typing import Optional
+import hashlib
+import json
+import os
+from os import path
+from typing import Any, Dict, List, Optional, Tuple
 
 from tox import hookimpl
 from tox.action import Action
@@ -7,7 +11,14 @@ from tox.venv import VirtualEnv
 
 from .cli import get_help
 from .computation_backend import ComputationBackend
+from .env import find_site_packages, get_installed_distributions
 from .find import find_links
+from .index import make_entry
+from .metrics import METRICS, collect_metrics
+from .requirements import NESTED_FILE_PATTERN, SplitRequirements, split_requirements
+from .unpack import LINK_MODES, get_scheme, install_wheels
+
+STATE_FILE = ".pytorch_wheel_installer.json"
 
 
 @hookimpl
@@ -15,7 +26,12 @@ def tox_addoption(parser: Parser) -> None:
     parser.add_testenv_attribute(
         "pytorch_distributions",
         "line-list",
-        help="each line specifies a PyTorch distribution in pip/setuptools format",
+        help=(
+            "each line specifies a PyTorch distribution in pip/setuptools format or "
+            "a requirements file ('-r FILE') or constraints file ('-c FILE'). Only "
+            "the PyTorch distributions are resolved from the files. All other lines "
+            "are passed through to the installation command"
+        ),
         default=(),
     )
 
@@ -34,17 +50,189 @@ def tox_addoption(parser: Parser) -> None:
         postprocess=postprocess_computation_backend,
     )
 
+    def postprocess_install_mode(
+        testenv_config: TestenvConfig, value: Optional[str]
+    ) -> Optional[str]:
+        if value is None or value == "pip":
+            return None
+        if value not in LINK_MODES:
+            raise RuntimeError(
+                f"Unknown PyTorch install mode '{value}'. "
+                f"Valid modes are pip, {', '.join(LINK_MODES)}."
+            )
+        return value
+
+    parser.add_testenv_attribute(
+        "pytorch_install_mode",
+        "string",
+        help=(
+            "'pip' to install the wheels with pip or one of "
+            f"{', '.join(LINK_MODES)} to link them into the environment from a "
+            "shared tree that is extracted once per wheel"
+        ),
+        postprocess=postprocess_install_mode,
+    )
+
+    parser.add_testenv_attribute(
+        "pytorch_metrics_textfile",
+        "string",
+        help=(
+            "Prometheus textfile to write the metrics of the resolution and the "
+            "installation to. Defaults to the PWI_METRICS_TEXTFILE environment "
+            "variable"
+        ),
+    )
+    parser.add_testenv_attribute(
+        "pytorch_metrics_log",
+        "string",
+        help=(
+            "file to append the metrics observations to as JSON lines. Defaults to "
+            "the PWI_METRICS_LOG environment variable"
+        ),
+    )
+
 
 @hookimpl
 def tox_testenv_install_deps(venv: VirtualEnv, action: Action) -> None:
     config = venv.envconfig
-    distributions = config.pytorch_distributions
-    if not distributions:
+    if not config.pytorch_distributions:
         return None
 
-    links = find_links(
-        distributions, computation_backend=config.pytorch_computation_backend
+    distributions, requirement_files, constraint_files = parse_distributions(config)
+    with split_requirements(requirement_files, constraint_files) as requirements:
+        install_deps(venv, action, distributions, requirements)
+
+
+def parse_distributions(
+    config: TestenvConfig,
+) -> Tuple[List[str], List[str], List[str]]:
+    distributions: List[str] = []
+    requirement_files: List[str] = []
+    constraint_files: List[str] = []
+    for line in config.pytorch_distributions:
+        match = NESTED_FILE_PATTERN.match(line.strip())
+        if match is None:
+            distributions.append(line)
+            continue
+
+        file = path.join(str(config.config.toxinidir), match.group("file"))
+        if match.group("option") in ("-c", "--constraint"):
+            constraint_files.append(file)
+        else:
+            requirement_files.append(file)
+    return distributions, requirement_files, constraint_files
+
+
+def install_deps(
+    venv: VirtualEnv,
+    action: Action,
+    distributions: List[str],
+    requirements: SplitRequirements,
+) -> None:
+    config = venv.envconfig
+    request = get_request(config, requirements)
+    state_file = str(venv.path.join(STATE_FILE))
+    site_packages = find_site_packages(str(venv.path))
+    if is_up_to_date(read_state(state_file), request, site_packages):
+        action.setactivity("installdeps-pytorch", "up to date")
+        return None
+
+    with collect_metrics(
+        textfile=config.pytorch_metrics_textfile, log=config.pytorch_metrics_log
+    ):
+        distributions = [*distributions, *requirements.distributions]
+        links = (
+            find_links(
+                distributions,
+                constraints=requirements.constraints,
+                computation_backend=config.pytorch_computation_backend,
+            )
+            if distributions
+            else []
+        )
+
+        action.setactivity("installdeps-pytorch", ", ".join(links))
+        install_mode = config.pytorch_install_mode
+        if install_mode is None:
+            with METRICS.time("install_seconds", method="tox"):
+                venv._install([*links, *requirements.install_args], action=action)
+        else:
+            envpython = str(config.envpython)
+            install_wheels(
+                links,
+                scheme=get_scheme(python=envpython),
+                executable=envpython,
+                link_mode=install_mode,
+            )
+            # The other requirements are not resolved and thus cannot be linked.
+            if requirements.install_args:
+                with METRICS.time("install_seconds", method="tox"):
+                    venv._install(requirements.install_args, action=action)
+
+    write_state(state_file, request, links, find_site_packages(str(venv.path)))
+
+
+def get_request(
+    config: TestenvConfig, requirements: SplitRequirements
+) -> Dict[str, Any]:
+    computation_backend = config.pytorch_computation_backend
+    return {
+        "distributions": list(config.pytorch_distributions),
+        "requirements": requirements.distributions,
+        "constraints": requirements.constraints,
+        # Changes of the other requirements also require a reinstallation. The
+        # original files are hashed, since the filtered ones have random names.
+        "files": {file: get_file_digest(file) for file in requirements.files},
+        "computation_backend": str(computation_backend)
+        if computation_backend is not None
+        else None,
+    }
+
+
+def get_file_digest(file: str) -> str:
+    with open(file, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def read_state(file: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(file, "r") as fh:
+            return dict(json.load(fh))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def is_up_to_date(
+    state: Optional[Dict[str, Any]], request: Dict[str, Any], site_packages: List[str]
+) -> bool:
+    if state is None or state.get("request") != request:
+        return False
+
+    installed = get_installed_distributions(site_packages)
+    return bool(state["installed"]) and all(
+        installed.get(project) == version
+        for project, version in state["installed"].items()
     )
 
-    action.setactivity("installdeps-pytorch", ", ".join(links))
-    venv._install(links, action=action)
+
+def write_state(
+    file: str, request: Dict[str, Any], links: List[str], site_packages: List[str]
+) -> None:
+    entries = [make_entry(link) for link in links]
+    projects = {entry.project for entry in entries if entry is not None}
+
+    installed = get_installed_distributions(site_packages)
+    state = {
+        "request": request,
+        "links": links,
+        "installed": {
+            project: installed[project] for project in projects if project in installed
+        },
+    }
+    try:
+        tmp = f"{file}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, file)
+    except OSError:
+        pass
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import warnings
+from concurrent.futures import Executor
+from os import path
+from typing import Dict, Optional, Union
+
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException
+
+from .database import DatabaseIndex, write_database_index
+from .index import PYTORCH_STABLE_URL, BaseIndex, Index, parse_index
+from .metrics import METRICS
+from .network import FetchPolicy, fetch
+from .snapshot import Snapshot, write_snapshot
+from .utils import Deadline
+
+__all__ = ["get_cache_dir", "load_index"]
+
+DEFAULT_MAX_AGE = 10 * 60
+
+
+def get_cache_dir() -> str:
+    try:
+        return os.environ["PWI_CACHE_DIR"]
+    except KeyError:
+        pass
+
+    root = os.environ.get("XDG_CACHE_HOME") or path.join(path.expanduser("~"), ".cache")
+    return path.join(root, "pytorch_wheel_installer")
+
+
+def get_snapshot_path(cache_dir: str, url: str) -> str:
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return path.join(cache_dir, "index", f"{name}.snapshot")
+
+
+def open_snapshot(file: str) -> Optional[Snapshot]:
+    try:
+        return Snapshot(file)
+    except (OSError, ValueError, RuntimeError):
+        return None
+
+
+def open_database_index(file: str, url: str) -> Optional[DatabaseIndex]:
+    if not path.exists(file):
+        return None
+    try:
+        return DatabaseIndex(file, url)
+    except (OSError, sqlite3.Error, RuntimeError):
+        return None
+
+
+def load_index(
+    session: PipSession,
+    url: str = PYTORCH_STABLE_URL,
+    cache_dir: Optional[str] = None,
+    max_age: float = DEFAULT_MAX_AGE,
+    refresh: bool = False,
+    executor: Optional[Executor] = None,
+    deadline: Optional[Deadline] = None,
+    policy: Optional[FetchPolicy] = None,
+    index_db: Optional[str] = None,
+) -> BaseIndex:
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+
+    snapshot = load_stale_index(url, cache_dir, index_db=index_db)
+    if snapshot is not None and not refresh and snapshot.age < max_age:
+        METRICS.increment("index_cache_total", result="hit")
+        return snapshot
+
+    headers: Dict[str, str] = {"Accept": "text/html"}
+    if snapshot is not None:
+        if snapshot.etag:
+            headers["If-None-Match"] = snapshot.etag
+        if snapshot.last_modified:
+            headers["If-Modified-Since"] = snapshot.last_modified
+
+    try:
+        response = fetch(
+            session, url, headers=headers, deadline=deadline, policy=policy
+        )
+    except (TimeoutError, RequestException) as error:
+        if snapshot is None:
+            raise
+        # A stale index is better than none at all.
+        warnings.warn(
+            f"Using the cached index of {url} from {snapshot.age:.0f} seconds ago, "
+            f"since it could not be refreshed: {error}"
+        )
+        METRICS.increment("index_cache_total", result="stale")
+        return snapshot
+
+    try:
+        if response.status_code == 304 and snapshot is not None:
+            # The snapshot is still current. It is rewritten to reset its age.
+            index: BaseIndex = Index(snapshot, url, digest=snapshot.digest)
+            etag = response.headers.get("ETag", snapshot.etag)
+            last_modified = response.headers.get(
+                "Last-Modified", snapshot.last_modified
+            )
+            METRICS.increment("index_cache_total", result="revalidated")
+        else:
+            response.raise_for_status()
+            index = parse_index(response.text, url, executor=executor)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            METRICS.increment("index_cache_total", result="miss")
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+    if index_db is not None:
+        store_database_index(index_db, index, etag, last_modified)
+        return open_database_index(index_db, url) or index
+
+    file = get_snapshot_path(cache_dir, url)
+    store_snapshot(file, index, etag, last_modified)
+    return open_snapshot(file) or index
+
+
+def load_stale_index(
+    url: str, cache_dir: Optional[str] = None, index_db: Optional[str] = None
+) -> Optional[Union[Snapshot, DatabaseIndex]]:
+    if index_db is not None:
+        return open_database_index(index_db, url)
+
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    snapshot = open_snapshot(get_snapshot_path(cache_dir, url))
+    if snapshot is not None and snapshot.url != url:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def store_snapshot(
+    file: str,
+    index: BaseIndex,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> None:
+    try:
+        write_snapshot(file, index, etag=etag, last_modified=last_modified)
+    except OSError:
+        # The cache is an optimization. Failing to write it is not an error.
+        pass
+
+
+def store_database_index(
+    file: str,
+    index: BaseIndex,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> None:
+    try:
+        write_database_index(file, index, etag=etag, last_modified=last_modified)
+    except (OSError, sqlite3.Error):
+        pass
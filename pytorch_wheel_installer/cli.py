@@ -1,34 +1,405 @@
 import argparse
-import subprocess
+import itertools
 import sys
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pip._internal.models.link import Link
+from pip._internal.models.target_python import TargetPython
+from pip._internal.models.wheel import Wheel
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.requirements import Requirement
+from pip._vendor.packaging.utils import canonicalize_name
 
 from .__init__ import __name__ as name  # type: ignore[import]
 from .__init__ import __version__ as version
-from .computation_backend import ComputationBackend
+from .cache import DEFAULT_MAX_AGE
+from .computation_backend import ComputationBackend, detect_computation_backend
 from .find import find_links
+from .index import PYTORCH_STABLE_URL
+from .install import LINK_MODES, install
+from .metadata import get_requires_dist
+from .metrics import collect_metrics
+from .network import FetchPolicy
+from .requirements import split_requirements
+from .utils import Timer, parse_python_version
+
+# The subcommands and the unpacking installation import their modules only when
+# they are used to keep the startup of the common invocations fast.
+if TYPE_CHECKING:
+    from .prefetch import PrefetchStep
 
 __all__ = [
     "entry_point",
     "get_help",
 ]
 
+INSTALL_CMD = "pip install"
+
 
 def entry_point() -> None:
+    argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
     args = parse_input()
     if args.version:
         print(f"{name}=={version}")
         sys.exit()
 
-    if not args.distributions:
+    if not (args.distributions or args.requirements or args.constraints):
         sys.exit()
 
-    links = find_links(args.distributions, computation_backend=args.computation_backend)
+    with collect_metrics(
+        textfile=args.metrics_textfile, log=args.metrics_log
+    ), split_requirements(args.requirements, args.constraints) as requirements:
+        distributions = [*args.distributions, *requirements.distributions]
+        with Timer() as resolution:
+            links = (
+                find_links(
+                    distributions,
+                    constraints=requirements.constraints,
+                    computation_backend=args.computation_backend,
+                    cache=not args.no_cache,
+                    sources=args.find_links,
+                    consistent=args.consistent,
+                    num_workers=args.jobs,
+                    timeout=args.timeout,
+                    fetch_policy=FetchPolicy(retries=args.retries, hedge=args.hedge),
+                    index_db=args.index_db,
+                )
+                if distributions
+                else []
+            )
+        if args.timings:
+            report_timing("resolution", resolution)
 
-    if args.no_install:
-        print("\n".join(links))
-        sys.exit()
+        if args.no_install:
+            print("\n".join(links))
+            sys.exit()
+
+        with Timer() as installation:
+            if args.link_install is not None or args.fast_install:
+                from .unpack import install_wheels
+
+            if args.link_install is not None:
+                install_wheels(links, link_mode=args.link_install)
+            elif args.fast_install:
+                install_wheels(links)
+            else:
+                install(
+                    [*links, *requirements.install_args],
+                    install_cmd=args.install_cmd,
+                    in_process=args.in_process,
+                )
+
+            # The dependencies of the unpacked wheels and the other requirements are
+            # not resolved and thus installed with pip.
+            if args.link_install is not None or args.fast_install:
+                install_args = [
+                    *get_dependencies(links, cache=not args.no_cache),
+                    *requirements.install_args,
+                ]
+                if install_args:
+                    install(install_args, in_process=args.in_process)
+        if args.timings:
+            report_timing("installation", installation)
+
+
+def get_dependencies(links: Sequence[str], cache: bool = True) -> List[str]:
+    session = PipSession()
+    names = {canonicalize_name(Wheel(Link(link).filename).name) for link in links}
+    dependencies: List[str] = []
+    for link in links:
+        for requires_dist in get_requires_dist(session, link, cache=cache):
+            requirement = Requirement(requires_dist)
+            if canonicalize_name(requirement.name) in names:
+                continue
+            marker = requirement.marker
+            # Dependencies of extras are skipped, since no extras are requested.
+            if marker is not None and not marker.evaluate({"extra": ""}):
+                continue
+            requirement.marker = None
+            dependency = str(requirement)
+            if dependency not in dependencies:
+                dependencies.append(dependency)
+    return dependencies
+
+
+def report_timing(name: str, timer: Timer) -> None:
+    print(f"{name}: {timer.duration:.2f} s", file=sys.stderr)
+
+
+def proxy_entry_point(argv: List[str]) -> None:
+    from .proxy import ProxyServer
+
+    args = parse_proxy_input(argv)
+    proxy = ProxyServer(
+        upstream=args.upstream,
+        cache_dir=args.cache_dir,
+        host=args.host,
+        port=args.port,
+        page_ttl=args.page_ttl,
+    )
+    print(f"Serving {args.upstream} at {proxy.index_url}", flush=True)
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.close()
+
+
+def parse_proxy_input(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pwi proxy",
+        description="Serve a local caching proxy of the wheel index and the wheels. "
+        "Point the installer to it with 'pwi -f URL'.",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="address to bind to. Defaults to 127.0.0.1"
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=8080, help="port to bind to. Defaults to 8080"
+    )
+    parser.add_argument(
+        "-u",
+        "--upstream",
+        default=PYTORCH_STABLE_URL,
+        help=f"find-links page to proxy. Defaults to '{PYTORCH_STABLE_URL}'",
+    )
+    parser.add_argument(
+        "--cache-dir", help="directory to cache the pages and wheels in"
+    )
+    parser.add_argument(
+        "--page-ttl",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        help=(
+            "seconds after which a cached page is revalidated with the upstream. "
+            f"Defaults to {DEFAULT_MAX_AGE}"
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def export_links_entry_point(argv: List[str]) -> None:
+    from .export import export_links
+
+    args = parse_export_links_input(argv)
+    links = export_links(
+        args.output_dir,
+        args.distributions,
+        computation_backends=args.computation_backends,
+        target_pythons=args.target_pythons,
+        sources=args.find_links,
+        cache=not args.no_cache,
+    )
+    print(f"Exported {len(links)} links to {args.output_dir}")
+
+
+def parse_export_links_input(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="pwi export-links",
+        description="Write a find-links page and a JSON simple API that only contain "
+        "the wheels of the given distributions matching the computation backends, "
+        "Python versions, and platforms. Pass the page to other pip invocations "
+        "with 'pip install --find-links DIR/index.html'.",
+    )
+    parser.add_argument(
+        "distributions",
+        help="PyTorch distributions in pip/setuptools format",
+        nargs="+",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="directory to write the pages to"
+    )
+    add_combination_arguments(parser, "include")
+    parser.add_argument(
+        "-f",
+        "--find-links",
+        action="append",
+        help=(
+            "URL of a find-links page to export the links from. Can be given "
+            f"multiple times. Defaults to '{PYTORCH_STABLE_URL}'"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="always fetch the wheel index instead of using the cached snapshot",
+    )
+
+    args = parser.parse_args(argv)
+    args.computation_backends = parse_computation_backends(args.computation_backends)
+    args.target_pythons = make_target_pythons(args.python_versions, args.platforms)
+    return args
+
+
+def add_combination_arguments(parser: argparse.ArgumentParser, action: str) -> None:
+    parser.add_argument(
+        "-b",
+        "--computation-backend",
+        action="append",
+        dest="computation_backends",
+        help=(
+            f"computation backend to {action}, e.g. 'cpu' or 'cu102'. Can be given "
+            "multiple times. Defaults to the autodetected backend"
+        ),
+    )
+    parser.add_argument(
+        "--python-version",
+        action="append",
+        dest="python_versions",
+        help=(
+            f"Python version to {action}, e.g. '3.8'. Can be given multiple times. "
+            "Defaults to the running interpreter"
+        ),
+    )
+    parser.add_argument(
+        "--platform",
+        action="append",
+        dest="platforms",
+        help=(
+            f"platform to {action}, e.g. 'linux_x86_64' or 'win_amd64'. Can be given "
+            "multiple times. Defaults to the running platform"
+        ),
+    )
+
+
+def parse_computation_backends(
+    strings: Optional[Sequence[str]],
+) -> List[ComputationBackend]:
+    if strings is None:
+        return [detect_computation_backend()]
+    return [ComputationBackend.from_str(string) for string in strings]
+
+
+def make_target_pythons(
+    python_versions: Optional[Sequence[str]], platforms: Optional[Sequence[str]]
+) -> List[TargetPython]:
+    py_version_infos: List[Optional[Tuple[int, ...]]] = (
+        [parse_python_version(version) for version in python_versions]
+        if python_versions
+        else [None]
+    )
+    target_platforms: List[Optional[str]] = list(platforms) if platforms else [None]
+    return [
+        TargetPython(py_version_info=py_version_info, platform=platform)
+        for py_version_info, platform in itertools.product(
+            py_version_infos, target_platforms
+        )
+    ]
+
+
+def prefetch_entry_point(argv: List[str]) -> None:
+    from .prefetch import prefetch
+
+    args = parse_prefetch_input(argv)
+    with split_requirements(args.requirements) as requirements:
+        distributions = [*args.distributions, *requirements.distributions]
+    if not distributions:
+        sys.exit("No PyTorch distributions to prefetch.")
+
+    with Timer() as timer:
+        steps = prefetch(
+            distributions,
+            computation_backends=args.computation_backends,
+            target_pythons=args.target_pythons,
+            sources=args.find_links,
+            index_db=args.index_db,
+            store=args.store,
+            num_workers=args.jobs,
+        )
+    for step in steps:
+        print(format_step(step))
+    print(f"Prefetched in {timer.duration:.2f} s")
+
+    if any(step.error is not None for step in steps):
+        sys.exit(1)
 
-    subprocess.check_call(" ".join((args.install_cmd, *links)), shell=True)
+
+def format_step(step: "PrefetchStep") -> str:
+    line = f"{step.kind:<7} {step.duration:7.2f} s  {step.target}"
+    if step.error is not None:
+        line += f"  FAILED: {step.error}"
+    return line
+
+
+def parse_prefetch_input(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    from .prefetch import DEFAULT_NUM_WORKERS
+
+    parser = argparse.ArgumentParser(
+        prog="pwi prefetch",
+        description="Refresh the cached wheel indices and resolve the distributions "
+        "for all combinations of computation backends, Python versions, and "
+        "platforms. Run it from cron or during an image build to keep later "
+        "invocations off the network.",
+    )
+    parser.add_argument(
+        "distributions",
+        help="PyTorch distributions in pip/setuptools format",
+        nargs="*",
+    )
+    parser.add_argument(
+        "-r",
+        "--requirement",
+        action="append",
+        dest="requirements",
+        default=[],
+        metavar="FILE",
+        help="prefetch the PyTorch distributions of the requirements file",
+    )
+    add_combination_arguments(parser, "prefetch")
+    parser.add_argument(
+        "-f",
+        "--find-links",
+        action="append",
+        help=(
+            "URL of a find-links page to prefetch. Can be given multiple times. "
+            f"Defaults to '{PYTORCH_STABLE_URL}'"
+        ),
+    )
+    parser.add_argument(
+        "--index-db",
+        metavar="FILE",
+        help=(
+            "SQLite database to cache the wheel index in. Defaults to the "
+            "PWI_INDEX_DB environment variable"
+        ),
+    )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        default=False,
+        help=(
+            "download the resolved wheels and extract them into the shared tree "
+            "used by '--link-install'"
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_NUM_WORKERS,
+        help=(
+            "number of concurrent fetches, resolutions, and downloads. Defaults to "
+            f"{DEFAULT_NUM_WORKERS}"
+        ),
+    )
+
+    args = parser.parse_args(argv)
+    args.computation_backends = parse_computation_backends(args.computation_backends)
+    args.target_pythons = make_target_pythons(args.python_versions, args.platforms)
+    return args
+
+
+COMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    "proxy": proxy_entry_point,
+    "export-links": export_links_entry_point,
+    "prefetch": prefetch_entry_point,
+}
 
 
 def parse_input() -> argparse.Namespace:
@@ -49,6 +420,31 @@ def parse_input() -> argparse.Namespace:
         help="PyTorch distributions in pip/setuptools format",
         nargs="*",
     )
+    parser.add_argument(
+        "-r",
+        "--requirement",
+        action="append",
+        dest="requirements",
+        default=[],
+        metavar="FILE",
+        help=(
+            "install the PyTorch distributions from the requirements file. All other "
+            "lines are passed through to the installation command. Can be given "
+            "multiple times"
+        ),
+    )
+    parser.add_argument(
+        "--constraint",
+        action="append",
+        dest="constraints",
+        default=[],
+        metavar="FILE",
+        help=(
+            "constrain the PyTorch distributions with the constraints file. All "
+            "other lines are passed through to the installation command. Can be "
+            "given multiple times"
+        ),
+    )
     parser.add_argument(
         "-b", "--computation-backend", help=get_help("computation_backend"),
     )
@@ -59,16 +455,145 @@ def parse_input() -> argparse.Namespace:
         default=False,
         help=("print wheel links instead of installing"),
     )
+    parser.add_argument(
+        "-f",
+        "--find-links",
+        action="append",
+        help=(
+            "URL of a find-links page to search for wheels. Can be given multiple "
+            "times; earlier pages take precedence over later ones. Defaults to "
+            f"'{PYTORCH_STABLE_URL}'"
+        ),
+    )
+    parser.add_argument(
+        "--consistent",
+        action="store_true",
+        default=False,
+        help=(
+            "select mutually compatible versions of the distributions, e.g. "
+            "torchvision for the selected torch, by reading only the metadata of "
+            "candidate wheels"
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "number of processes to parse large wheel indices and evaluate their "
+            "links with. Defaults to 1, i.e. no worker processes"
+        ),
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help=(
+            "seconds after which the resolution is aborted. If the wheel index "
+            "cannot be fetched in time, a stale cached index is used if available"
+        ),
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=FetchPolicy().retries,
+        help=(
+            "number of retries with exponential backoff if fetching the wheel index "
+            f"fails. Defaults to {FetchPolicy().retries}"
+        ),
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        default=False,
+        help=(
+            "fetch the wheel index a second time if the first request takes longer "
+            "than usual and use whichever response arrives first"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="always fetch the wheel index instead of using the cached snapshot",
+    )
+    parser.add_argument(
+        "--index-db",
+        metavar="FILE",
+        help=(
+            "SQLite database to cache the wheel index in instead of the per-user "
+            "snapshot. It can be shared by concurrent invocations. Defaults to the "
+            "PWI_INDEX_DB environment variable"
+        ),
+    )
     parser.add_argument(
         "-c",
         "--install-cmd",
         type=str,
-        default="pip install",
-        help="installation command. Defaults to 'pip install'",
+        default=INSTALL_CMD,
+        help=f"installation command. Defaults to '{INSTALL_CMD}'",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        default=False,
+        help="run the pip installation command within this interpreter",
+    )
+    unpack_group = parser.add_mutually_exclusive_group()
+    unpack_group.add_argument(
+        "--fast-install",
+        action="store_true",
+        default=False,
+        help=(
+            "install the wheels by unpacking them directly into site-packages "
+            "instead of running the installation command. Their dependencies are "
+            "installed with 'pip install'"
+        ),
+    )
+    unpack_group.add_argument(
+        "--link-install",
+        choices=LINK_MODES,
+        metavar="MODE",
+        help=(
+            "install the wheels by linking the files of a shared tree, which is "
+            "extracted once per wheel, into site-packages. MODE is one of "
+            f"{', '.join(LINK_MODES)}. If linking is not possible, the files are "
+            "copied. Their dependencies are installed with 'pip install'"
+        ),
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        default=False,
+        help="report resolution and installation durations on STDERR",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="FILE",
+        help=(
+            "write counters and timings of the backend detection, index fetches, "
+            "resolution, and installation as Prometheus textfile. Defaults to the "
+            "PWI_METRICS_TEXTFILE environment variable"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-log",
+        metavar="FILE",
+        help=(
+            "append the individual metrics observations as JSON lines. Defaults to "
+            "the PWI_METRICS_LOG environment variable"
+        ),
     )
 
     args = parser.parse_args()
 
+    is_unpacked = args.fast_install or args.link_install is not None
+    if is_unpacked and args.install_cmd != INSTALL_CMD:
+        parser.error(
+            "argument -c/--install-cmd: not allowed with argument --fast-install or "
+            "--link-install"
+        )
+
     if args.computation_backend is not None:
         args.computation_backend = ComputationBackend.from_str(args.computation_backend)
 
@@ -1,7 +1,9 @@
 import re
 import subprocess
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
+
+from .metrics import METRICS
 
 __all__ = [
     "ComputationBackend",
@@ -76,11 +78,18 @@ class CUDABackend(ComputationBackend):
 NVCC_RELEASE_PATTERN = re.compile(r"release (?P<major>\d+)[.](?P<minor>\d+)")
 
 
-def detect_computation_backend() -> ComputationBackend:
+def detect_computation_backend(timeout: Optional[float] = None) -> ComputationBackend:
+    with METRICS.time("backend_detection_seconds") as labels:
+        computation_backend = detect_nvcc_backend(timeout)
+        labels["backend"] = str(computation_backend)
+    return computation_backend
+
+
+def detect_nvcc_backend(timeout: Optional[float] = None) -> ComputationBackend:
     fallback = CPUBackend()
     try:
         output = (
-            subprocess.check_output("nvcc --version", shell=True)
+            subprocess.check_output(("nvcc", "--version"), timeout=timeout)
             .decode("utf-8")
             .strip()
         )
@@ -90,5 +99,7 @@ def detect_computation_backend() -> ComputationBackend:
 
         major, minor = match[0]
         return CUDABackend(int(major), int(minor))
-    except subprocess.CalledProcessError:
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"nvcc did not respond within {timeout:g} seconds.")
+    except (subprocess.CalledProcessError, OSError):
         return fallback
@@ -0,0 +1,270 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+from pip._vendor.packaging.utils import canonicalize_name
+
+from .index import BaseIndex, IndexEntry, get_computation_backend
+
+__all__ = ["DatabaseIndex", "write_database_index", "get_index_db"]
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    project_id INTEGER NOT NULL REFERENCES projects (id),
+    position INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    backend TEXT,
+    python_tag TEXT,
+    abi_tag TEXT,
+    platform_tag TEXT,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_project
+    ON files (source_id, project_id, backend, position);
+CREATE INDEX IF NOT EXISTS files_by_position ON files (source_id, position);
+"""
+
+# Seconds to wait for a concurrent refresh to release the write lock.
+BUSY_TIMEOUT = 30.0
+
+
+def get_index_db() -> Optional[str]:
+    return os.environ.get("PWI_INDEX_DB") or None
+
+
+def connect(file: str) -> sqlite3.Connection:
+    dir = os.path.dirname(file)
+    if dir:
+        os.makedirs(dir, exist_ok=True)
+    # Transactions are managed explicitly.
+    connection = sqlite3.connect(
+        file, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+    )
+    try:
+        # In WAL mode readers do not block the writer and vice versa. Each reader
+        # sees the index as of the start of its transaction.
+        connection.execute("PRAGMA journal_mode=WAL")
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(
+                f"{file} has schema version {version}, "
+                f"but only version {SCHEMA_VERSION} is supported."
+            )
+        if version == 0:
+            # All statements are idempotent and thus concurrent initializations
+            # do not conflict.
+            connection.executescript(f"{SCHEMA}PRAGMA user_version = {SCHEMA_VERSION};")
+    except BaseException:
+        connection.close()
+        raise
+    return connection
+
+
+def get_tags(url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    filename = url.rsplit("/", 1)[-1].split("#", 1)[0]
+    if not filename.endswith(".whl"):
+        return None, None, None
+    parts = filename[: -len(".whl")].split("-")
+    if len(parts) < 5:
+        return None, None, None
+    python_tag, abi_tag, platform_tag = parts[-3:]
+    return python_tag, abi_tag, platform_tag
+
+
+def write_database_index(
+    file: str,
+    index: BaseIndex,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    updated: Optional[float] = None,
+) -> None:
+    if updated is None:
+        updated = time.time()
+
+    connection = connect(file)
+    try:
+        # The refresh is atomic. Concurrent readers see either the old or the new
+        # index, but never a mix of both.
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, digest FROM sources WHERE url = ?", (index.url,)
+            ).fetchone()
+            if row is not None and row[1] == index.digest:
+                connection.execute(
+                    "UPDATE sources SET etag = ?, last_modified = ?, updated = ? "
+                    "WHERE id = ?",
+                    (etag, last_modified, updated, row[0]),
+                )
+            else:
+                replace_files(connection, row, index, etag, last_modified, updated)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    finally:
+        connection.close()
+
+
+def replace_files(
+    connection: sqlite3.Connection,
+    row: Optional[Tuple[int, str]],
+    index: BaseIndex,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    updated: float,
+) -> None:
+    if row is None:
+        source_id = connection.execute(
+            "INSERT INTO sources (url, digest, etag, last_modified, updated) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (index.url, index.digest, etag, last_modified, updated),
+        ).lastrowid
+    else:
+        source_id = row[0]
+        connection.execute("DELETE FROM files WHERE source_id = ?", (source_id,))
+        connection.execute(
+            "UPDATE sources SET digest = ?, etag = ?, last_modified = ?, updated = ? "
+            "WHERE id = ?",
+            (index.digest, etag, last_modified, updated, source_id),
+        )
+
+    entries = list(index)
+    connection.executemany(
+        "INSERT OR IGNORE INTO projects (name) VALUES (?)",
+        [(project,) for project in {entry.project for entry in entries}],
+    )
+    project_ids = dict(connection.execute("SELECT name, id FROM projects"))
+    connection.executemany(
+        "INSERT INTO files (source_id, project_id, position, version, backend, "
+        "python_tag, abi_tag, platform_tag, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                source_id,
+                project_ids[entry.project],
+                position,
+                entry.version,
+                get_computation_backend(entry),
+                *get_tags(entry.url),
+                entry.url,
+            )
+            for position, entry in enumerate(entries)
+        ],
+    )
+
+
+class DatabaseIndex(BaseIndex):
+    """Index of a single source stored in a SQLite database.
+
+    Each query runs in its own short read transaction, since an open transaction
+    keeps the write-ahead log from being checkpointed. Thus, refreshes by other
+    processes become visible to the next query. The metadata of the source, e.g.
+    the digest and the ETag, is read when the index is opened.
+    """
+
+    def __init__(self, file: str, url: str) -> None:
+        self.file = file
+        self._lock = threading.Lock()
+        self._connection = connect(file)
+        try:
+            row = self._connection.execute(
+                "SELECT id, digest, etag, last_modified, updated FROM sources "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                raise RuntimeError(f"{file} does not contain an index of {url}.")
+        except BaseException:
+            self.close()
+            raise
+
+        self.url = url
+        (
+            self._source_id,
+            self.digest,
+            self.etag,
+            self.last_modified,
+            self.updated,
+        ) = row
+
+    def _query(self, sql: str, *parameters: Any) -> List[Any]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @property
+    def age(self) -> float:
+        return time.time() - float(self.updated)
+
+    @property
+    def projects(self) -> List[str]:
+        return [
+            name
+            for (name,) in self._query(
+                "SELECT projects.name FROM files "
+                "JOIN projects ON projects.id = files.project_id "
+                "WHERE files.source_id = ? "
+                "GROUP BY projects.id ORDER BY MIN(files.position)",
+                self._source_id,
+            )
+        ]
+
+    def entries(self, project_name: str) -> List[IndexEntry]:
+        return self.find_entries(project_name)
+
+    def find_entries(
+        self, project_name: str, computation_backend: Optional[str] = None
+    ) -> List[IndexEntry]:
+        sql = (
+            "SELECT projects.name, files.version, files.url FROM files "
+            "JOIN projects ON projects.id = files.project_id "
+            "WHERE files.source_id = ? AND projects.name = ?"
+        )
+        parameters = [self._source_id, canonicalize_name(project_name)]
+        if computation_backend is not None:
+            sql += " AND files.backend = ?"
+            parameters.append(computation_backend)
+        sql += " ORDER BY files.position"
+        return [IndexEntry(*row) for row in self._query(sql, *parameters)]
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        rows = self._query(
+            "SELECT projects.name, files.version, files.url FROM files "
+            "JOIN projects ON projects.id = files.project_id "
+            "WHERE files.source_id = ? ORDER BY files.position",
+            self._source_id,
+        )
+        for row in rows:
+            yield IndexEntry(*row)
+
+    def __len__(self) -> int:
+        ((count,),) = self._query(
+            "SELECT COUNT(*) FROM files WHERE source_id = ?", self._source_id
+        )
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "DatabaseIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,51 @@
+import glob
+import os
+from email.parser import Parser
+from os import path
+from typing import Dict, Iterable, List
+
+from pip._vendor.packaging.utils import canonicalize_name
+
+__all__ = ["find_site_packages", "get_installed_distributions"]
+
+
+def find_site_packages(env_dir: str) -> List[str]:
+    patterns = (
+        path.join(env_dir, "lib", "python*", "site-packages"),
+        path.join(env_dir, "lib64", "python*", "site-packages"),
+        path.join(env_dir, "Lib", "site-packages"),
+    )
+    dirs: List[str] = []
+    # lib64 is commonly a symlink to lib.
+    real_dirs: List[str] = []
+    for pattern in patterns:
+        for dir in sorted(glob.glob(pattern)):
+            real_dir = path.realpath(dir)
+            if path.isdir(dir) and real_dir not in real_dirs:
+                dirs.append(dir)
+                real_dirs.append(real_dir)
+    return dirs
+
+
+def get_installed_distributions(site_packages: Iterable[str]) -> Dict[str, str]:
+    """Read the names and versions of the installed distributions from their
+    metadata without importing them.
+    """
+    distributions = {}
+    for dir in site_packages:
+        try:
+            names = os.listdir(dir)
+        except FileNotFoundError:
+            continue
+
+        for name in names:
+            if not name.endswith(".dist-info"):
+                continue
+            try:
+                with open(path.join(dir, name, "METADATA"), "r") as fh:
+                    metadata = Parser().parse(fh, headersonly=True)
+            except OSError:
+                continue
+            if metadata["Name"] and metadata["Version"]:
+                distributions[canonicalize_name(metadata["Name"])] = metadata["Version"]
+    return distributions
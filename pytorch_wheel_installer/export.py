@@ -0,0 +1,138 @@
+import html
+import itertools
+import json
+import os
+from collections import OrderedDict
+from os import path
+from typing import Dict, Iterable, List, Optional, Sequence, Union, cast
+
+from pip._internal.models.link import Link
+from pip._internal.models.target_python import TargetPython
+from pip._vendor.packaging.utils import canonicalize_name
+
+from .computation_backend import ComputationBackend
+from .find import Resolver, get_requirements, make_pytorch_packager_finder
+from .index import BaseIndex, IndexSource, split_filename
+
+__all__ = ["export_links", "select_links"]
+
+PAGE_FILE = "index.html"
+SIMPLE_DIR = "simple"
+SIMPLE_API_VERSION = "1.0"
+
+
+def export_links(
+    output_dir: str,
+    distributions: Iterable[str],
+    computation_backends: Sequence[ComputationBackend],
+    target_pythons: Optional[Sequence[TargetPython]] = None,
+    sources: Optional[Sequence[Union[str, IndexSource]]] = None,
+    cache: bool = True,
+) -> List[Link]:
+    resolver = Resolver(sources=sources, cache=cache)
+    try:
+        links = select_links(
+            resolver.index, distributions, computation_backends, target_pythons
+        )
+    finally:
+        resolver.close()
+
+    write_find_links_page(path.join(output_dir, PAGE_FILE), links)
+    write_simple_api(path.join(output_dir, SIMPLE_DIR), links)
+    return links
+
+
+def select_links(
+    index: BaseIndex,
+    distributions: Iterable[str],
+    computation_backends: Sequence[ComputationBackend],
+    target_pythons: Optional[Sequence[TargetPython]] = None,
+) -> List[Link]:
+    if target_pythons is None:
+        target_pythons = (TargetPython(),)
+    reqs = get_requirements(distributions)
+
+    # Different combinations may select the same wheel, e.g. pure Python wheels.
+    links: Dict[str, Link] = OrderedDict()
+    for computation_backend, target_python in itertools.product(
+        computation_backends, target_pythons
+    ):
+        finder = make_pytorch_packager_finder(
+            target_python=target_python,
+            computation_backend=computation_backend,
+            index=index,
+        )
+        for req in reqs:
+            candidate_evaluator = finder.make_candidate_evaluator(
+                req.name, specifier=req.specifier
+            )
+            for candidate in candidate_evaluator.get_applicable_candidates(
+                finder.find_all_candidates(req.name)
+            ):
+                links.setdefault(candidate.link.url, candidate.link)
+
+    return sorted(links.values(), key=lambda link: (get_project(link), link.filename))
+
+
+def get_project(link: Link) -> str:
+    name_and_version = split_filename(link.filename)
+    if name_and_version is None:
+        return cast(str, canonicalize_name(link.filename.split("-", 1)[0]))
+    return name_and_version[0]
+
+
+def get_hashes(link: Link) -> Dict[str, str]:
+    if link.hash_name is None or link.hash is None:
+        return {}
+    return {link.hash_name: link.hash}
+
+
+def write_find_links_page(file: str, links: Sequence[Link]) -> None:
+    anchors = "\n".join(
+        f'<a href="{html.escape(link.url)}">{html.escape(link.filename)}</a><br>'
+        for link in links
+    )
+    write_text(file, f"<!DOCTYPE html>\n<html>\n<body>\n{anchors}\n</body>\n</html>\n")
+
+
+def write_simple_api(dir: str, links: Sequence[Link]) -> None:
+    # PEP 691 JSON responses. Static file servers have to serve them with the
+    # content type application/vnd.pypi.simple.v1+json.
+    meta = {"api-version": SIMPLE_API_VERSION}
+    projects = [
+        (project, list(project_links))
+        for project, project_links in itertools.groupby(links, key=get_project)
+    ]
+
+    write_json(
+        path.join(dir, "index.json"),
+        {"meta": meta, "projects": [{"name": project} for project, _ in projects]},
+    )
+    for project, project_links in projects:
+        write_json(
+            path.join(dir, project, "index.json"),
+            {
+                "meta": meta,
+                "name": project,
+                "files": [
+                    {
+                        "filename": link.filename,
+                        "url": link.url_without_fragment,
+                        "hashes": get_hashes(link),
+                    }
+                    for link in project_links
+                ],
+            },
+        )
+
+
+def write_json(file: str, obj: object) -> None:
+    write_text(file, json.dumps(obj, indent=2) + "\n")
+
+
+def write_text(file: str, text: str) -> None:
+    os.makedirs(path.dirname(file) or ".", exist_ok=True)
+    tmp = f"{file}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(text)
+    os.replace(tmp, file)
@@ -0,0 +1,135 @@
+import bisect
+import hashlib
+import json
+import os
+from os import path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from pip._internal.req.req_install import InstallRequirement
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.version import parse as parse_version
+
+from .cache import get_cache_dir
+from .computation_backend import ComputationBackend, CUDABackend
+from .index import BaseIndex, get_computation_backend
+
+__all__ = ["get_failure_key", "load_failure", "store_failure", "explain_not_found"]
+
+# Number of available versions that are listed around the requested one.
+NUM_NEARBY_VERSIONS = 5
+
+
+def get_failure_key(
+    digest: str,
+    requirements: Sequence[str],
+    computation_backend: str,
+    tags: Sequence[str],
+    consistent: bool = False,
+) -> str:
+    # A failure only depends on the index, the requirements, the computation
+    # backend, and the supported tags of the target interpreter.
+    data = json.dumps(
+        [digest, list(requirements), computation_backend, list(tags), consistent]
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def get_failure_path(cache_dir: str, key: str) -> str:
+    return path.join(cache_dir, "failures", f"{key[:32]}.json")
+
+
+def load_failure(key: str, cache_dir: Optional[str] = None) -> Optional[str]:
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    try:
+        with open(get_failure_path(cache_dir, key), "r") as fh:
+            cached: Dict[str, str] = json.load(fh)
+        if cached["key"] != key:
+            return None
+        return cached["message"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def store_failure(key: str, message: str, cache_dir: Optional[str] = None) -> None:
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    file = get_failure_path(cache_dir, key)
+    try:
+        os.makedirs(path.dirname(file), exist_ok=True)
+        tmp = f"{file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"key": key, "message": message}, fh)
+        os.replace(tmp, file)
+    except OSError:
+        pass
+
+
+def explain_not_found(
+    index: BaseIndex,
+    req: InstallRequirement,
+    computation_backend: str,
+    tag: Optional[str] = None,
+) -> str:
+    message = (
+        f"No matching distribution found for {req} "
+        f"with computation backend {computation_backend}."
+    )
+    entries = index.entries(req.name)
+    if not entries:
+        return f"{message} The index contains no distributions of {req.name}."
+
+    specifier: SpecifierSet = req.specifier
+    backend_versions: Set[Any] = set()
+    matching_backends: Set[str] = set()
+    for entry in entries:
+        version = parse_version(parse_version(entry.version).public)
+        backend = get_computation_backend(entry)
+        if backend == computation_backend:
+            backend_versions.add(version)
+        if backend is not None and specifier.contains(version, prereleases=True):
+            matching_backends.add(backend)
+
+    details = []
+    if backend_versions:
+        versions = select_nearby_versions(sorted(backend_versions), specifier)
+        details.append(
+            f"Versions available for {computation_backend}: "
+            f"{', '.join(map(str, versions))}."
+        )
+    else:
+        details.append(f"No versions are available for {computation_backend}.")
+
+    if matching_backends:
+        details.append(
+            f"Computation backends available for {req}: "
+            f"{', '.join(sorted(matching_backends, key=backend_sort_key))}."
+        )
+    if computation_backend in matching_backends:
+        detail = (
+            f"The wheels of {req} for {computation_backend} are not compatible with "
+            "this interpreter and platform"
+        )
+        details.append(f"{detail} ({tag})." if tag is not None else f"{detail}.")
+
+    return " ".join((message, *details))
+
+
+def select_nearby_versions(versions: List[Any], specifier: SpecifierSet) -> List[Any]:
+    pins = [spec.version for spec in specifier if spec.operator in ("==", "===")]
+    if not pins:
+        return versions[-NUM_NEARBY_VERSIONS:]
+
+    position = bisect.bisect_left(versions, parse_version(pins[0].rstrip(".*")))
+    start = max(
+        min(position - NUM_NEARBY_VERSIONS // 2, len(versions) - NUM_NEARBY_VERSIONS),
+        0,
+    )
+    return versions[start : start + NUM_NEARBY_VERSIONS]
+
+
+def backend_sort_key(backend: str) -> Tuple[int, int, int]:
+    computation_backend = ComputationBackend.from_str(backend)
+    if isinstance(computation_backend, CUDABackend):
+        return 1, computation_backend.major, computation_backend.minor
+    return 0, 0, 0
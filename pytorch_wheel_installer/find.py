@@ -1,6 +1,26 @@
-import re
-from typing import Any, Iterable, List, Optional, Text, Tuple, cast
+import concurrent.futures
+import itertools
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
+from pip._internal.exceptions import DistributionNotFound
 from pip._internal.index.collector import LinkCollector
 from pip._internal.index.package_finder import (
     CandidateEvaluator,
@@ -17,35 +37,110 @@ from pip._internal.network.session import PipSession
 from pip._internal.req.constructors import install_req_from_line
 from pip._internal.req.req_install import InstallRequirement
 from pip._internal.req.req_set import RequirementSet
+from pip._vendor.packaging.markers import default_environment
+from pip._vendor.packaging.requirements import Requirement
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.utils import canonicalize_name
 
+from .cache import DEFAULT_MAX_AGE, load_index, load_stale_index
 from .computation_backend import ComputationBackend, detect_computation_backend
-from .utils import get_public_or_private_attr
+from .database import get_index_db
+from .failures import explain_not_found, get_failure_key, load_failure, store_failure
+from .index import (
+    LOCAL_PATH_PATTERN,
+    LOCAL_PATTERN,
+    PYTORCH_STABLE_URL,
+    BaseIndex,
+    IndexSource,
+    MergedIndex,
+    fetch_index,
+)
+from .metadata import get_requires_dist
+from .metrics import METRICS
+from .network import FetchPolicy
+from .utils import Deadline, get_public_or_private_attr, run_in_thread
+
+__all__ = ["find_links", "Resolver"]
+
+T = TypeVar("T")
 
-__all__ = ["find_links"]
+# Projects with fewer links are evaluated serially, since the overhead of the worker
+# processes would outweigh the parallel evaluation.
+PARALLEL_EVALUATION_THRESHOLD = 4000
+EVALUATION_SHARD_SIZE = 1000
+
+# Share of the remaining time of a resolution that is spent waiting for an index
+# fetch if a stale cached index is available as fallback.
+STALE_FETCH_SHARE = 0.5
 
 
 def find_links(
     distributions: Iterable[str],
     computation_backend: Optional[ComputationBackend] = None,
+    cache: bool = True,
+    sources: Optional[Sequence[Union[str, IndexSource]]] = None,
+    consistent: bool = False,
+    num_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    fetch_policy: Optional[FetchPolicy] = None,
+    index_db: Optional[str] = None,
+    constraints: Iterable[str] = (),
 ) -> List[str]:
-    reqs = get_requirements(distributions)
-    finder = make_pytorch_packager_finder(computation_backend=computation_backend)
-    return [finder.find_requirement(req, upgrade=True).url for req in reqs]
+    resolver = Resolver(
+        computation_backend=computation_backend,
+        cache=cache,
+        sources=sources,
+        consistent=consistent,
+        num_workers=num_workers,
+        timeout=timeout,
+        fetch_policy=fetch_policy,
+        index_db=index_db,
+    )
+    try:
+        return list(resolver.resolve(distributions, constraints=constraints).values())
+    finally:
+        resolver.close()
 
 
-def get_requirements(args: Iterable[str]) -> List[InstallRequirement]:
+def get_requirements(
+    args: Iterable[str], constraints: Iterable[str] = ()
+) -> List[InstallRequirement]:
     requirement_set = RequirementSet()
     for req in args:
         req_to_add = install_req_from_line(req, comes_from=None)
         req_to_add.is_direct = True
         requirement_set.add_requirement(req_to_add)
-    return cast(List[InstallRequirement], requirement_set.all_requirements)
+    reqs = cast(List[InstallRequirement], requirement_set.all_requirements)
+
+    # In contrast to pip, which replaces the specifier of a requirement with the one
+    # of its constraint, the requirement has to satisfy both.
+    specifiers: Dict[str, SpecifierSet] = {}
+    for constraint in constraints:
+        constraint_req = install_req_from_line(
+            constraint, comes_from=None, constraint=True
+        )
+        if constraint_req.name is None or not constraint_req.match_markers():
+            continue
+        name = canonicalize_name(constraint_req.name)
+        specifiers[name] = (
+            specifiers.get(name, SpecifierSet()) & constraint_req.specifier
+        )
+    for req in reqs:
+        if req.name is None:
+            continue
+        specifier = specifiers.get(canonicalize_name(req.name))
+        if specifier is not None:
+            req.req.specifier = req.req.specifier & specifier
+    return reqs
 
 
 def make_pytorch_packager_finder(
     session: Optional[PipSession] = None,
     target_python: Optional[TargetPython] = None,
     computation_backend: Optional[ComputationBackend] = None,
+    index: Optional[BaseIndex] = None,
+    candidates: Optional[Dict[str, List[InstallationCandidate]]] = None,
+    executor: Optional[Executor] = None,
 ) -> PackageFinder:
     if session is None:
         session = PipSession()
@@ -54,26 +149,37 @@ def make_pytorch_packager_finder(
     if computation_backend is None:
         computation_backend = detect_computation_backend()
 
-    link_collector = make_pytorch_link_collector(session)
+    if isinstance(index, MergedIndex):
+        link_collector = make_pytorch_link_collector(
+            session, url=[idx.url for idx in index.indices]
+        )
+    elif index is not None:
+        link_collector = make_pytorch_link_collector(session, url=index.url)
+    else:
+        link_collector = make_pytorch_link_collector(session)
     selection_prefs = SelectionPreferences(allow_yanked=True)
     return PytorchPackageFinder.create(
         link_collector=link_collector,
         selection_prefs=selection_prefs,
         target_python=target_python,
         computation_backend=computation_backend,
+        index=index,
+        candidates=candidates,
+        executor=executor,
     )
 
 
 def make_pytorch_link_collector(
-    session: PipSession, url: str = "https://download.pytorch.org/whl/torch_stable.html"
+    session: PipSession, url: Union[str, Sequence[str]] = PYTORCH_STABLE_URL
 ) -> LinkCollector:
-    search_scope = SearchScope.create(find_links=[url], index_urls=[])
+    find_links = [url] if isinstance(url, str) else list(url)
+    search_scope = SearchScope.create(find_links=find_links, index_urls=[])
     return LinkCollector(session=session, search_scope=search_scope)
 
 
 class PytorchLinkEvaluator(LinkEvaluator):
-    HAS_LOCAL_PATTERN = re.compile(r"[+](cpu|cu\d+)$")
-    EXTRACT_LOCAL_PATTERN = re.compile(r"^/whl/(?P<local>(cpu|cu\d+))")
+    HAS_LOCAL_PATTERN = LOCAL_PATTERN
+    EXTRACT_LOCAL_PATTERN = LOCAL_PATH_PATTERN
 
     def evaluate_link(self, link: Link) -> Tuple[bool, Optional[Text]]:
         output = cast(Tuple[bool, Optional[Text]], super().evaluate_link(link))
@@ -192,12 +298,20 @@ class PytorchCandidateEvaluator(CandidateEvaluator):
 
 class PytorchPackageFinder(PackageFinder):
     _candidate_prefs: PytorchCandidatePreferences
+    _index: Optional[BaseIndex] = None
+    _candidates: Dict[str, List[InstallationCandidate]]
+    _executor: Optional[Executor] = None
+    # Set by the resolver for the resolution that is currently using the finder.
+    _deadline: Optional[Deadline] = None
 
     @classmethod
     def create(
         cls,
         *args: Any,
         computation_backend: Optional[ComputationBackend] = None,
+        index: Optional[BaseIndex] = None,
+        candidates: Optional[Dict[str, List[InstallationCandidate]]] = None,
+        executor: Optional[Executor] = None,
         **kwargs: Any,
     ) -> PackageFinder:
         package_finder = super().create(*args, **kwargs)
@@ -206,9 +320,77 @@ class PytorchPackageFinder(PackageFinder):
             package_finder._candidate_prefs, computation_backend=computation_backend
         )
         package_finder._candidate_prefs = candidate_prefs
+        package_finder._index = index
+        package_finder._candidates = candidates if candidates is not None else {}
+        package_finder._executor = executor
 
         return package_finder
 
+    def find_all_candidates(self, project_name: str) -> List[InstallationCandidate]:
+        if self._index is None:
+            return cast(
+                List[InstallationCandidate], super().find_all_candidates(project_name)
+            )
+
+        # The index does not change during the lifetime of the finder and thus the
+        # candidates only need to be evaluated once per project. The cache may be
+        # shared between finders of different threads.
+        canonical_name = canonicalize_name(project_name)
+        if canonical_name not in self._candidates:
+            self.check_deadline(f"evaluating the links of {project_name}")
+            link_evaluator = self.make_link_evaluator(project_name)
+            # Links of other computation backends are never applicable and thus
+            # are not evaluated at all.
+            links = self._index.find_links(
+                project_name,
+                computation_backend=str(self._candidate_prefs.computation_backend),
+            )
+            with METRICS.time("link_evaluation_seconds"):
+                candidates = self.evaluate_links(link_evaluator, links)
+            METRICS.increment("links_evaluated_total", len(links))
+            METRICS.increment("candidates_total", len(candidates))
+            self._candidates[canonical_name] = candidates
+        return list(self._candidates[canonical_name])
+
+    def evaluate_links(
+        self, link_evaluator: LinkEvaluator, links: Iterable[Link]
+    ) -> List[InstallationCandidate]:
+        links = self._sort_links(links)
+        shards = [
+            links[idx : idx + EVALUATION_SHARD_SIZE]
+            for idx in range(0, len(links), EVALUATION_SHARD_SIZE)
+        ]
+        action = f"evaluating the links of {link_evaluator.project_name}"
+
+        if self._executor is None or len(links) < PARALLEL_EVALUATION_THRESHOLD:
+            candidates: List[InstallationCandidate] = []
+            for shard in shards:
+                self.check_deadline(action)
+                candidates.extend(super().evaluate_links(link_evaluator, shard))
+            return candidates
+
+        results = self._executor.map(
+            evaluate_link_shard,
+            itertools.repeat(link_evaluator),
+            [[link.url for link in shard] for shard in shards],
+            timeout=self._deadline.remaining if self._deadline is not None else None,
+        )
+        try:
+            return [
+                InstallationCandidate(
+                    name=link_evaluator.project_name, link=link, version=version
+                )
+                for shard, versions in zip(shards, results)
+                for link, version in zip(shard, versions)
+                if version is not None
+            ]
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"The deadline was exceeded while {action}.")
+
+    def check_deadline(self, action: str) -> None:
+        if self._deadline is not None:
+            self._deadline.check(action)
+
     def make_candidate_evaluator(
         self, *args: Any, **kwargs: Any,
     ) -> PytorchCandidateEvaluator:
@@ -221,3 +403,630 @@ class PytorchPackageFinder(PackageFinder):
     def make_link_evaluator(self, *args: Any, **kwargs: Any) -> PytorchLinkEvaluator:
         link_evaluator = super().make_link_evaluator(*args, **kwargs)
         return PytorchLinkEvaluator.from_link_evaluator(link_evaluator)
+
+
+def evaluate_link_shard(
+    link_evaluator: LinkEvaluator, urls: Sequence[str]
+) -> List[Optional[str]]:
+    # Only the URLs and the versions are transferred between the processes, since
+    # they are much cheaper to pickle than the links and the candidates.
+    versions: List[Optional[str]] = []
+    for url in urls:
+        is_candidate, result = link_evaluator.evaluate_link(Link(url))
+        versions.append(str(result) if is_candidate else None)
+    return versions
+
+
+class Resolver:
+    """Resolves PyTorch distributions to wheel links.
+
+    A resolver can be shared by multiple threads. The computation backend, the
+    session, and the parsed indices are created once and shared, whereas each thread
+    uses its own finder. Concurrent resolutions of the same requirement are
+    coalesced.
+
+    If ``num_workers`` is larger than one, large index pages are parsed and the
+    links of projects with many wheels are evaluated in a pool of worker processes.
+    Call :meth:`close` to shut it down and to close the fetched indices.
+
+    If ``timeout`` is given, each resolution raises a :class:`TimeoutError` if it
+    takes longer. The remaining time bounds the backend detection, the index
+    fetches, and the link evaluation. If an index cannot be fetched in time, a stale
+    cached snapshot of it is used if available. ``fetch_policy`` controls retries
+    and hedged requests of the index fetches.
+
+    If ``index_db`` is given, or the ``PWI_INDEX_DB`` environment variable is set,
+    the indices are cached in this SQLite database instead of the per-user
+    snapshots. Concurrent processes share the database and thus one warm index.
+
+    Requirements that cannot be resolved are cached in memory and, if ``cache`` is
+    set, on disk. Until the index changes, they fail fast with the same diagnostic.
+
+    The fetched indices and the resolved links are memoized for ``max_age`` seconds.
+    The first resolution afterwards fetches the indices again.
+    """
+
+    def __init__(
+        self,
+        session: Optional[PipSession] = None,
+        target_python: Optional[TargetPython] = None,
+        computation_backend: Optional[ComputationBackend] = None,
+        url: str = PYTORCH_STABLE_URL,
+        cache: bool = True,
+        cache_dir: Optional[str] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        sources: Optional[Sequence[Union[str, IndexSource]]] = None,
+        speculative: bool = True,
+        consistent: bool = False,
+        num_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        fetch_policy: Optional[FetchPolicy] = None,
+        index_db: Optional[str] = None,
+    ) -> None:
+        if session is None:
+            session = PipSession()
+        if target_python is None:
+            target_python = TargetPython()
+        if sources is None:
+            sources = (url,)
+        self.session = session
+        self.target_python = target_python
+        self.cache = cache
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.speculative = speculative
+        self.consistent = consistent
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.fetch_policy = fetch_policy
+        if index_db is None:
+            index_db = get_index_db()
+        self.index_db = index_db
+
+        self.sources = sorted(
+            (
+                source
+                if isinstance(source, IndexSource)
+                else IndexSource(source, priority)
+                for priority, source in enumerate(sources)
+            ),
+            key=lambda source: source.priority,
+        )
+        self.url = self.sources[0].url
+        self._tiers = [
+            list(tier)
+            for _, tier in itertools.groupby(
+                self.sources, key=lambda source: source.priority
+            )
+        ]
+
+        # Guards the lazily initialized attributes and the memoized results below.
+        self._lock = threading.RLock()
+        # PackageFinder keeps mutable bookkeeping and is thus not shared.
+        self._local = threading.local()
+        # The evaluated candidates are shared by the finders of all threads.
+        self._candidates: Dict[int, Dict[str, List[InstallationCandidate]]] = {}
+        self._executor: Optional[Executor] = None
+        self._computation_backend = computation_backend
+        self._detection: Optional["Future[ComputationBackend]"] = None
+        self._fetches: Dict[str, "Future[BaseIndex]"] = {}
+        self._links: Dict[str, "Future[str]"] = {}
+        self._consistent_links: Dict[Tuple[str, ...], "Future[Dict[str, str]]"] = {}
+        # The memoized results expire after the maximum age of the cached indices.
+        self._memo_time: Optional[float] = None
+        self._generation = 0
+        # Diagnostics of failed resolutions by failure key.
+        self._failures: Dict[str, str] = {}
+        self._tags: Optional[List[str]] = None
+        self.origins: Dict[str, str] = {}
+
+    @property
+    def computation_backend(self) -> ComputationBackend:
+        return self.get_computation_backend()
+
+    def get_computation_backend(
+        self, deadline: Optional[Deadline] = None
+    ) -> ComputationBackend:
+        if deadline is None:
+            deadline = Deadline()
+        with self._lock:
+            if self._computation_backend is None and self._detection is None:
+                self._computation_backend = detect_computation_backend(
+                    timeout=deadline.remaining
+                )
+            if self._computation_backend is not None:
+                return self._computation_backend
+            detection = cast("Future[ComputationBackend]", self._detection)
+
+        try:
+            computation_backend = deadline.result(
+                detection, "detecting the computation backend"
+            )
+        except Exception:
+            with self._lock:
+                if detection.done() and self._detection is detection:
+                    self._detection = None
+            raise
+
+        with self._lock:
+            self._computation_backend = computation_backend
+        return computation_backend
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        if self.num_workers is None or self.num_workers < 2:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.num_workers)
+            return self._executor
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            fetches = list(self._fetches.values())
+            self._clear_memos()
+        for fetch in fetches:
+            if fetch.done() and fetch.exception() is None:
+                fetch.result().close()
+
+    def _expire_memos(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._memo_time is not None and now - self._memo_time <= self.max_age:
+                return
+            self._memo_time = now
+            self._clear_memos()
+
+    def _clear_memos(self) -> None:
+        self._fetches.clear()
+        self._links.clear()
+        self._consistent_links.clear()
+        self._candidates.clear()
+        # The finders of all threads hold the expired index and are recreated.
+        self._generation += 1
+
+    def prefetch(self, deadline: Optional[Deadline] = None) -> None:
+        if deadline is None:
+            deadline = Deadline()
+        with self._lock:
+            if self._computation_backend is None and self._detection is None:
+                self._detection = run_in_thread(
+                    detect_computation_backend, timeout=deadline.remaining
+                )
+        self._start_fetches(deadline)
+
+    def _start_fetches(self, deadline: Deadline) -> None:
+        with self._lock:
+            for source in self.sources:
+                if source.url not in self._fetches:
+                    self._fetches[source.url] = run_in_thread(
+                        self._load_index, source.url, deadline
+                    )
+
+    def _load_index(self, url: str, deadline: Deadline) -> BaseIndex:
+        if self.cache:
+            return load_index(
+                self.session,
+                url,
+                cache_dir=self.cache_dir,
+                max_age=self.max_age,
+                executor=self.executor,
+                deadline=deadline,
+                policy=self.fetch_policy,
+                index_db=self.index_db,
+            )
+        return fetch_index(
+            self.session,
+            url,
+            executor=self.executor,
+            deadline=deadline,
+            policy=self.fetch_policy,
+        )
+
+    def _get_fetched_index(self, url: str, deadline: Deadline) -> BaseIndex:
+        fetch = self._fetches[url]
+        # If a stale snapshot is available, only part of the remaining time is spent
+        # waiting for the fetch in order to leave time for the evaluation.
+        stale = None
+        if self.cache and deadline.expires is not None and not fetch.done():
+            stale = load_stale_index(
+                url, cache_dir=self.cache_dir, index_db=self.index_db
+            )
+
+        try:
+            index = (
+                deadline if stale is None else deadline.share(STALE_FETCH_SHARE)
+            ).result(fetch, f"fetching {url}")
+        except Exception as error:
+            with self._lock:
+                # Failed fetches are retried by the next resolution.
+                if fetch.done() and self._fetches.get(url) is fetch:
+                    del self._fetches[url]
+            if stale is None or not isinstance(error, TimeoutError):
+                raise
+
+            warnings.warn(
+                f"Using the cached index of {url} from {stale.age:.0f} seconds ago, "
+                f"since it could not be refreshed in time."
+            )
+            return stale
+
+        if stale is not None:
+            stale.close()
+        return index
+
+    def get_index(
+        self, num_tiers: Optional[int] = None, deadline: Optional[Deadline] = None
+    ) -> BaseIndex:
+        if deadline is None:
+            deadline = Deadline()
+        self._start_fetches(deadline)
+        indices = [
+            self._get_fetched_index(source.url, deadline)
+            for tier in self._tiers[:num_tiers]
+            for source in tier
+        ]
+        if len(indices) == 1:
+            return indices[0]
+        return MergedIndex(indices)
+
+    @property
+    def index(self) -> BaseIndex:
+        return self.get_index()
+
+    def get_finder(
+        self, num_tiers: Optional[int] = None, deadline: Optional[Deadline] = None
+    ) -> PackageFinder:
+        if deadline is None:
+            deadline = Deadline()
+        if num_tiers is None:
+            num_tiers = len(self._tiers)
+        if getattr(self._local, "generation", None) != self._generation:
+            self._local.finders = {}
+            self._local.generation = self._generation
+        finders = self._local.finders
+        if num_tiers not in finders:
+            with self._lock:
+                candidates = self._candidates.setdefault(num_tiers, {})
+            finders[num_tiers] = make_pytorch_packager_finder(
+                session=self.session,
+                target_python=self.target_python,
+                computation_backend=self.get_computation_backend(deadline),
+                index=self.get_index(num_tiers, deadline),
+                candidates=candidates,
+                executor=self.executor,
+            )
+        finder = finders[num_tiers]
+        finder._deadline = deadline
+        return cast(PackageFinder, finder)
+
+    @property
+    def finder(self) -> PackageFinder:
+        return self.get_finder()
+
+    def resolve(
+        self, distributions: Iterable[str], constraints: Iterable[str] = ()
+    ) -> Dict[str, str]:
+        return self.resolve_many((distributions,), constraints=constraints)[0]
+
+    def resolve_many(
+        self,
+        requirement_sets: Iterable[Iterable[str]],
+        constraints: Iterable[str] = (),
+    ) -> List[Dict[str, str]]:
+        with METRICS.time("resolution_seconds"):
+            return self._resolve_many(requirement_sets, list(constraints))
+
+    def _resolve_many(
+        self, requirement_sets: Iterable[Iterable[str]], constraints: List[str]
+    ) -> List[Dict[str, str]]:
+        self._expire_memos()
+        deadline = Deadline(self.timeout)
+        if self.speculative:
+            # The backend detection and the index fetches run in the background
+            # while the requirements are parsed. They are joined when the finder is
+            # created right before the candidates are evaluated.
+            self.prefetch(deadline)
+
+        parsed_sets = [
+            [
+                (get_requirement_key(req), req)
+                for req in get_requirements(distributions, constraints)
+            ]
+            for distributions in requirement_sets
+        ]
+
+        if self.consistent:
+            return [
+                self._memoize(
+                    self._consistent_links,
+                    tuple(key for key, _ in reqs),
+                    deadline,
+                    self._resolve_consistent,
+                    reqs,
+                    deadline,
+                )
+                for reqs in parsed_sets
+            ]
+
+        return [
+            OrderedDict(
+                (
+                    key,
+                    self._memoize(
+                        self._links,
+                        key,
+                        deadline,
+                        self._resolve_requirement,
+                        req,
+                        deadline,
+                    ),
+                )
+                for key, req in reqs
+            )
+            for reqs in parsed_sets
+        ]
+
+    def _memoize(
+        self,
+        memo: Dict[Any, "Future[T]"],
+        key: Any,
+        deadline: Deadline,
+        fn: Callable[..., T],
+        *args: Any,
+    ) -> T:
+        # The first thread that requests a key computes the result. All others wait
+        # for it instead of computing it again.
+        with self._lock:
+            future = memo.get(key)
+            is_owner = future is None
+            if future is None:
+                future = memo[key] = Future()
+
+        if is_owner:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                # Failures are not memoized.
+                with self._lock:
+                    del memo[key]
+                future.set_exception(exc)
+        return deadline.result(future, f"resolving {key}")
+
+    def _get_failure_key(
+        self,
+        requirements: Sequence[str],
+        deadline: Deadline,
+        num_tiers: Optional[int] = None,
+        consistent: bool = False,
+    ) -> str:
+        with self._lock:
+            if self._tags is None:
+                self._tags = [str(tag) for tag in self.target_python.get_tags()]
+        return get_failure_key(
+            self.get_index(num_tiers, deadline).digest,
+            requirements,
+            str(self.get_computation_backend(deadline)),
+            self._tags,
+            consistent=consistent,
+        )
+
+    def _load_failure(self, key: str) -> Optional[str]:
+        with self._lock:
+            message = self._failures.get(key)
+        if message is None and self.cache:
+            message = load_failure(key, cache_dir=self.cache_dir)
+            if message is not None:
+                with self._lock:
+                    self._failures[key] = message
+        if message is not None:
+            METRICS.increment("failure_cache_hits_total")
+        return message
+
+    def _store_failure(self, key: str, message: str) -> None:
+        with self._lock:
+            self._failures[key] = message
+        if self.cache:
+            store_failure(key, message, cache_dir=self.cache_dir)
+
+    def _resolve_consistent(
+        self, reqs: List[Tuple[str, InstallRequirement]], deadline: Deadline
+    ) -> Dict[str, str]:
+        def get_requires_dist_before_deadline(link: Link) -> List[str]:
+            deadline.check(f"reading the metadata of {link.filename}")
+            return get_requires_dist(
+                self.session,
+                link.url,
+                cache=self.cache,
+                cache_dir=self.cache_dir,
+                deadline=deadline,
+            )
+
+        failure_key = self._get_failure_key(
+            [key for key, _ in reqs], deadline, consistent=True
+        )
+        message = self._load_failure(failure_key)
+        if message is not None:
+            raise DistributionNotFound(message)
+        try:
+            candidates = select_consistent_candidates(
+                [req for _, req in reqs],
+                self.get_finder(deadline=deadline),
+                get_requires_dist_before_deadline,
+            )
+        except DistributionNotFound as error:
+            self._store_failure(failure_key, str(error))
+            raise
+        return OrderedDict(
+            (key, candidate.link.url) for (key, _), candidate in zip(reqs, candidates)
+        )
+
+    def _resolve_requirement(self, req: InstallRequirement, deadline: Deadline) -> str:
+        # Lower priority sources are only consulted if the requirement cannot be
+        # satisfied by the higher priority ones. Failures are deterministic for the
+        # consulted indices and thus are cached. Repeated queries skip the tiers
+        # that are known to fail without evaluating their links again.
+        for num_tiers in range(1, len(self._tiers) + 1):
+            failure_key = self._get_failure_key(
+                [get_requirement_key(req)], deadline, num_tiers=num_tiers
+            )
+            message = self._load_failure(failure_key)
+            if message is None:
+                try:
+                    finder = self.get_finder(num_tiers, deadline)
+                    link = finder.find_requirement(req, upgrade=True)
+                    break
+                except DistributionNotFound:
+                    message = explain_not_found(
+                        self.get_index(num_tiers, deadline),
+                        req,
+                        str(self.get_computation_backend(deadline)),
+                        tag=self._tags[0] if self._tags else None,
+                    )
+                    self._store_failure(failure_key, message)
+
+            if num_tiers == len(self._tiers):
+                raise DistributionNotFound(message)
+
+        if isinstance(link.comes_from, str):
+            with self._lock:
+                self.origins[link.url] = link.comes_from
+        return cast(str, link.url)
+
+
+def select_consistent_candidates(
+    reqs: Sequence[InstallRequirement],
+    finder: PackageFinder,
+    get_requires_dist: Callable[[Link], List[str]],
+) -> List[InstallationCandidate]:
+    # Candidates of each requirement ordered from most to least preferred.
+    candidates_per_req = []
+    for req in reqs:
+        candidate_evaluator = finder.make_candidate_evaluator(
+            req.name, specifier=req.specifier, hashes=req.hashes(trust_internet=False)
+        )
+        candidates = candidate_evaluator.get_applicable_candidates(
+            finder.find_all_candidates(req.name)
+        )
+        if not candidates:
+            raise DistributionNotFound(f"No matching distribution found for {req}")
+        sort_key = get_public_or_private_attr(candidate_evaluator, "sort_key")
+        candidates_per_req.append(sorted(candidates, key=sort_key, reverse=True))
+
+    # The dependencies are evaluated for the target Python. Extras are not
+    # requested and thus dependencies only needed for an extra are ignored.
+    environment = get_marker_environment(
+        get_public_or_private_attr(finder, "target_python")
+    )
+    dependencies: Dict[Link, List[Requirement]] = {}
+
+    def get_dependencies(candidate: InstallationCandidate) -> List[Requirement]:
+        if candidate.link not in dependencies:
+            dependencies[candidate.link] = [
+                requirement
+                for requirement in map(Requirement, get_requires_dist(candidate.link))
+                if requirement.marker is None
+                or requirement.marker.evaluate(environment)
+            ]
+        return dependencies[candidate.link]
+
+    def is_compatible(
+        candidate: InstallationCandidate, other: InstallationCandidate
+    ) -> bool:
+        for requirement in get_dependencies(candidate):
+            if canonicalize_name(requirement.name) != canonicalize_name(other.name):
+                continue
+            if not requirement.specifier.contains(other.version, prereleases=True):
+                return False
+        return True
+
+    # Depth-first search that backtracks over the candidates of earlier requirements
+    # if a later one has no candidate compatible with them.
+    def search(
+        selected: List[InstallationCandidate],
+    ) -> Optional[List[InstallationCandidate]]:
+        if len(selected) == len(candidates_per_req):
+            return selected
+
+        for candidate in candidates_per_req[len(selected)]:
+            if all(
+                is_compatible(candidate, other) and is_compatible(other, candidate)
+                for other in selected
+            ):
+                result = search([*selected, candidate])
+                if result is not None:
+                    return result
+        return None
+
+    result = search([])
+    if result is None:
+        raise DistributionNotFound(
+            "No mutually compatible distributions found for "
+            f"{', '.join(str(req) for req in reqs)}"
+        )
+    return result
+
+
+# Environment markers of the operating systems of the wheel platform tags.
+OS_MARKERS = {
+    "nt": {"os_name": "nt", "sys_platform": "win32", "platform_system": "Windows"},
+    "darwin": {
+        "os_name": "posix",
+        "sys_platform": "darwin",
+        "platform_system": "Darwin",
+    },
+    "linux": {"os_name": "posix", "sys_platform": "linux", "platform_system": "Linux"},
+}
+
+# Machines of the wheel platform tags in the format of platform.machine().
+PLATFORM_MACHINES = {
+    "win32": "x86",
+    "win_amd64": "AMD64",
+    "x86_64": "x86_64",
+    "i686": "i686",
+    "aarch64": "aarch64",
+    "arm64": "arm64",
+    "ppc64le": "ppc64le",
+}
+
+
+def get_marker_environment(target_python: TargetPython) -> Dict[str, str]:
+    environment = cast(Dict[str, str], default_environment())
+    environment["extra"] = ""
+
+    py_version_info = target_python.py_version_info
+    environment["python_version"] = ".".join(map(str, py_version_info[:2]))
+    environment["python_full_version"] = ".".join(map(str, py_version_info))
+
+    platform = target_python.platform
+    if platform is None:
+        return environment
+    if platform.startswith("win"):
+        environment.update(OS_MARKERS["nt"])
+    elif platform.startswith("macosx"):
+        environment.update(OS_MARKERS["darwin"])
+    elif "linux" in platform:
+        environment.update(OS_MARKERS["linux"])
+    for suffix, machine in PLATFORM_MACHINES.items():
+        if platform.endswith(suffix):
+            environment["platform_machine"] = machine
+            break
+    return environment
+
+
+def get_requirement_key(req: InstallRequirement) -> str:
+    if req.name is None:
+        # Unnamed requirements, e.g. URLs or paths, are identified by their link.
+        key = cast(str, req.link.url)
+    else:
+        key = cast(str, canonicalize_name(req.name))
+    if req.extras:
+        key += f"[{','.join(sorted(req.extras))}]"
+    if req.req is not None:
+        key += str(req.req.specifier)
+    if req.markers is not None:
+        key += f"; {req.markers}"
+    return key
@@ -0,0 +1,309 @@
+import hashlib
+import itertools
+import posixpath
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import unquote, urljoin, urlsplit
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.utils import canonicalize_name
+
+from .network import FetchPolicy, fetch
+from .utils import Deadline
+
+__all__ = [
+    "PYTORCH_STABLE_URL",
+    "IndexEntry",
+    "IndexSource",
+    "BaseIndex",
+    "Index",
+    "MergedIndex",
+    "fetch_index",
+    "parse_index",
+]
+
+PYTORCH_STABLE_URL = "https://download.pytorch.org/whl/torch_stable.html"
+
+SDIST_EXTENSIONS = (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".zip")
+
+# Pages smaller than this are parsed serially, since starting the worker processes
+# would take longer than parsing the page.
+PARALLEL_PARSE_THRESHOLD = 1024 * 1024
+PARSE_SHARD_SIZE = 256 * 1024
+
+ANCHOR_PATTERN = re.compile(r"<a[\s>]", re.IGNORECASE)
+BASE_PATTERN = re.compile(r"<base[\s>]", re.IGNORECASE)
+
+# The computation backend of a wheel is either the local part of its version or,
+# if it has none, given by the directory the wheel is located in.
+LOCAL_PATTERN = re.compile(r"[+](cpu|cu\d+)$")
+LOCAL_PATH_PATTERN = re.compile(r"^/whl/(?P<local>(cpu|cu\d+))")
+
+
+class IndexEntry(NamedTuple):
+    project: str
+    version: str
+    url: str
+
+
+class IndexSource(NamedTuple):
+    url: str
+    # Sources with a lower value take precedence.
+    priority: int = 0
+
+
+class AnchorParser(HTMLParser):
+    def __init__(self, base_url: str) -> None:
+        super().__init__()
+        self.base_url = base_url
+        self.hrefs: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.hrefs.append(urljoin(self.base_url, href))
+
+
+def split_filename(filename: str) -> Optional[Tuple[str, str]]:
+    if filename.endswith(".whl"):
+        parts = filename[: -len(".whl")].split("-")
+        if len(parts) < 5:
+            return None
+        name, version = parts[:2]
+    else:
+        for ext in SDIST_EXTENSIONS:
+            if filename.endswith(ext):
+                name, _, version = filename[: -len(ext)].rpartition("-")
+                break
+        else:
+            return None
+        if not name:
+            return None
+
+    return canonicalize_name(name), version
+
+
+def make_entry(url: str) -> Optional[IndexEntry]:
+    filename = unquote(posixpath.basename(urlsplit(url).path))
+    name_and_version = split_filename(filename)
+    if name_and_version is None:
+        return None
+
+    return IndexEntry(*name_and_version, url)
+
+
+def get_computation_backend(entry: IndexEntry) -> Optional[str]:
+    match = LOCAL_PATTERN.search(entry.version)
+    if match is not None:
+        return match.group(1)
+
+    match = LOCAL_PATH_PATTERN.match(unquote(urlsplit(entry.url).path))
+    if match is None:
+        return None
+    return match.group("local")
+
+
+def parse_index(html: str, url: str, executor: Optional[Executor] = None) -> "Index":
+    if executor is None or len(html) < PARALLEL_PARSE_THRESHOLD:
+        return Index(parse_entries(html, url), url)
+
+    shards = split_html(html, url)
+    if shards is None:
+        return Index(parse_entries(html, url), url)
+
+    base_url, htmls = shards
+    return Index(
+        itertools.chain.from_iterable(
+            executor.map(parse_entries, htmls, itertools.repeat(base_url))
+        ),
+        url,
+    )
+
+
+def parse_entries(html: str, base_url: str) -> List[IndexEntry]:
+    parser = AnchorParser(base_url)
+    parser.feed(html)
+    parser.close()
+    entries = [make_entry(href) for href in parser.hrefs]
+    return [entry for entry in entries if entry is not None]
+
+
+def split_html(
+    html: str, url: str, shard_size: int = PARSE_SHARD_SIZE
+) -> Optional[Tuple[str, List[str]]]:
+    # The shards start at an anchor tag and contain the complete anchors up to the
+    # start of the next shard.
+    match = ANCHOR_PATTERN.search(html)
+    if match is None:
+        return None
+    start = match.start()
+
+    # A <base> tag after the first anchor changes the URL of the following anchors
+    # and thus the page cannot be split.
+    if BASE_PATTERN.search(html, start) is not None:
+        return None
+    parser = AnchorParser(url)
+    parser.feed(html[:start])
+    base_url = parser.base_url
+
+    shards = []
+    while start < len(html):
+        match = ANCHOR_PATTERN.search(html, start + shard_size)
+        stop = match.start() if match is not None else len(html)
+        shards.append(html[start:stop])
+        start = stop
+    return base_url, shards
+
+
+def fetch_index(
+    session: PipSession,
+    url: str = PYTORCH_STABLE_URL,
+    executor: Optional[Executor] = None,
+    deadline: Optional[Deadline] = None,
+    policy: Optional[FetchPolicy] = None,
+) -> "Index":
+    response = fetch(
+        session, url, headers={"Accept": "text/html"}, deadline=deadline, policy=policy
+    )
+    response.raise_for_status()
+    return parse_index(response.text, url, executor=executor)
+
+
+class BaseIndex(ABC):
+    url: str
+    digest: str
+
+    @property
+    @abstractmethod
+    def projects(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def entries(self, project_name: str) -> List[IndexEntry]:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[IndexEntry]:
+        ...
+
+    def find_entries(
+        self, project_name: str, computation_backend: Optional[str] = None
+    ) -> List[IndexEntry]:
+        entries = self.entries(project_name)
+        if computation_backend is None:
+            return entries
+        return [
+            entry
+            for entry in entries
+            if get_computation_backend(entry) == computation_backend
+        ]
+
+    def find_links(
+        self, project_name: str, computation_backend: Optional[str] = None
+    ) -> List[Link]:
+        return [
+            Link(entry.url, comes_from=self.url)
+            for entry in self.find_entries(project_name, computation_backend)
+        ]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.url}, {len(self)} entries)"
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def compute_digest(entries: Iterable[IndexEntry]) -> str:
+        hasher = hashlib.sha256()
+        for url in sorted(entry.url for entry in entries):
+            hasher.update(url.encode("utf-8"))
+            hasher.update(b"\n")
+        return hasher.hexdigest()
+
+
+class Index(BaseIndex):
+    def __init__(
+        self, entries: Iterable[IndexEntry], url: str, digest: Optional[str] = None
+    ) -> None:
+        self.url = url
+
+        projects: Dict[str, List[IndexEntry]] = OrderedDict()
+        for entry in entries:
+            projects.setdefault(entry.project, []).append(entry)
+        self._projects = projects
+
+        if digest is None:
+            digest = self.compute_digest(self)
+        self.digest = digest
+
+    @property
+    def projects(self) -> List[str]:
+        return list(self._projects.keys())
+
+    def entries(self, project_name: str) -> List[IndexEntry]:
+        return list(self._projects.get(canonicalize_name(project_name), ()))
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for entries in self._projects.values():
+            yield from entries
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._projects.values())
+
+
+class MergedIndex(BaseIndex):
+    def __init__(self, indices: Sequence[BaseIndex]) -> None:
+        self.indices = list(indices)
+        self.url = self.indices[0].url if self.indices else ""
+
+        hasher = hashlib.sha256()
+        for index in self.indices:
+            hasher.update(index.digest.encode("ascii"))
+        self.digest = hasher.hexdigest()
+
+    @property
+    def projects(self) -> List[str]:
+        return list(
+            OrderedDict.fromkeys(
+                project for index in self.indices for project in index.projects
+            )
+        )
+
+    def entries(self, project_name: str) -> List[IndexEntry]:
+        return [
+            entry for index in self.indices for entry in index.entries(project_name)
+        ]
+
+    def find_links(
+        self, project_name: str, computation_backend: Optional[str] = None
+    ) -> List[Link]:
+        # Each index attributes the links to itself.
+        return [
+            link
+            for index in self.indices
+            for link in index.find_links(project_name, computation_backend)
+        ]
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for index in self.indices:
+            yield from index
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.indices)
+
+    def close(self) -> None:
+        for index in self.indices:
+            index.close()
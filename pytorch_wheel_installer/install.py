@@ -0,0 +1,108 @@
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import sysconfig
+from os import path
+from typing import List, Optional, Sequence, TextIO, Union
+
+from .metrics import METRICS
+
+__all__ = ["install"]
+
+# Modes of the unpacking installation, see .unpack. They are defined here, so that
+# the command line can offer them without importing it.
+LINK_MODES = ("hardlink", "reflink", "copy")
+
+
+def install(
+    links: Sequence[str],
+    install_cmd: Union[str, Sequence[str]] = "pip install",
+    in_process: bool = False,
+    stream: Optional[TextIO] = None,
+) -> None:
+    cmd = split_install_cmd(install_cmd)
+    # pip of another interpreter can only be run in a subprocess.
+    pip_args = get_pip_args(cmd) if in_process else None
+    with METRICS.time("install_seconds", method="command"):
+        if pip_args is not None:
+            run_pip_in_process([*pip_args, *links])
+        else:
+            run_streamed([*cmd, *links], stream=stream)
+
+
+def split_install_cmd(install_cmd: Union[str, Sequence[str]]) -> List[str]:
+    if isinstance(install_cmd, str):
+        return shlex.split(install_cmd)
+    return list(install_cmd)
+
+
+# Matches for example pip, pip3, pip3.8, or pip.exe, but not pipenv or pip-sync.
+PIP_EXECUTABLE_PATTERN = re.compile(r"^pip(\d+(\.\d+)?)?(\.exe)?$", re.IGNORECASE)
+
+
+def get_pip_args(cmd: Sequence[str]) -> Optional[List[str]]:
+    """Returns the arguments of a pip command or ``None`` if it does not belong to
+    the running interpreter.
+    """
+    if cmd and PIP_EXECUTABLE_PATTERN.match(path.basename(cmd[0])):
+        return list(cmd[1:]) if is_running_environment(cmd[0]) else None
+    elif len(cmd) >= 3 and tuple(cmd[1:3]) == ("-m", "pip"):
+        return list(cmd[3:]) if is_running_interpreter(cmd[0]) else None
+
+    msg = (
+        f"In-process installation requires a pip command, but got "
+        f"'{' '.join(cmd)}'."
+    )
+    raise RuntimeError(msg)
+
+
+def find_executable(executable: str) -> Optional[str]:
+    file = shutil.which(executable)
+    return path.abspath(file) if file is not None else None
+
+
+def is_running_environment(executable: str) -> bool:
+    file = find_executable(executable)
+    if file is None:
+        return False
+    # On Windows the scripts are not placed next to the interpreter.
+    dirs = {path.dirname(path.abspath(sys.executable)), sysconfig.get_path("scripts")}
+    return path.dirname(file) in {path.abspath(dir) for dir in dirs if dir}
+
+
+def is_running_interpreter(executable: str) -> bool:
+    file = find_executable(executable)
+    if file is None:
+        return False
+    # The interpreters of a virtual environment link to the base interpreter and
+    # thus are only the same if they are also placed in the same directory.
+    running = path.abspath(sys.executable)
+    return path.dirname(file) == path.dirname(running) and path.samefile(file, running)
+
+
+def run_pip_in_process(args: Sequence[str]) -> None:
+    from pip._internal.cli.main import main as pip_main
+
+    returncode = pip_main(list(args))
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, ["pip", *args])
+
+
+def run_streamed(cmd: Sequence[str], stream: Optional[TextIO] = None) -> None:
+    if stream is None:
+        stream = sys.stdout
+
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True
+    )
+    assert process.stdout is not None
+    with process.stdout:
+        for line in process.stdout:
+            stream.write(line)
+            stream.flush()
+
+    returncode = process.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
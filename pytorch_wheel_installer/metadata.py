@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import struct
+import zipfile
+import zlib
+from email.parser import Parser
+from os import path
+from typing import IO, Dict, List, NamedTuple, Optional, Tuple
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException
+
+from .cache import get_cache_dir
+from .utils import Deadline
+
+__all__ = ["fetch_wheel_metadata", "get_requires_dist"]
+
+# Large enough to hold the end of central directory record including a maximum size
+# comment and, for most wheels, the complete central directory.
+TAIL_SIZE = 256 * 1024
+# Local file headers may carry a different extra field than the central directory.
+LOCAL_EXTRA_SLACK = 1024
+
+EOCD = struct.Struct("<4s4H2LH")
+EOCD_SIGNATURE = b"PK\x05\x06"
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class ZipMember(NamedTuple):
+    filename: str
+    compression: int
+    compressed_size: int
+    header_offset: int
+
+
+class RangeReader:
+    def __init__(
+        self, session: PipSession, url: str, deadline: Optional[Deadline] = None
+    ) -> None:
+        if deadline is None:
+            deadline = Deadline()
+        self.session = session
+        self.url = url
+        self.deadline = deadline
+        self.size: Optional[int] = None
+
+    def get(self, byte_range: str) -> Tuple[str, bytes]:
+        action = f"reading the metadata of {self.url}"
+        self.deadline.check(action)
+        try:
+            response = self.session.get(
+                self.url,
+                headers={"Range": f"bytes={byte_range}"},
+                stream=True,
+                timeout=self.deadline.remaining,
+            )
+        except RequestException:
+            # pip's session reports timeouts as connection errors after its retries.
+            self.deadline.check(action)
+            raise
+        try:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # The complete wheel is not downloaded only to read its metadata.
+                raise RuntimeError(f"The server of {self.url} ignored a range request.")
+            return response.headers["Content-Range"], bytes(response.content)
+        finally:
+            response.close()
+
+    def read_tail(self, length: int) -> Tuple[int, bytes]:
+        content_range, content = self.get(f"-{length}")
+        # Content-Range: bytes <start>-<end>/<size>
+        start = int(content_range.split()[1].split("-")[0])
+        self.size = int(content_range.rsplit("/", 1)[1])
+        return start, content
+
+    def read(self, start: int, length: int) -> bytes:
+        end = start + length - 1
+        if self.size is not None:
+            end = min(end, self.size - 1)
+        _, content = self.get(f"{start}-{end}")
+        return content
+
+
+def fetch_wheel_metadata(
+    session: PipSession, url: str, deadline: Optional[Deadline] = None
+) -> str:
+    link = Link(url)
+    if link.is_file:
+        with open(link.file_path, "rb") as fh:
+            return read_metadata_from_archive(fh)
+
+    reader = RangeReader(session, link.url_without_fragment, deadline=deadline)
+    tail_offset, tail = reader.read_tail(TAIL_SIZE)
+    cd_offset, cd_size = find_central_directory(reader, tail_offset, tail)
+    if cd_offset >= tail_offset:
+        start = cd_offset - tail_offset
+        central_directory = tail[start : start + cd_size]
+    else:
+        central_directory = reader.read(cd_offset, cd_size)
+
+    member = find_metadata_member(central_directory)
+    data = reader.read(
+        member.header_offset,
+        LOCAL_HEADER.size
+        + len(member.filename.encode("utf-8"))
+        + LOCAL_EXTRA_SLACK
+        + member.compressed_size,
+    )
+    signature, *_, name_length, extra_length = LOCAL_HEADER.unpack_from(data, 0)
+    if signature != LOCAL_HEADER_SIGNATURE:
+        raise RuntimeError(f"Invalid local file header for {member.filename}.")
+
+    start = LOCAL_HEADER.size + name_length + extra_length
+    if start + member.compressed_size > len(data):
+        data = reader.read(member.header_offset, start + member.compressed_size)
+    compressed = data[start : start + member.compressed_size]
+
+    if member.compression == zipfile.ZIP_STORED:
+        raw = compressed
+    elif member.compression == zipfile.ZIP_DEFLATED:
+        raw = zlib.decompressobj(-zlib.MAX_WBITS).decompress(compressed)
+    else:
+        raise RuntimeError(
+            f"Unsupported compression method {member.compression} for "
+            f"{member.filename}."
+        )
+    return raw.decode("utf-8")
+
+
+def read_metadata_from_archive(fh: IO[bytes]) -> str:
+    with zipfile.ZipFile(fh) as zf:
+        for filename in zf.namelist():
+            if is_metadata_file(filename):
+                return zf.read(filename).decode("utf-8")
+    raise RuntimeError("The wheel contains no METADATA file.")
+
+
+def find_central_directory(
+    reader: RangeReader, tail_offset: int, tail: bytes
+) -> Tuple[int, int]:
+    idx = tail.rfind(EOCD_SIGNATURE)
+    if idx < 0:
+        raise RuntimeError("Unable to find the end of the central directory.")
+    *_, cd_size, cd_offset, _ = EOCD.unpack_from(tail, idx)
+    if cd_offset != 0xFFFFFFFF and cd_size != 0xFFFFFFFF:
+        return cd_offset, cd_size
+
+    locator_idx = idx - ZIP64_LOCATOR.size
+    signature, _, zip64_eocd_offset, _ = ZIP64_LOCATOR.unpack_from(tail, locator_idx)
+    if signature != ZIP64_LOCATOR_SIGNATURE:
+        raise RuntimeError("Unable to find the zip64 end of central directory locator.")
+    if zip64_eocd_offset >= tail_offset:
+        data = tail[zip64_eocd_offset - tail_offset :]
+    else:
+        data = reader.read(zip64_eocd_offset, ZIP64_EOCD.size)
+    signature, *_, cd_size, cd_offset = ZIP64_EOCD.unpack_from(data, 0)
+    if signature != ZIP64_EOCD_SIGNATURE:
+        raise RuntimeError("Unable to find the zip64 end of central directory.")
+    return cd_offset, cd_size
+
+
+def find_metadata_member(central_directory: bytes) -> ZipMember:
+    offset = 0
+    while offset + CENTRAL_HEADER.size <= len(central_directory):
+        (
+            signature,
+            _,
+            _,
+            _,
+            compression,
+            _,
+            _,
+            _,
+            compressed_size,
+            uncompressed_size,
+            name_length,
+            extra_length,
+            comment_length,
+            _,
+            _,
+            _,
+            header_offset,
+        ) = CENTRAL_HEADER.unpack_from(central_directory, offset)
+        if signature != CENTRAL_HEADER_SIGNATURE:
+            break
+
+        name_start = offset + CENTRAL_HEADER.size
+        filename = central_directory[name_start : name_start + name_length].decode(
+            "utf-8"
+        )
+        if is_metadata_file(filename):
+            extra = central_directory[
+                name_start + name_length : name_start + name_length + extra_length
+            ]
+            compressed_size, header_offset = apply_zip64_extra(
+                extra, uncompressed_size, compressed_size, header_offset
+            )
+            return ZipMember(filename, compression, compressed_size, header_offset)
+
+        offset = name_start + name_length + extra_length + comment_length
+
+    raise RuntimeError("The wheel contains no METADATA file.")
+
+
+def apply_zip64_extra(
+    extra: bytes, uncompressed_size: int, compressed_size: int, header_offset: int
+) -> Tuple[int, int]:
+    idx = 0
+    while idx + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<2H", extra, idx)
+        if header_id == 0x0001:
+            values = iter(struct.unpack_from(f"<{size // 8}Q", extra, idx + 4))
+            # The zip64 extra field only contains the values that overflowed in the
+            # order uncompressed size, compressed size, header offset.
+            if uncompressed_size == 0xFFFFFFFF:
+                next(values)
+            if compressed_size == 0xFFFFFFFF:
+                compressed_size = next(values)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = next(values)
+            break
+        idx += 4 + size
+    return compressed_size, header_offset
+
+
+def is_metadata_file(filename: str) -> bool:
+    parts = filename.split("/")
+    return (
+        len(parts) == 2 and parts[0].endswith(".dist-info") and parts[1] == "METADATA"
+    )
+
+
+def get_requires_dist(
+    session: PipSession,
+    url: str,
+    cache: bool = True,
+    cache_dir: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+) -> List[str]:
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    url = Link(url).url_without_fragment
+    file = path.join(
+        cache_dir, "metadata", f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+    )
+
+    if cache:
+        try:
+            with open(file, "r") as fh:
+                cached: Dict[str, List[str]] = json.load(fh)
+            return cached["requires_dist"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    metadata = Parser().parsestr(
+        fetch_wheel_metadata(session, url, deadline=deadline), headersonly=True
+    )
+    requires_dist = metadata.get_all("Requires-Dist") or []
+    if not cache:
+        return requires_dist
+
+    try:
+        os.makedirs(path.dirname(file), exist_ok=True)
+        with open(file, "w") as fh:
+            json.dump({"url": url, "requires_dist": requires_dist}, fh)
+    except OSError:
+        pass
+    return requires_dist
@@ -0,0 +1,185 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from os import path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+__all__ = ["METRICS", "Metrics", "collect_metrics", "get_metrics_files"]
+
+PREFIX = "pwi_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def make_labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Metrics:
+    """Counters and timers of the resolution and the installation.
+
+    Recording is a no-op unless the metrics are enabled, e.g. by
+    :func:`collect_metrics`. The values accumulate over the lifetime of the process.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._counters: Dict[Tuple[str, Labels], float] = OrderedDict()
+        self._timers: Dict[Tuple[str, Labels], Tuple[int, float]] = OrderedDict()
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, make_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+            self._record_event("counter", key, value)
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, make_labels(labels))
+        with self._lock:
+            count, total = self._timers.get(key, (0, 0.0))
+            self._timers[key] = (count + 1, total + seconds)
+            self._record_event("timer", key, seconds)
+
+    @contextlib.contextmanager
+    def time(self, name: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        # The labels can be amended within the block, e.g. with the outcome of the
+        # timed operation.
+        start = time.perf_counter()
+        try:
+            yield labels
+        except BaseException:
+            labels.setdefault("outcome", "error")
+            raise
+        finally:
+            labels.setdefault("outcome", "success")
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _record_event(self, type: str, key: Tuple[str, Labels], value: float) -> None:
+        name, labels = key
+        self._events.append(
+            {
+                "timestamp": time.time(),
+                "name": f"{PREFIX}{name}",
+                "type": type,
+                "value": value,
+                "labels": dict(labels),
+            }
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self._events.clear()
+
+    def format_textfile(self) -> str:
+        with self._lock:
+            counters = list(self._counters.items())
+            timers = list(self._timers.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in sorted(counters):
+            name = f"{PREFIX}{name}"
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{format_labels(labels)} {value:g}")
+        for (name, labels), (count, total) in sorted(timers):
+            name = f"{PREFIX}{name}"
+            if name not in seen:
+                lines.append(f"# TYPE {name} summary")
+                seen.add(name)
+            lines.append(f"{name}_sum{format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_textfile(self, file: str) -> None:
+        # The node exporter must never read a partially written file.
+        os.makedirs(path.dirname(file) or ".", exist_ok=True)
+        tmp = f"{file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(self.format_textfile())
+        os.replace(tmp, file)
+
+    def write_log(self, file: str) -> None:
+        # Each event is only logged once, even if the log is written repeatedly.
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        if not events:
+            return
+
+        os.makedirs(path.dirname(file) or ".", exist_ok=True)
+        with open(file, "a") as fh:
+            fh.write("".join(f"{json.dumps(event)}\n" for event in events))
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    values = ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+    return f"{{{values}}}"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+def get_metrics_files() -> Tuple[Optional[str], Optional[str]]:
+    return (
+        os.environ.get("PWI_METRICS_TEXTFILE") or None,
+        os.environ.get("PWI_METRICS_LOG") or None,
+    )
+
+
+@contextlib.contextmanager
+def collect_metrics(
+    textfile: Optional[str] = None, log: Optional[str] = None
+) -> Iterator[Metrics]:
+    """Record the metrics within the block and write them afterwards.
+
+    Args:
+        textfile: Prometheus textfile, e.g. for the textfile collector of the node
+            exporter. Defaults to the ``PWI_METRICS_TEXTFILE`` environment variable.
+        log: JSON-lines file to append the individual observations to. Defaults to
+            the ``PWI_METRICS_LOG`` environment variable.
+
+    If neither is given, the metrics are not recorded.
+    """
+    env_textfile, env_log = get_metrics_files()
+    if textfile is None:
+        textfile = env_textfile
+    if log is None:
+        log = env_log
+    if textfile is None and log is None:
+        yield METRICS
+        return
+
+    enabled = METRICS.enabled
+    METRICS.enabled = True
+    try:
+        yield METRICS
+    finally:
+        METRICS.enabled = enabled
+        try:
+            if textfile is not None:
+                METRICS.write_textfile(textfile)
+            if log is not None:
+                METRICS.write_log(log)
+        except OSError as error:
+            # Metrics are diagnostics. Failing to write them is not an error.
+            warnings.warn(f"The metrics could not be written: {error}")
@@ -0,0 +1,151 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Deque, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException, Response
+
+from .metrics import METRICS
+from .utils import Deadline, run_in_thread
+
+__all__ = ["FetchPolicy", "fetch"]
+
+
+class FetchPolicy(NamedTuple):
+    # Number of additional attempts after a connection error or a 5xx response.
+    retries: int = 2
+    # Seconds to wait before the first retry. Doubled for every further retry.
+    backoff: float = 0.25
+    # If True, a second request is issued if the first one takes longer than usual.
+    hedge: bool = False
+    # Quantile of the recent response times of the host after which a request is
+    # hedged.
+    hedge_quantile: float = 0.95
+    # Seconds after which a request is hedged while too few response times of the
+    # host are known.
+    hedge_delay: float = 1.0
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 100, min_samples: int = 5) -> None:
+        self.size = size
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, latency: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(
+                host, collections.deque(maxlen=self.size)
+            )
+            samples.append(latency)
+
+    def quantile(self, host: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+LATENCIES = LatencyTracker()
+
+
+def fetch(
+    session: PipSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    deadline: Optional[Deadline] = None,
+    policy: Optional[FetchPolicy] = None,
+) -> Response:
+    if deadline is None:
+        deadline = Deadline()
+    if policy is None:
+        policy = FetchPolicy()
+
+    for attempt in range(policy.retries + 1):
+        deadline.check(f"fetching {url}")
+        is_last_attempt = attempt == policy.retries
+        start = time.monotonic()
+        try:
+            response = fetch_once(session, url, headers, deadline, policy)
+        except RequestException:
+            record_fetch(url, "error", time.monotonic() - start)
+            if is_last_attempt:
+                raise
+        else:
+            record_fetch(url, response.status_code, time.monotonic() - start, response)
+            if response.status_code < 500 or is_last_attempt:
+                return response
+
+        backoff = policy.backoff * 2 ** attempt
+        remaining = deadline.remaining
+        if remaining is not None and backoff >= remaining:
+            raise TimeoutError(f"The deadline was exceeded while fetching {url}.")
+        time.sleep(backoff)
+
+    raise RuntimeError("Unreachable")
+
+
+def record_fetch(
+    url: str, status: object, duration: float, response: Optional[Response] = None
+) -> None:
+    if not METRICS.enabled:
+        return
+    host = urlsplit(url).netloc
+    METRICS.observe("index_fetch_seconds", duration, host=host, status=status)
+    if response is not None:
+        # The body is read by the caller anyway. Thus, this does not add a transfer.
+        METRICS.increment("index_fetch_bytes_total", len(response.content), host=host)
+
+
+def fetch_once(
+    session: PipSession,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    deadline: Deadline,
+    policy: FetchPolicy,
+) -> Response:
+    host = urlsplit(url).netloc
+
+    def get() -> Response:
+        start = time.monotonic()
+        response = session.get(url, headers=headers, timeout=deadline.remaining)
+        LATENCIES.record(host, time.monotonic() - start)
+        return response
+
+    # The requests run in background threads, since the timeout of requests only
+    # applies to the individual socket operations and not to the complete response.
+    futures: List["Future[Response]"] = [run_in_thread(get)]
+    if policy.hedge:
+        delay = LATENCIES.quantile(host, policy.hedge_quantile)
+        if delay is None:
+            delay = policy.hedge_delay
+        remaining = deadline.remaining
+        done, _ = wait(
+            futures, timeout=delay if remaining is None else min(delay, remaining)
+        )
+        if not done and not deadline.expired:
+            futures.append(run_in_thread(get))
+
+    # The first successful response wins. An error is only raised if all requests
+    # failed.
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(
+            pending, timeout=deadline.remaining, return_when=FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for future in done:
+            exc = future.exception()
+            if exc is None:
+                return future.result()
+            error = exc
+    if error is not None and not pending:
+        raise error
+    raise TimeoutError(f"The deadline was exceeded while fetching {url}.")
@@ -0,0 +1,175 @@
+import functools
+import itertools
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pip._internal.models.target_python import TargetPython
+from pip._internal.network.session import PipSession
+
+from .cache import load_index
+from .computation_backend import ComputationBackend
+from .database import get_index_db
+from .find import Resolver
+from .index import IndexSource
+from .unpack import get_store_dir, get_stored_wheel
+
+__all__ = ["PrefetchStep", "prefetch"]
+
+DEFAULT_NUM_WORKERS = 8
+
+
+class PrefetchStep(NamedTuple):
+    # One of "index", "resolve", or "store".
+    kind: str
+    target: str
+    duration: float
+    error: Optional[str] = None
+
+
+def timed(kind: str, target: str, fn: Callable[[], object]) -> PrefetchStep:
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as error:
+        return PrefetchStep(kind, target, time.perf_counter() - start, str(error))
+    return PrefetchStep(kind, target, time.perf_counter() - start)
+
+
+def resolve_links(
+    resolver: Resolver, distributions: Sequence[str], target: str
+) -> Tuple[PrefetchStep, List[str]]:
+    links: List[str] = []
+
+    def resolve() -> None:
+        try:
+            links.extend(resolver.resolve(distributions).values())
+        finally:
+            resolver.close()
+
+    return timed("resolve", target, resolve), links
+
+
+def get_target(
+    distributions: Sequence[str],
+    computation_backend: ComputationBackend,
+    target_python: TargetPython,
+) -> str:
+    tag = target_python.get_tags()[0]
+    return f"{', '.join(distributions)} ({computation_backend}, {tag})"
+
+
+def prefetch(
+    distributions: Iterable[str],
+    computation_backends: Sequence[ComputationBackend],
+    target_pythons: Optional[Sequence[TargetPython]] = None,
+    sources: Optional[Sequence[Union[str, IndexSource]]] = None,
+    cache_dir: Optional[str] = None,
+    index_db: Optional[str] = None,
+    store: bool = False,
+    store_dir: Optional[str] = None,
+    num_workers: int = DEFAULT_NUM_WORKERS,
+) -> List[PrefetchStep]:
+    """Warms the caches for later resolutions and installations.
+
+    The indices are refreshed first. Afterwards, the distributions are resolved for
+    all combinations of computation backends and target Pythons. If ``store`` is
+    set, the selected wheels are extracted into the store of the link installation
+    while the remaining combinations are still being resolved.
+
+    Failed steps do not abort the others, but are reported with their error.
+    """
+    distributions = list(distributions)
+    if target_pythons is None:
+        target_pythons = (TargetPython(),)
+    if store_dir is None:
+        store_dir = get_store_dir(cache_dir)
+    if index_db is None:
+        index_db = get_index_db()
+    session = PipSession()
+
+    def make_resolver(
+        computation_backend: Optional[ComputationBackend] = None,
+        target_python: Optional[TargetPython] = None,
+    ) -> Resolver:
+        return Resolver(
+            session=session,
+            target_python=target_python,
+            computation_backend=computation_backend,
+            sources=sources,
+            cache_dir=cache_dir,
+            index_db=index_db,
+        )
+
+    steps: List[PrefetchStep] = []
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        refreshes = [
+            executor.submit(
+                timed,
+                "index",
+                source.url,
+                functools.partial(
+                    load_index,
+                    session,
+                    source.url,
+                    cache_dir=cache_dir,
+                    refresh=True,
+                    index_db=index_db,
+                ),
+            )
+            for source in make_resolver().sources
+        ]
+        steps.extend(future.result() for future in refreshes)
+
+        # The resolutions only read the refreshed indices from the cache.
+        resolutions = {
+            executor.submit(
+                resolve_links,
+                make_resolver(computation_backend, target_python),
+                distributions,
+                get_target(distributions, computation_backend, target_python),
+            )
+            for computation_backend, target_python in itertools.product(
+                computation_backends, target_pythons
+            )
+        }
+
+        # The wheels are stored as soon as they are resolved.
+        stores: Dict[str, "Future[PrefetchStep]"] = OrderedDict()
+        with tempfile.TemporaryDirectory() as download_dir:
+            while resolutions:
+                done, resolutions = wait(resolutions, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, links = future.result()
+                    steps.append(step)
+                    if not store:
+                        continue
+                    for link in links:
+                        if link not in stores:
+                            stores[link] = executor.submit(
+                                timed,
+                                "store",
+                                link,
+                                functools.partial(
+                                    get_stored_wheel,
+                                    session,
+                                    link,
+                                    store_dir,
+                                    download_dir,
+                                ),
+                            )
+            steps.extend(future.result() for future in stores.values())
+
+    return steps
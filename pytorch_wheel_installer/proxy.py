@@ -0,0 +1,407 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os import path
+from socketserver import ThreadingMixIn
+from typing import Any, Dict, Iterator, Optional, Tuple, cast
+from urllib.parse import urlsplit
+
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException
+
+from .cache import DEFAULT_MAX_AGE, get_cache_dir
+from .index import PYTORCH_STABLE_URL, SDIST_EXTENSIONS
+
+__all__ = ["ProxyServer"]
+
+CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_EXTENSIONS = (".whl", *SDIST_EXTENSIONS)
+
+
+class UpstreamError(Exception):
+    def __init__(self, status: int, reason: str) -> None:
+        super().__init__(f"{status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class Download:
+    """File download from the origin that can be read while it is in progress."""
+
+    def __init__(self, file: str) -> None:
+        self.file = file
+        self.part = f"{file}.part"
+        self.size: Optional[int] = None
+        self.written = 0
+        self.has_headers = False
+        self.done = False
+        self.error: Optional[UpstreamError] = None
+        self._condition = threading.Condition()
+
+    def run(self, session: PipSession, url: str) -> None:
+        try:
+            os.makedirs(path.dirname(self.file), exist_ok=True)
+            # Without content encoding the bytes on disk match the Content-Length.
+            with session.get(
+                url, headers={"Accept-Encoding": "identity"}, stream=True
+            ) as response:
+                if response.status_code != 200:
+                    raise UpstreamError(response.status_code, response.reason)
+
+                content_length = response.headers.get("Content-Length")
+                with open(self.part, "wb") as fh:
+                    # Readers may only open the partial file after it was created.
+                    with self._condition:
+                        if content_length is not None:
+                            self.size = int(content_length)
+                        self.has_headers = True
+                        self._condition.notify_all()
+
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        fh.write(chunk)
+                        fh.flush()
+                        with self._condition:
+                            self.written += len(chunk)
+                            self._condition.notify_all()
+
+            if self.size is not None and self.written != self.size:
+                raise UpstreamError(502, "Incomplete response from the origin")
+
+            # Readers open either the partial or the complete file depending on
+            # the state and thus both need to change together.
+            with self._condition:
+                os.replace(self.part, self.file)
+                self.size = self.written
+                self.done = True
+                self._condition.notify_all()
+        except (OSError, RequestException, UpstreamError) as exc:
+            error = (
+                exc if isinstance(exc, UpstreamError) else UpstreamError(502, str(exc))
+            )
+            with self._condition:
+                self.error = error
+                self.done = True
+                self._condition.notify_all()
+            try:
+                os.remove(self.part)
+            except OSError:
+                pass
+
+    def wait_for_headers(self, size: bool = False) -> None:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.done
+                or (self.has_headers and (not size or self.size is not None))
+            )
+        if self.error is not None:
+            raise self.error
+
+    def iter_content(self, start: int, stop: Optional[int]) -> Iterator[bytes]:
+        with self._condition:
+            if self.error is not None:
+                raise self.error
+            fh = open(self.file if self.done else self.part, "rb")
+
+        pos = start
+        with fh:
+            while stop is None or pos < stop:
+                with self._condition:
+                    self._condition.wait_for(lambda: self.written > pos or self.done)
+                    if self.error is not None:
+                        raise self.error
+                    available = self.written
+                if pos >= available:
+                    break
+
+                end = available if stop is None else min(available, stop)
+                fh.seek(pos)
+                chunk = fh.read(min(end - pos, CHUNK_SIZE))
+                pos += len(chunk)
+                yield chunk
+
+
+def iter_file(file: str, start: int, stop: int) -> Iterator[bytes]:
+    with open(file, "rb") as fh:
+        fh.seek(start)
+        pos = start
+        while pos < stop:
+            chunk = fh.read(min(stop - pos, CHUNK_SIZE))
+            if not chunk:
+                break
+            pos += len(chunk)
+            yield chunk
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    # Only single byte ranges are supported. For anything else the complete file is
+    # served, which is a valid response to a range request.
+    if header is None or not header.startswith("bytes=") or "," in header:
+        return None
+    start, sep, end = header[len("bytes=") :].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not start:
+            return max(size - int(end), 0), size
+        return int(start), min(int(end) + 1, size) if end else size
+    except ValueError:
+        return None
+
+
+class ProxyHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    proxy: "ProxyServer"
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        cast(ProxyHTTPServer, self.server).proxy.handle(self)
+
+    def do_HEAD(self) -> None:
+        cast(ProxyHTTPServer, self.server).proxy.handle(self, head=True)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class ProxyServer:
+    """Caching HTTP proxy for a find-links page and the files it links to.
+
+    Requests are forwarded to the origin of ``upstream`` with the same path. Pages
+    are cached for ``page_ttl`` seconds and revalidated afterwards. Archives are
+    cached indefinitely. Absolute links to the origin in the pages are rewritten to
+    point to the proxy.
+
+    Archives are streamed to the client while they are cached. Concurrent requests
+    for the same archive share a single download from the origin.
+    """
+
+    def __init__(
+        self,
+        upstream: str = PYTORCH_STABLE_URL,
+        cache_dir: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        page_ttl: float = DEFAULT_MAX_AGE,
+        session: Optional[PipSession] = None,
+    ) -> None:
+        if cache_dir is None:
+            cache_dir = get_cache_dir()
+        if session is None:
+            session = PipSession()
+        self.upstream = upstream
+        parts = urlsplit(upstream)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.cache_dir = path.join(cache_dir, "proxy")
+        self.page_ttl = page_ttl
+        self.session = session
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "coalesced": 0}
+
+        self._lock = threading.Lock()
+        self._page_locks: Dict[str, threading.Lock] = {}
+        self._downloads: Dict[str, Download] = {}
+
+        self._server = ProxyHTTPServer((host, port), ProxyRequestHandler)
+        self._server.proxy = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def index_url(self) -> str:
+        return self.url + self.upstream[len(self.origin) :]
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "ProxyServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs=dict(poll_interval=0.05),
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "ProxyServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get_cache_file(self, kind: str, request_path: str) -> str:
+        name = hashlib.sha256(request_path.encode("utf-8")).hexdigest()[:32]
+        return path.join(self.cache_dir, kind, name)
+
+    def handle(self, handler: BaseHTTPRequestHandler, head: bool = False) -> None:
+        try:
+            if urlsplit(handler.path).path.endswith(ARCHIVE_EXTENSIONS):
+                self.send_archive(handler, head)
+            else:
+                self.send_page(handler, head)
+        except UpstreamError as error:
+            handler.send_error(error.status, error.reason)
+        except ConnectionError:
+            # The client went away. A running download continues to be cached.
+            pass
+
+    def send_page(self, handler: BaseHTTPRequestHandler, head: bool) -> None:
+        content, content_type = self.get_page(handler.path)
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        if not head:
+            handler.wfile.write(content)
+
+    def get_page(self, request_path: str) -> Tuple[bytes, str]:
+        file = self.get_cache_file("pages", request_path)
+        with self._lock:
+            page_lock = self._page_locks.setdefault(request_path, threading.Lock())
+
+        # Concurrent requests for the same page wait for a single fetch.
+        with page_lock:
+            try:
+                with open(f"{file}.json", "r") as fh:
+                    meta: Optional[Dict[str, Any]] = json.load(fh)
+                with open(file, "rb") as page_fh:
+                    body = page_fh.read()
+            except (OSError, ValueError):
+                meta = None
+
+            if meta is not None and time.time() - meta["fetched"] < self.page_ttl:
+                self.count("hits")
+                return body, meta["content_type"]
+
+            headers = {"Accept": "text/html"}
+            if meta is not None:
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+            try:
+                response = self.session.get(self.origin + request_path, headers=headers)
+            except RequestException as exc:
+                raise UpstreamError(502, str(exc))
+
+            if response.status_code == 304 and meta is not None:
+                self.count("revalidated")
+            elif response.status_code == 200:
+                self.count("misses")
+                body = self.rewrite_page(response.content)
+                meta = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_type": response.headers.get("Content-Type", "text/html"),
+                }
+            else:
+                raise UpstreamError(response.status_code, response.reason)
+
+            meta["fetched"] = time.time()
+            self.store_page(file, body, meta)
+            return body, meta["content_type"]
+
+    def rewrite_page(self, content: bytes) -> bytes:
+        return content.replace(f"{self.origin}/".encode("utf-8"), b"/")
+
+    def store_page(self, file: str, content: bytes, meta: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(path.dirname(file), exist_ok=True)
+            for name, data in (
+                (file, content),
+                (f"{file}.json", json.dumps(meta).encode("utf-8")),
+            ):
+                with open(f"{name}.tmp", "wb") as fh:
+                    fh.write(data)
+                os.replace(f"{name}.tmp", name)
+        except OSError:
+            # The page is served regardless.
+            pass
+
+    def get_download(self, request_path: str, file: str) -> Optional[Download]:
+        with self._lock:
+            download = self._downloads.get(request_path)
+            if download is not None:
+                self.stats["coalesced"] += 1
+                return download
+            if path.isfile(file):
+                return None
+
+            self.stats["misses"] += 1
+            new_download = self._downloads[request_path] = Download(file)
+
+        def run() -> None:
+            try:
+                new_download.run(self.session, self.origin + request_path)
+            finally:
+                with self._lock:
+                    del self._downloads[request_path]
+
+        threading.Thread(target=run, daemon=True).start()
+        return new_download
+
+    def send_archive(self, handler: BaseHTTPRequestHandler, head: bool) -> None:
+        file = self.get_cache_file("files", handler.path)
+        range_header = handler.headers.get("Range")
+
+        download = self.get_download(handler.path, file)
+        if download is None:
+            self.count("hits")
+            size: Optional[int] = path.getsize(file)
+        else:
+            download.wait_for_headers(size=range_header is not None)
+            size = download.size
+
+        byte_range = parse_range(range_header, size) if size is not None else None
+        if byte_range is not None and byte_range[0] >= cast(int, size):
+            handler.send_response(416)
+            handler.send_header("Content-Range", f"bytes */{size}")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        if byte_range is None:
+            start, stop = 0, size
+            handler.send_response(200)
+        else:
+            start, stop = byte_range
+            handler.send_response(206)
+            handler.send_header("Content-Range", f"bytes {start}-{stop - 1}/{size}")
+        handler.send_header("Content-Type", "application/octet-stream")
+        handler.send_header("Accept-Ranges", "bytes")
+        if stop is not None:
+            handler.send_header("Content-Length", str(stop - start))
+        handler.end_headers()
+        if head:
+            return
+
+        if download is None:
+            chunks = iter_file(file, start, cast(int, stop))
+        else:
+            chunks = download.iter_content(start, stop)
+        try:
+            for chunk in chunks:
+                handler.wfile.write(chunk)
+        except UpstreamError:
+            # The status line was already sent. Closing the connection signals the
+            # client that the response is incomplete.
+            handler.close_connection = True
@@ -0,0 +1,194 @@
+import contextlib
+import itertools
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from os import path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from pip._vendor.packaging.requirements import InvalidRequirement, Requirement
+from pip._vendor.packaging.utils import canonicalize_name
+
+__all__ = ["PYTORCH_DISTRIBUTIONS", "SplitRequirements", "split_requirements"]
+
+PYTORCH_DISTRIBUTIONS = (
+    "torch",
+    "torchvision",
+    "torchaudio",
+    "torchtext",
+    "torchcsprng",
+)
+
+# Same as pip/_internal/req/req_file.py
+COMMENT_PATTERN = re.compile(r"(^|\s+)#.*$")
+NESTED_FILE_PATTERN = re.compile(
+    r"^(?P<option>-r|--requirement|-c|--constraint)"
+    r"(?:\s*=\s*|\s+|(?<=^-[rc]))(?P<file>\S+)$"
+)
+
+
+class SplitRequirements(NamedTuple):
+    # PyTorch distributions in pip/setuptools format.
+    distributions: List[str]
+    constraints: List[str]
+    # Arguments for the installation command that install all other requirements.
+    install_args: List[str]
+    # Requirements and constraints files that were read, including nested ones.
+    files: List[str]
+
+
+def is_pytorch_distribution(name: str) -> bool:
+    return canonicalize_name(name) in PYTORCH_DISTRIBUTIONS
+
+
+def get_pytorch_requirement(line: str) -> Optional[str]:
+    # Per-requirement options such as --hash follow the requirement.
+    tokens = line.split()
+    req = " ".join(itertools.takewhile(lambda token: not token.startswith("-"), tokens))
+    try:
+        requirement = Requirement(req)
+    except InvalidRequirement:
+        return None
+    # Direct references are installed as given.
+    if requirement.url or not is_pytorch_distribution(requirement.name):
+        return None
+    # The wheel is only selected during the resolution and the hashes thus cannot
+    # be checked. Dropping them would silently disable the integrity check.
+    if any(token.startswith("--hash") for token in tokens):
+        raise RuntimeError(
+            f"Hashes of PyTorch distributions are not supported, but got '{line}'. "
+            f"Pin the version instead or install the distribution with pip."
+        )
+    return req
+
+
+def read_logical_lines(file: str) -> List[str]:
+    with open(file, "r") as fh:
+        lines = fh.read().splitlines()
+
+    logical_lines = []
+    continued = ""
+    for line in lines:
+        if line.endswith("\\"):
+            continued += line[:-1]
+            continue
+        logical_lines.append(continued + line)
+        continued = ""
+    if continued:
+        logical_lines.append(continued)
+    return logical_lines
+
+
+class RequirementsSplitter:
+    def __init__(self) -> None:
+        self.distributions: List[str] = []
+        self.constraints: List[str] = []
+        self.files: List[str] = []
+        self.tmp_files: List[str] = []
+        self._files: Dict[Tuple[str, bool], Optional[str]] = {}
+
+    def split(self, file: str, constraint: bool = False) -> Optional[str]:
+        """Extracts the PyTorch distributions from a requirements file.
+
+        Returns the path of a requirements file with all other lines or ``None`` if
+        nothing else is left to install.
+        """
+        key = (file, constraint)
+        if key in self._files:
+            return self._files[key]
+        # Files that include themselves are only split once.
+        self._files[key] = None
+        self.files.append(file)
+
+        lines = []
+        is_empty = True
+        is_changed = False
+        for line in read_logical_lines(file):
+            content = COMMENT_PATTERN.sub("", line).strip()
+            if not content:
+                lines.append(line)
+                continue
+
+            match = NESTED_FILE_PATTERN.match(content)
+            if match is not None and "://" not in match.group("file"):
+                option = match.group("option")
+                nested_path = path.join(path.dirname(file), match.group("file"))
+                nested_file = self.split(
+                    nested_path, constraint=option in ("-c", "--constraint")
+                )
+                if nested_file != nested_path:
+                    is_changed = True
+                if nested_file is not None:
+                    lines.append(f"{option} {nested_file}")
+                    is_empty = False
+                continue
+
+            req = None if content.startswith("-") else get_pytorch_requirement(content)
+            if req is None:
+                lines.append(line)
+                is_empty = False
+            else:
+                (self.constraints if constraint else self.distributions).append(req)
+                is_changed = True
+
+        if is_empty:
+            filtered_file = None
+        elif not is_changed:
+            filtered_file = file
+        else:
+            filtered_file = self.write(file, lines)
+        self._files[key] = filtered_file
+        return filtered_file
+
+    def write(self, file: str, lines: List[str]) -> str:
+        # The filtered file is placed next to the original, since relative paths
+        # within it are resolved relative to its directory.
+        prefix = f".{path.basename(file)}."
+        try:
+            fd, tmp_file = tempfile.mkstemp(
+                suffix=".pwi", prefix=prefix, dir=path.dirname(file)
+            )
+        except OSError:
+            fd, tmp_file = tempfile.mkstemp(suffix=".pwi", prefix=prefix)
+        self.tmp_files.append(tmp_file)
+        with open(fd, "w") as fh:
+            fh.write("".join(f"{line}\n" for line in lines))
+        return tmp_file
+
+    def cleanup(self) -> None:
+        for file in self.tmp_files:
+            with contextlib.suppress(OSError):
+                os.remove(file)
+        self.tmp_files.clear()
+
+
+@contextlib.contextmanager
+def split_requirements(
+    requirement_files: Iterable[str] = (), constraint_files: Iterable[str] = ()
+) -> Iterator[SplitRequirements]:
+    """Splits requirements files into the PyTorch distributions and the rest.
+
+    The PyTorch distributions and constraints of all files, including nested ones,
+    are deduplicated. All other lines are passed through to filtered copies of the
+    files, which only exist within the block.
+    """
+    splitter = RequirementsSplitter()
+    try:
+        install_args: List[str] = []
+        for option, files in (("-r", requirement_files), ("-c", constraint_files)):
+            for file in files:
+                filtered_file = splitter.split(
+                    path.abspath(file), constraint=option == "-c"
+                )
+                if filtered_file is not None:
+                    install_args.extend((option, filtered_file))
+
+        yield SplitRequirements(
+            distributions=list(OrderedDict.fromkeys(splitter.distributions)),
+            constraints=list(OrderedDict.fromkeys(splitter.constraints)),
+            install_args=install_args,
+            files=list(OrderedDict.fromkeys(splitter.files)),
+        )
+    finally:
+        splitter.cleanup()
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from pip._vendor.packaging.utils import canonicalize_name
+
+from .index import BaseIndex, IndexEntry
+
+__all__ = ["Snapshot", "write_snapshot"]
+
+MAGIC = b"PWISNAP\x00"
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, number of records, CRC32 of everything after the
+# header, size of the string table, creation time, index digest
+HEADER = struct.Struct("<8sHHIIQd32s")
+# (offset, length) pairs into the string table for project, version, and URL. The
+# first record holds the URL, ETag, and Last-Modified header of the source instead.
+RECORD = struct.Struct("<IIIIII")
+
+
+def write_snapshot(
+    path: str,
+    index: BaseIndex,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    created: Optional[float] = None,
+) -> None:
+    if created is None:
+        created = time.time()
+
+    strings = bytearray()
+    offsets: Dict[str, Tuple[int, int]] = {}
+
+    def add_string(string: Optional[str]) -> Tuple[int, int]:
+        string = string or ""
+        try:
+            return offsets[string]
+        except KeyError:
+            data = string.encode("utf-8")
+            offsets[string] = location = (len(strings), len(data))
+            strings.extend(data)
+            return location
+
+    entries = sorted(index, key=lambda entry: entry.project.encode("utf-8"))
+    records = bytearray()
+    for strs in (
+        (index.url, etag, last_modified),
+        *((entry.project, entry.version, entry.url) for entry in entries),
+    ):
+        records.extend(
+            RECORD.pack(*[value for string in strs for value in add_string(string)])
+        )
+
+    body = bytes(records) + bytes(strings)
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(entries),
+        zlib.crc32(body),
+        len(strings),
+        created,
+        bytes.fromhex(index.digest),
+    )
+
+    dir = os.path.dirname(path) or "."
+    os.makedirs(dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(header)
+            fh.write(body)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class Snapshot(BaseIndex):
+    created: float
+    _num_records: int
+    _strings_offset: int
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._validate()
+        except Exception:
+            self.close()
+            raise
+
+        self.url, self.etag, self.last_modified = self._read_record(-1)
+
+    def _validate(self) -> None:
+        if len(self._mmap) < HEADER.size:
+            raise RuntimeError(f"{self.path} is too small to be a snapshot.")
+
+        (
+            magic,
+            version,
+            _,
+            self._num_records,
+            checksum,
+            strings_size,
+            self.created,
+            digest,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"{self.path} is not a snapshot.")
+        if version != FORMAT_VERSION:
+            raise RuntimeError(
+                f"{self.path} has snapshot format version {version}, "
+                f"but only version {FORMAT_VERSION} is supported."
+            )
+
+        self._strings_offset = HEADER.size + (self._num_records + 1) * RECORD.size
+        if len(self._mmap) != self._strings_offset + strings_size:
+            raise RuntimeError(f"{self.path} is truncated.")
+        if zlib.crc32(memoryview(cast(bytes, self._mmap))[HEADER.size :]) != checksum:
+            raise RuntimeError(f"The checksum of {self.path} does not match.")
+
+        self.digest = digest.hex()
+
+    def _read_string(self, offset: int, length: int) -> str:
+        offset += self._strings_offset
+        return self._mmap[offset : offset + length].decode("utf-8")
+
+    def _read_record(self, idx: int) -> Tuple[str, str, str]:
+        values = RECORD.unpack_from(self._mmap, HEADER.size + (idx + 1) * RECORD.size)
+        return (
+            self._read_string(*values[0:2]),
+            self._read_string(*values[2:4]),
+            self._read_string(*values[4:6]),
+        )
+
+    def _read_project(self, idx: int) -> bytes:
+        offset, length = RECORD.unpack_from(
+            self._mmap, HEADER.size + (idx + 1) * RECORD.size
+        )[:2]
+        offset += self._strings_offset
+        return self._mmap[offset : offset + length]
+
+    def _bisect_left(self, project: bytes) -> int:
+        lo, hi = 0, self._num_records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read_project(mid) < project:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created
+
+    @property
+    def projects(self) -> List[str]:
+        projects: List[str] = []
+        for entry in self:
+            if not projects or projects[-1] != entry.project:
+                projects.append(entry.project)
+        return projects
+
+    def entries(self, project_name: str) -> List[IndexEntry]:
+        project = canonicalize_name(project_name).encode("utf-8")
+        entries = []
+        idx = self._bisect_left(project)
+        while idx < self._num_records and self._read_project(idx) == project:
+            entries.append(IndexEntry(*self._read_record(idx)))
+            idx += 1
+        return entries
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for idx in range(self._num_records):
+            yield IndexEntry(*self._read_record(idx))
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
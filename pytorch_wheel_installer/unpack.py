@@ -0,0 +1,719 @@
+import base64
+import configparser
+import csv
+import errno
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import Parser
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._internal.utils.urls import url_to_path
+from pip._vendor.packaging.utils import canonicalize_name
+
+from .cache import get_cache_dir
+from .install import LINK_MODES, is_running_interpreter
+from .metrics import METRICS
+
+__all__ = ["install_wheels", "get_scheme", "LINK_MODES"]
+
+INSTALLER = "pwi"
+CHUNK_SIZE = 1024 * 1024
+
+STORE_FILES_DIR = "files"
+MANIFEST_FILE = "manifest.json"
+# Request code of the FICLONE ioctl on Linux, see ioctl_ficlone(2).
+FICLONE = 0x40049409
+
+SCHEME_KEYS = ("purelib", "platlib", "scripts", "include", "data")
+
+SCRIPT_TEMPLATE = """#!{executable}
+# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {import_name}
+if __name__ == "__main__":
+    sys.argv[0] = re.sub(r"(-script\\.pyw|\\.exe)?$", "", sys.argv[0])
+    sys.exit({call}())
+"""
+
+
+class RecordEntry(NamedTuple):
+    path: str
+    hash: str
+    size: str
+
+
+class WheelInfo(NamedTuple):
+    name: str
+    dist_info: str
+    is_purelib: bool
+    entry_points: str
+
+
+class ManifestEntry(NamedTuple):
+    filename: str
+    hash: str
+    size: str
+    executable: bool
+
+
+def get_scheme(
+    python: Optional[str] = None, prefix: Optional[str] = None
+) -> Dict[str, str]:
+    vars = {"base": prefix, "platbase": prefix} if prefix is not None else None
+    if python is None or is_running_interpreter(python):
+        paths = sysconfig.get_paths(vars=vars)
+    else:
+        # The interpreter of a virtual environment links to the base interpreter, so
+        # only the target interpreter itself knows its prefix.
+        output = subprocess.check_output(
+            (
+                python,
+                "-c",
+                "import json, sys, sysconfig; "
+                "print(json.dumps(sysconfig.get_paths(vars=json.loads(sys.argv[1]))))",
+                json.dumps(vars),
+            )
+        )
+        paths = json.loads(output.decode("utf-8"))
+    return {key: paths[key] for key in SCHEME_KEYS}
+
+
+def install_wheels(
+    links: Sequence[str],
+    session: Optional[PipSession] = None,
+    scheme: Optional[Dict[str, str]] = None,
+    executable: Optional[str] = None,
+    num_workers: Optional[int] = None,
+    link_mode: Optional[str] = None,
+    store_dir: Optional[str] = None,
+) -> List[str]:
+    if session is None:
+        session = PipSession()
+    if scheme is None:
+        scheme = get_scheme(executable)
+    if executable is None:
+        executable = sys.executable
+    if link_mode is not None and link_mode not in LINK_MODES:
+        raise RuntimeError(
+            f"Unknown link mode '{link_mode}'. "
+            f"Valid modes are {', '.join(LINK_MODES)}."
+        )
+
+    with METRICS.time("install_seconds", method=link_mode or "unpack"):
+        with tempfile.TemporaryDirectory() as download_dir:
+            if link_mode is None:
+
+                def download(link: str) -> str:
+                    return download_wheel(cast(PipSession, session), link, download_dir)
+
+                with ThreadPoolExecutor(max_workers=max(len(links), 1)) as executor:
+                    wheels = list(executor.map(download, links))
+                return [
+                    install_wheel(wheel, scheme, executable, num_workers=num_workers)
+                    for wheel in wheels
+                ]
+
+            # The narrowed type does not carry over into the closure.
+            wheel_store_dir = get_store_dir() if store_dir is None else store_dir
+
+            def store(link: str) -> str:
+                return get_stored_wheel(
+                    cast(PipSession, session), link, wheel_store_dir, download_dir
+                )
+
+            with ThreadPoolExecutor(max_workers=max(len(links), 1)) as executor:
+                stores = list(executor.map(store, links))
+            return [
+                install_stored_wheel(
+                    store, scheme, executable, link_mode, num_workers=num_workers
+                )
+                for store in stores
+            ]
+
+
+def download_wheel(session: PipSession, url: str, dir: str) -> str:
+    if os.path.isfile(url):
+        return url
+
+    link = Link(url)
+    if link.scheme == "file":
+        path = cast(str, url_to_path(link.url_without_fragment))
+    else:
+        path = os.path.join(dir, link.filename)
+        with session.get(link.url_without_fragment, stream=True) as response:
+            response.raise_for_status()
+            with open(path, "wb") as fh:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    fh.write(chunk)
+
+    if link.hash_name is not None:
+        verify_hash(path, link.hash_name, link.hash)
+    return path
+
+
+def verify_hash(path: str, hash_name: str, expected: str) -> None:
+    actual = hash_file(path, hash_name)
+    if actual != expected:
+        msg = (
+            f"The {hash_name} hash of {os.path.basename(path)} is {actual}, "
+            f"but {expected} was expected."
+        )
+        raise RuntimeError(msg)
+
+
+def hash_file(path: str, hash_name: str = "sha256") -> str:
+    hasher = hashlib.new(hash_name)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def install_wheel(
+    wheel: str,
+    scheme: Dict[str, str],
+    executable: str,
+    num_workers: Optional[int] = None,
+) -> str:
+    with zipfile.ZipFile(wheel) as zf:
+        members = {info.filename: info for info in zf.infolist() if not info.is_dir()}
+
+        def read(filename: str) -> Optional[bytes]:
+            try:
+                return zf.read(filename)
+            except KeyError:
+                return None
+
+        info = read_wheel_info(members.keys(), read)
+
+    root = scheme["purelib" if info.is_purelib else "platlib"]
+    uninstall(info.name, root)
+
+    targets = [
+        (members[filename], dest)
+        for filename, dest in get_targets(members.keys(), info, root, scheme)
+    ]
+    records = extract(wheel, targets, root, executable, num_workers=num_workers)
+    finish_installation(info, root, scheme, executable, records)
+    return info.name
+
+
+def read_wheel_info(
+    filenames: Iterable[str], read: Callable[[str], Optional[bytes]]
+) -> WheelInfo:
+    def read_text(filename: str) -> Optional[str]:
+        content = read(filename)
+        return content.decode("utf-8") if content is not None else None
+
+    dist_info = find_dist_info(filenames)
+    wheel_metadata = Parser().parsestr(read_text(f"{dist_info}/WHEEL") or "")
+    metadata = Parser().parsestr(
+        read_text(f"{dist_info}/METADATA") or "", headersonly=True
+    )
+    return WheelInfo(
+        name=str(metadata["Name"]),
+        dist_info=dist_info,
+        is_purelib=wheel_metadata.get("Root-Is-Purelib", "").lower() == "true",
+        entry_points=read_text(f"{dist_info}/entry_points.txt") or "",
+    )
+
+
+def get_targets(
+    filenames: Iterable[str], info: WheelInfo, root: str, scheme: Dict[str, str]
+) -> List[Tuple[str, str]]:
+    data_dir = info.dist_info[: -len(".dist-info")] + ".data"
+    skipped = {
+        f"{info.dist_info}/{file}" for file in ("RECORD", "INSTALLER", "REQUESTED")
+    }
+    return [
+        (filename, get_destination(filename, data_dir, root, scheme))
+        for filename in filenames
+        if filename not in skipped
+    ]
+
+
+def finish_installation(
+    info: WheelInfo,
+    root: str,
+    scheme: Dict[str, str],
+    executable: str,
+    records: List[RecordEntry],
+) -> None:
+    records.extend(
+        write_entry_points(info.entry_points, scheme["scripts"], root, executable)
+    )
+    write_dist_info(os.path.join(root, info.dist_info), root, records)
+
+
+def find_dist_info(filenames: Iterable[str]) -> str:
+    dist_infos = {
+        filename.split("/", 1)[0]
+        for filename in filenames
+        if filename.split("/", 1)[0].endswith(".dist-info")
+    }
+    if len(dist_infos) != 1:
+        raise RuntimeError(
+            f"Expected exactly one .dist-info directory, but found {len(dist_infos)}."
+        )
+    return dist_infos.pop()
+
+
+def get_destination(
+    filename: str, data_dir: str, root: str, scheme: Dict[str, str]
+) -> str:
+    top, _, rest = filename.partition("/")
+    if top != data_dir:
+        return join_member(root, filename)
+
+    key, _, rest = rest.partition("/")
+    if key == "headers":
+        key = "include"
+    try:
+        base = scheme[key]
+    except KeyError:
+        raise RuntimeError(f"Unknown wheel data directory '{key}' in {filename}.")
+    return join_member(base, rest)
+
+
+def join_member(dir: str, filename: str) -> str:
+    # Members must not be written outside of the directory they are extracted to,
+    # e.g. through '..' components or absolute names.
+    dir = os.path.normpath(dir)
+    dest = os.path.normpath(os.path.join(dir, *filename.split("/")))
+    try:
+        is_contained = os.path.commonpath((dir, dest)) == dir
+    except ValueError:
+        # The paths are on different drives.
+        is_contained = False
+    if filename.startswith("/") or os.path.isabs(filename) or not is_contained:
+        raise RuntimeError(f"Wheel member {filename} is outside of {dir}.")
+    return dest
+
+
+def get_num_workers(num_workers: Optional[int], num_tasks: int) -> int:
+    if num_workers is None:
+        num_workers = min(32, (os.cpu_count() or 1) + 4)
+    return max(min(num_workers, num_tasks), 1)
+
+
+def extract(
+    wheel: str,
+    targets: Sequence[Tuple[zipfile.ZipInfo, str]],
+    root: str,
+    executable: Optional[str],
+    num_workers: Optional[int] = None,
+) -> List[RecordEntry]:
+    num_workers = get_num_workers(num_workers, len(targets))
+
+    # Distribute the largest members first to balance the decompression work.
+    shards: List[List[Tuple[zipfile.ZipInfo, str]]] = [[] for _ in range(num_workers)]
+    for idx, target in enumerate(
+        sorted(targets, key=lambda target: target[0].file_size, reverse=True)
+    ):
+        shards[idx % num_workers].append(target)
+
+    def extract_shard(shard: List[Tuple[zipfile.ZipInfo, str]]) -> List[RecordEntry]:
+        with zipfile.ZipFile(wheel) as zf:
+            return [
+                extract_member(zf, info, dest, root, executable) for info, dest in shard
+            ]
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return [
+            record
+            for records in executor.map(extract_shard, shards)
+            for record in records
+        ]
+
+
+def extract_member(
+    zf: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    dest: str,
+    root: str,
+    executable: Optional[str],
+) -> RecordEntry:
+    mode = (info.external_attr >> 16) & 0o777
+    with zf.open(info) as src:
+        return write_file(
+            src,
+            dest,
+            root,
+            executable if is_script(info.filename) else None,
+            is_executable=is_script(info.filename) or bool(mode & 0o111),
+        )
+
+
+def is_script(filename: str) -> bool:
+    return "/scripts/" in filename and ".data/" in filename
+
+
+def write_file(
+    src: IO[bytes],
+    dest: str,
+    root: str,
+    executable: Optional[str] = None,
+    is_executable: bool = False,
+) -> RecordEntry:
+    # If executable is given, a '#!python' shebang is replaced by it.
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    with open(dest, "wb") as dst:
+        if executable is not None:
+            first_line = src.readline()
+            if first_line.startswith(b"#!python"):
+                first_line = f"#!{executable}".encode("utf-8") + first_line[8:]
+            hasher.update(first_line)
+            dst.write(first_line)
+            size += len(first_line)
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+
+    if is_executable:
+        os.chmod(dest, 0o755)
+
+    return RecordEntry(record_path(dest, root), encode_hash(hasher), str(size))
+
+
+def get_store_dir(cache_dir: Optional[str] = None) -> str:
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    return os.path.join(cache_dir, "store")
+
+
+def get_stored_wheel(
+    session: PipSession, url: str, store_dir: str, download_dir: str
+) -> str:
+    # The stores are keyed by the SHA256 hash of the wheel. Remote links without a
+    # hash are mapped to the hash of their first download.
+    link = Link(url)
+    is_remote = link.scheme in ("http", "https")
+    digest: Optional[str] = None
+    if link.hash_name == "sha256":
+        digest = link.hash
+    elif is_remote:
+        digest = read_url_digest(store_dir, link.url_without_fragment)
+    if digest is not None and is_stored(store_dir, digest):
+        return os.path.join(store_dir, digest)
+
+    wheel = download_wheel(session, url, download_dir)
+    digest = hash_file(wheel)
+    store = store_wheel(wheel, store_dir, digest)
+    if is_remote:
+        write_url_digest(store_dir, link.url_without_fragment, digest)
+    return store
+
+
+def get_url_digest_path(store_dir: str, url: str) -> str:
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(store_dir, "urls", name)
+
+
+def read_url_digest(store_dir: str, url: str) -> Optional[str]:
+    try:
+        with open(get_url_digest_path(store_dir, url), "r") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_url_digest(store_dir: str, url: str, digest: str) -> None:
+    file = get_url_digest_path(store_dir, url)
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp = f"{file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(digest)
+        os.replace(tmp, file)
+    except OSError:
+        pass
+
+
+def is_stored(store_dir: str, digest: str) -> bool:
+    return os.path.isfile(os.path.join(store_dir, digest, MANIFEST_FILE))
+
+
+def store_wheel(
+    wheel: str, store_dir: str, digest: str, num_workers: Optional[int] = None
+) -> str:
+    store = os.path.join(store_dir, digest)
+    if is_stored(store_dir, digest):
+        return store
+
+    # The wheel is extracted next to the store and moved into place once it is
+    # complete. Thus, concurrent installations never see a partial store.
+    os.makedirs(store_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=store_dir, prefix=f".{digest}-")
+    try:
+        files = os.path.join(tmp, STORE_FILES_DIR)
+        with zipfile.ZipFile(wheel) as zf:
+            targets = [
+                (info, join_member(files, info.filename))
+                for info in zf.infolist()
+                if not info.is_dir()
+            ]
+        # The scripts are stored verbatim and rewritten for each installation.
+        records = extract(wheel, targets, files, None, num_workers=num_workers)
+
+        manifest = []
+        for record in records:
+            path = os.path.join(files, *record.path.split("/"))
+            mode = os.stat(path).st_mode
+            # The files are shared by all installations and thus must not be
+            # modified.
+            os.chmod(path, mode & ~0o222)
+            manifest.append(
+                ManifestEntry(record.path, record.hash, record.size, bool(mode & 0o111))
+            )
+        with open(os.path.join(tmp, MANIFEST_FILE), "w") as fh:
+            json.dump(sorted(manifest), fh)
+
+        os.rename(tmp, store)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Another process stored the same wheel in the meantime.
+        if not is_stored(store_dir, digest):
+            raise
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return store
+
+
+def read_manifest(store: str) -> List[ManifestEntry]:
+    with open(os.path.join(store, MANIFEST_FILE), "r") as fh:
+        return [ManifestEntry(*entry) for entry in json.load(fh)]
+
+
+def install_stored_wheel(
+    store: str,
+    scheme: Dict[str, str],
+    executable: str,
+    link_mode: str,
+    num_workers: Optional[int] = None,
+) -> str:
+    manifest = {entry.filename: entry for entry in read_manifest(store)}
+    files = os.path.join(store, STORE_FILES_DIR)
+
+    def get_path(filename: str) -> str:
+        return os.path.join(files, *filename.split("/"))
+
+    def read(filename: str) -> Optional[bytes]:
+        if filename not in manifest:
+            return None
+        with open(get_path(filename), "rb") as fh:
+            return fh.read()
+
+    info = read_wheel_info(manifest.keys(), read)
+    root = scheme["purelib" if info.is_purelib else "platlib"]
+    uninstall(info.name, root)
+
+    linker = Linker(link_mode)
+
+    def install_file(target: Tuple[str, str]) -> RecordEntry:
+        filename, dest = target
+        src = get_path(filename)
+        if is_script(filename):
+            # Scripts are rewritten for the executable and thus cannot be shared.
+            with open(src, "rb") as fh:
+                return write_file(fh, dest, root, executable, is_executable=True)
+
+        entry = manifest[filename]
+        linker.link(src, dest, entry.executable)
+        return RecordEntry(record_path(dest, root), entry.hash, entry.size)
+
+    targets = get_targets(manifest.keys(), info, root, scheme)
+    with ThreadPoolExecutor(
+        max_workers=get_num_workers(num_workers, len(targets))
+    ) as executor:
+        records = list(executor.map(install_file, targets))
+    finish_installation(info, root, scheme, executable, records)
+    return info.name
+
+
+class Linker:
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+
+    def link(self, src: str, dest: str, is_executable: bool) -> None:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if os.path.lexists(dest):
+            os.remove(dest)
+
+        # If linking fails, e.g. since the store is on another file system or the
+        # file system does not support reflinks, this and all further files are
+        # copied.
+        if self.mode == "hardlink":
+            try:
+                os.link(src, dest)
+                return
+            except OSError:
+                self.mode = "copy"
+        elif self.mode == "reflink":
+            try:
+                reflink(src, dest)
+            except OSError:
+                self.mode = "copy"
+
+        if self.mode == "copy":
+            shutil.copyfile(src, dest)
+        os.chmod(dest, 0o755 if is_executable else 0o644)
+
+
+def reflink(src: str, dest: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux.")
+    import fcntl
+
+    try:
+        with open(src, "rb") as src_fh, open(dest, "wb") as dest_fh:
+            fcntl.ioctl(dest_fh.fileno(), FICLONE, src_fh.fileno())
+    except OSError:
+        try:
+            os.remove(dest)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_entry_points(
+    entry_points: str, scripts_dir: str, root: str, executable: str
+) -> List[RecordEntry]:
+    if not entry_points:
+        return []
+
+    parser = configparser.ConfigParser(delimiters=("=",))
+    parser.optionxform = str  # type: ignore[assignment,method-assign]
+    parser.read_string(entry_points)
+
+    records = []
+    for section in ("console_scripts", "gui_scripts"):
+        if not parser.has_section(section):
+            continue
+        for name, value in parser.items(section):
+            module, _, attrs = value.split("[", 1)[0].strip().partition(":")
+            import_name = attrs.split(".", 1)[0]
+            content = SCRIPT_TEMPLATE.format(
+                executable=executable,
+                module=module.strip(),
+                import_name=import_name.strip(),
+                call=attrs.strip(),
+            ).encode("utf-8")
+
+            os.makedirs(scripts_dir, exist_ok=True)
+            dest = os.path.join(scripts_dir, name)
+            with open(dest, "wb") as fh:
+                fh.write(content)
+            os.chmod(dest, 0o755)
+            records.append(
+                RecordEntry(
+                    record_path(dest, root),
+                    encode_hash(hashlib.sha256(content)),
+                    str(len(content)),
+                )
+            )
+    return records
+
+
+def write_dist_info(dist_info: str, root: str, records: List[RecordEntry]) -> None:
+    for file, content in (("INSTALLER", f"{INSTALLER}\n"), ("REQUESTED", "")):
+        path = os.path.join(dist_info, file)
+        with open(path, "w") as fh:
+            fh.write(content)
+        data = content.encode("utf-8")
+        records.append(
+            RecordEntry(
+                record_path(path, root),
+                encode_hash(hashlib.sha256(data)),
+                str(len(data)),
+            )
+        )
+
+    record = os.path.join(dist_info, "RECORD")
+    records.append(RecordEntry(record_path(record, root), "", ""))
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(sorted(records))
+    with open(record, "w", newline="") as fh:
+        fh.write(buffer.getvalue())
+
+
+def uninstall(name: str, root: str) -> None:
+    canonical_name = canonicalize_name(name)
+    try:
+        dirnames = os.listdir(root)
+    except FileNotFoundError:
+        return
+
+    for dirname in dirnames:
+        if not dirname.endswith(".dist-info"):
+            continue
+        if canonicalize_name(dirname[: -len(".dist-info")].split("-")[0]) != (
+            canonical_name
+        ):
+            continue
+
+        dist_info = os.path.join(root, dirname)
+        parents = set()
+        try:
+            with open(os.path.join(dist_info, "RECORD"), newline="") as fh:
+                for row in csv.reader(fh):
+                    if not row:
+                        continue
+                    path = os.path.normpath(os.path.join(root, row[0]))
+                    parents.add(os.path.dirname(path))
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(dist_info, ignore_errors=True)
+
+        for parent in sorted(parents, key=len, reverse=True):
+            remove_empty_dirs(parent, root)
+
+
+def remove_empty_dirs(path: str, root: str) -> None:
+    root = os.path.normpath(root)
+    while path.startswith(root) and path != root:
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def record_path(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def encode_hash(hasher: "hashlib._Hash") -> str:
+    digest = base64.urlsafe_b64encode(hasher.digest()).rstrip(b"=").decode("ascii")
+    return f"sha256={digest}"
@@ -1,9 +1,19 @@
-from typing import Any
+import concurrent.futures
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Tuple, TypeVar
 
 __all__ = [
     "get_public_or_private_attr",
+    "Timer",
+    "run_in_thread",
+    "Deadline",
+    "parse_python_version",
 ]
 
+T = TypeVar("T")
+
 
 def get_public_or_private_attr(obj: Any, attr: str) -> Any:
     try:
@@ -14,3 +24,87 @@ def get_public_or_private_attr(obj: Any, attr: str) -> Any:
         except AttributeError:
             msg = f"'{type(obj)}' has no attribute '{attr}' or '_{attr}'"
             raise AttributeError(msg)
+
+
+class Timer:
+    def __init__(self) -> None:
+        self.start: Optional[float] = None
+        self.stop: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        if self.start is None:
+            return 0.0
+        stop = self.stop if self.stop is not None else time.perf_counter()
+        return stop - self.start
+
+
+def run_in_thread(fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+    # In contrast to an executor, the daemon thread does not block the interpreter
+    # from exiting if the result is never needed.
+    future: "Future[T]" = Future()
+
+    def target() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+class Deadline:
+    """Point in time until which an operation has to finish.
+
+    Args:
+        timeout: Seconds from now. If ``None``, the deadline never expires.
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.expires = None if timeout is None else time.monotonic() + timeout
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(self.expires - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def share(self, fraction: float) -> "Deadline":
+        remaining = self.remaining
+        return Deadline(None if remaining is None else remaining * fraction)
+
+    def check(self, action: str) -> None:
+        if self.expired:
+            raise TimeoutError(f"The deadline was exceeded while {action}.")
+
+    def result(self, future: "Future[T]", action: str) -> T:
+        try:
+            return future.result(timeout=self.remaining)
+        except concurrent.futures.TimeoutError:
+            if not future.done():
+                raise TimeoutError(f"The deadline was exceeded while {action}.")
+            raise
+
+
+def parse_python_version(version: str) -> Tuple[int, ...]:
+    try:
+        version_info = tuple(int(part) for part in version.split("."))
+    except ValueError:
+        version_info = ()
+    if not 1 <= len(version_info) <= 3:
+        raise RuntimeError(f"'{version}' is not a valid Python version, e.g. '3.8'.")
+    return version_info
@@ -0,0 +1,134 @@
+import time
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import cache, database, snapshot, utils
+
+from .utils import get_tmp_dir
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+HTML = '<a href="cpu/torch-1.5.1%2Bcpu-cp36-cp36m-linux_x86_64.whl">torch</a>'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+@pytest.fixture
+def cache_dir():
+    with get_tmp_dir() as tmp_dir:
+        yield tmp_dir
+
+
+def test_get_cache_dir_env(mocker):
+    mocker.patch.dict("os.environ", {"PWI_CACHE_DIR": "/foo"})
+    assert cache.get_cache_dir() == "/foo"
+
+
+def test_load_index(subtests, mocker, cache_dir):
+    session = mocker.Mock()
+    session.get.return_value = FakeResponse(text=HTML, headers={"ETag": '"v1"'})
+
+    with subtests.test("miss"):
+        idx = cache.load_index(session, URL, cache_dir=cache_dir)
+        assert isinstance(idx, snapshot.Snapshot)
+        assert [entry.version for entry in idx.entries("torch")] == ["1.5.1+cpu"]
+        assert session.get.call_count == 1
+
+    with subtests.test("hit"):
+        idx = cache.load_index(session, URL, cache_dir=cache_dir)
+        assert len(idx) == 1
+        assert session.get.call_count == 1
+
+    with subtests.test("revalidated"):
+        session.get.return_value = FakeResponse(status_code=304)
+        idx = cache.load_index(session, URL, cache_dir=cache_dir, max_age=0)
+        assert len(idx) == 1
+        headers = session.get.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"v1"'
+
+    with subtests.test("refresh"):
+        session.get.return_value = FakeResponse(text="")
+        idx = cache.load_index(session, URL, cache_dir=cache_dir, refresh=True)
+        assert len(idx) == 0
+
+
+def test_load_index_corrupted_cache(mocker, cache_dir):
+    file = cache.get_snapshot_path(cache_dir, URL)
+    session = mocker.Mock()
+    session.get.return_value = FakeResponse(text=HTML)
+    cache.load_index(session, URL, cache_dir=cache_dir)
+
+    with open(file, "r+b") as fh:
+        fh.seek(-1, 2)
+        fh.write(b"\x00")
+
+    idx = cache.load_index(session, URL, cache_dir=cache_dir)
+    assert len(idx) == 1
+    assert session.get.call_count == 2
+
+
+def test_load_index_stale(subtests, mocker, cache_dir):
+    session = mocker.Mock()
+    session.get.return_value = FakeResponse(text=HTML)
+    cache.load_index(session, URL, cache_dir=cache_dir)
+
+    session.get.side_effect = lambda *args, **kwargs: time.sleep(1.0)
+
+    with subtests.test("stale"):
+        with pytest.warns(UserWarning):
+            idx = cache.load_index(
+                session,
+                URL,
+                cache_dir=cache_dir,
+                max_age=0,
+                deadline=utils.Deadline(0.1),
+            )
+        assert len(idx) == 1
+
+    with subtests.test("no cache"):
+        with pytest.raises(TimeoutError):
+            cache.load_index(
+                session,
+                URL,
+                cache_dir=path.join(cache_dir, "empty"),
+                deadline=utils.Deadline(0.1),
+            )
+
+
+def test_load_index_database(subtests, mocker, cache_dir):
+    index_db = path.join(cache_dir, "index.db")
+    session = mocker.Mock()
+    session.get.return_value = FakeResponse(text=HTML, headers={"ETag": '"v1"'})
+
+    with subtests.test("miss"):
+        idx = cache.load_index(session, URL, cache_dir=cache_dir, index_db=index_db)
+        assert isinstance(idx, database.DatabaseIndex)
+        assert [entry.version for entry in idx.entries("torch")] == ["1.5.1+cpu"]
+        assert session.get.call_count == 1
+        assert not path.exists(cache.get_snapshot_path(cache_dir, URL))
+
+    with subtests.test("hit"):
+        idx = cache.load_index(session, URL, cache_dir=cache_dir, index_db=index_db)
+        assert len(idx) == 1
+        assert session.get.call_count == 1
+
+    with subtests.test("revalidated"):
+        session.get.return_value = FakeResponse(status_code=304)
+        idx = cache.load_index(
+            session, URL, cache_dir=cache_dir, max_age=0, index_db=index_db
+        )
+        assert len(idx) == 1
+        headers = session.get.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"v1"'
+
+    with subtests.test("stale"):
+        assert len(cache.load_stale_index(URL, index_db=index_db)) == 1
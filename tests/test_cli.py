@@ -1,9 +1,20 @@
+import json
+import subprocess
 import sys
 from io import StringIO
+from os import path
 
 import pytest
 
-from pytorch_wheel_installer import __version__, cli, computation_backend
+from pytorch_wheel_installer import (
+    __version__,
+    cli,
+    computation_backend,
+    metrics,
+    prefetch,
+)
+
+from .utils import get_tmp_dir
 
 
 @pytest.fixture
@@ -125,14 +136,275 @@ def test_entry_point_install_cmd(subtests, mocker, patch_argv):
     for arg in ("-c", "--install-cmd"):
         with subtests.test(arg=arg):
             patch_argv(arg, install_cmd, "baz")
-            check_call_mock = mocker.patch(
-                "pytorch_wheel_installer.cli.subprocess.check_call"
+            install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+
+            cli.entry_point()
+
+            install_mock.assert_called_once_with(
+                links, install_cmd=install_cmd, in_process=False
             )
 
+
+def test_entry_point_in_process(mocker, patch_argv):
+    links = ["https://download.pytorch.org/foo.whl"]
+    mocker.patch("pytorch_wheel_installer.cli.find_links", return_value=links)
+    install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+
+    patch_argv("--in-process", "baz")
+    cli.entry_point()
+
+    assert install_mock.call_args[1]["in_process"]
+
+
+def test_entry_point_fast_install(mocker, patch_argv):
+    links = ["https://download.pytorch.org/foo.whl"]
+    mocker.patch("pytorch_wheel_installer.cli.find_links", return_value=links)
+    mocker.patch("pytorch_wheel_installer.cli.get_dependencies", return_value=[])
+    install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+    install_wheels_mock = mocker.patch("pytorch_wheel_installer.unpack.install_wheels")
+
+    patch_argv("--fast-install", "baz")
+    cli.entry_point()
+
+    install_wheels_mock.assert_called_once_with(links)
+    install_mock.assert_not_called()
+
+
+def test_entry_point_link_install(mocker, patch_argv):
+    links = ["https://download.pytorch.org/foo.whl"]
+    mocker.patch("pytorch_wheel_installer.cli.find_links", return_value=links)
+    mocker.patch("pytorch_wheel_installer.cli.get_dependencies", return_value=[])
+    install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+    install_wheels_mock = mocker.patch("pytorch_wheel_installer.unpack.install_wheels")
+
+    patch_argv("--link-install", "reflink", "baz")
+    cli.entry_point()
+
+    install_wheels_mock.assert_called_once_with(links, link_mode="reflink")
+    install_mock.assert_not_called()
+
+
+def test_entry_point_fast_install_dependencies(mocker, patch_argv):
+    links = ["https://download.pytorch.org/foo.whl"]
+    mocker.patch("pytorch_wheel_installer.cli.find_links", return_value=links)
+    mocker.patch("pytorch_wheel_installer.cli.get_dependencies", return_value=["numpy"])
+    install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+    mocker.patch("pytorch_wheel_installer.unpack.install_wheels")
+
+    patch_argv("--fast-install", "baz")
+    cli.entry_point()
+
+    install_mock.assert_called_once_with(["numpy"], in_process=False)
+
+
+def test_parse_input_unpack_conflicts(subtests, mocker, patch_argv):
+    mocker.patch("sys.stderr", new_callable=StringIO)
+
+    for args in (
+        ("--fast-install", "--link-install", "copy"),
+        ("--fast-install", "--install-cmd", "conda install"),
+        ("--link-install", "copy", "-c", "conda install"),
+    ):
+        with subtests.test(args=args):
+            patch_argv(*args, "torch")
+            with pytest.raises(SystemExit):
+                cli.parse_input()
+
+
+def test_get_dependencies(mocker):
+    links = [
+        "https://download.pytorch.org/whl/cpu/"
+        "torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        "https://download.pytorch.org/whl/cpu/"
+        "torchvision-0.6.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    ]
+    requires_dist = {
+        links[0]: ["future", "numpy"],
+        links[1]: [
+            "numpy",
+            "pillow (>=4.1.1)",
+            "torch (==1.5.1)",
+            'scipy ; extra == "scipy"',
+        ],
+    }
+    mocker.patch(
+        "pytorch_wheel_installer.cli.get_requires_dist",
+        side_effect=lambda session, link, cache: requires_dist[link],
+    )
+
+    assert cli.get_dependencies(links) == ["future", "numpy", "pillow>=4.1.1"]
+
+
+def test_entry_point_requirements(subtests, mocker, patch_argv):
+    links = ["https://download.pytorch.org/foo.whl"]
+    find_links = mocker.patch(
+        "pytorch_wheel_installer.cli.find_links", return_value=links
+    )
+
+    with get_tmp_dir() as root:
+        file = path.join(root, "requirements.txt")
+        with open(file, "w") as fh:
+            fh.write("torch\nrequests\n")
+
+        with subtests.test("install"):
+            install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+            patch_argv("-r", file, "torchvision")
+            cli.entry_point()
+
+            assert find_links.call_args[0][0] == ["torchvision", "torch"]
+            install_args = install_mock.call_args[0][0]
+            assert install_args[: len(links) + 1] == [*links, "-r"]
+
+        with subtests.test("fast_install"):
+            mocker.patch(
+                "pytorch_wheel_installer.cli.get_dependencies", return_value=[]
+            )
+            install_mock = mocker.patch("pytorch_wheel_installer.cli.install")
+            install_wheels_mock = mocker.patch(
+                "pytorch_wheel_installer.unpack.install_wheels"
+            )
+            patch_argv("--fast-install", "--requirement", file)
+            cli.entry_point()
+
+            install_wheels_mock.assert_called_once_with(links)
+            assert install_mock.call_args[0][0][0] == "-r"
+
+
+def test_entry_point_timings(mocker, patch_argv):
+    mocker.patch("pytorch_wheel_installer.cli.find_links", return_value=[])
+    mocker.patch("pytorch_wheel_installer.cli.install")
+    stderr = mocker.patch.object(sys, "stderr", StringIO())
+
+    patch_argv("--timings", "baz")
+    cli.entry_point()
+
+    out = stderr.getvalue()
+    assert "resolution" in out
+    assert "installation" in out
+
+
+def test_entry_point_metrics(mocker, patch_argv):
+    mocker.patch.object(metrics, "METRICS", metrics.Metrics())
+
+    def find_links(*args, **kwargs):
+        metrics.METRICS.increment("links_evaluated_total", 3)
+        return []
+
+    mocker.patch("pytorch_wheel_installer.cli.find_links", side_effect=find_links)
+    mocker.patch("pytorch_wheel_installer.cli.install")
+
+    with get_tmp_dir() as root:
+        textfile = path.join(root, "pwi.prom")
+        log = path.join(root, "pwi.jsonl")
+        patch_argv("--metrics-textfile", textfile, "--metrics-log", log, "baz")
+        cli.entry_point()
+
+        with open(textfile) as fh:
+            assert "pwi_links_evaluated_total 3" in fh.read()
+        with open(log) as fh:
+            assert json.loads(fh.readline())["name"] == "pwi_links_evaluated_total"
+
+    assert not metrics.METRICS.enabled
+
+
+def test_entry_point_proxy(mocker, patch_argv):
+    proxy_server = mocker.patch("pytorch_wheel_installer.proxy.ProxyServer")
+    proxy_server.return_value.serve_forever.side_effect = KeyboardInterrupt
+    mocker.patch.object(sys, "stdout", StringIO())
+
+    patch_argv("proxy", "--port", "1234", "--page-ttl", "60")
+    cli.entry_point()
+
+    kwargs = proxy_server.call_args[1]
+    assert kwargs["port"] == 1234
+    assert kwargs["page_ttl"] == 60.0
+    proxy_server.return_value.close.assert_called_once()
+
+
+def test_entry_point_export_links(mocker, patch_argv):
+    export_links = mocker.patch(
+        "pytorch_wheel_installer.export.export_links", return_value=[]
+    )
+    mocker.patch.object(sys, "stdout", StringIO())
+
+    patch_argv(
+        "export-links",
+        "torch",
+        "-o",
+        "out",
+        "-b",
+        "cpu",
+        "-b",
+        "cu102",
+        "--python-version",
+        "3.7",
+        "--python-version",
+        "3.8",
+        "--platform",
+        "win_amd64",
+    )
+    cli.entry_point()
+
+    args, kwargs = export_links.call_args
+    assert args == ("out", ["torch"])
+    assert kwargs["computation_backends"] == [
+        computation_backend.CPUBackend(),
+        computation_backend.CUDABackend(10, 2),
+    ]
+    assert [
+        (target_python.py_version_info[:2], target_python.platform)
+        for target_python in kwargs["target_pythons"]
+    ] == [((3, 7), "win_amd64"), ((3, 8), "win_amd64")]
+
+
+def test_entry_point_prefetch(subtests, mocker, patch_argv):
+    prefetch_mock = mocker.patch(
+        "pytorch_wheel_installer.prefetch.prefetch",
+        return_value=[prefetch.PrefetchStep("index", "https://foo", 0.5)],
+    )
+    stdout = mocker.patch.object(sys, "stdout", StringIO())
+
+    patch_argv(
+        "prefetch", "torch", "-b", "cpu", "-b", "cu102", "--python-version", "3.8"
+    )
+    cli.entry_point()
+
+    args, kwargs = prefetch_mock.call_args
+    with subtests.test("distributions"):
+        assert args[0] == ["torch"]
+
+    with subtests.test("combinations"):
+        assert [str(backend) for backend in kwargs["computation_backends"]] == [
+            "cpu",
+            "cu102",
+        ]
+        assert len(kwargs["target_pythons"]) == 1
+
+    with subtests.test("report"):
+        assert "https://foo" in stdout.getvalue()
+
+    with subtests.test("failure"):
+        prefetch_mock.return_value = [
+            prefetch.PrefetchStep("index", "https://foo", 0.5, "404")
+        ]
+        stdout = mocker.patch.object(sys, "stdout", StringIO())
+        with pytest.raises(SystemExit) as info:
             cli.entry_point()
+        assert info.value.code == 1
+        assert "FAILED: 404" in stdout.getvalue()
+
+
+def test_lazy_imports():
+    modules = ("export", "prefetch", "proxy", "unpack")
+    code = (
+        "import sys; import pytorch_wheel_installer.cli; "
+        f"print([module for module in {modules} "
+        "if f'pytorch_wheel_installer.{module}' in sys.modules])"
+    )
+
+    output = subprocess.check_output((sys.executable, "-c", code))
 
-            cmd = check_call_mock.call_args[0][0]
-            assert cmd == " ".join((install_cmd, *links))
+    assert output.decode().strip() == "[]"
 
 
 def test_get_help_no_help():
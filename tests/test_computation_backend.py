@@ -72,9 +72,9 @@ def test_CUDABackend():
 
 
 try:
-    subprocess.check_call("nvcc --version", shell=True)
+    subprocess.check_call(("nvcc", "--version"))
     CUDA_AVAILABLE = True
-except subprocess.CalledProcessError:
+except (subprocess.CalledProcessError, OSError):
     CUDA_AVAILABLE = False
 
 
@@ -115,6 +115,25 @@ def test_detect_computation_backend_cuda(mocker):
     assert backend.minor == minor
 
 
+def test_detect_computation_backend_nvcc_not_found(mocker):
+    mocker.patch(
+        "pytorch_wheel_installer.computation_backend.subprocess.check_output",
+        side_effect=FileNotFoundError,
+    )
+
+    assert isinstance(cb.detect_computation_backend(), cb.CPUBackend)
+
+
 @skip_if_cuda_unavailable
 def test_detect_computation_backend_cuda_smoke():
     assert isinstance(cb.detect_computation_backend(), cb.CUDABackend)
+
+
+def test_detect_computation_backend_timeout(mocker):
+    mocker.patch(
+        "pytorch_wheel_installer.computation_backend.subprocess.check_output",
+        side_effect=subprocess.TimeoutExpired("nvcc", 1.0),
+    )
+
+    with pytest.raises(TimeoutError):
+        cb.detect_computation_backend(timeout=1.0)
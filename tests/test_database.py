@@ -0,0 +1,120 @@
+import sqlite3
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import database, index
+
+from .utils import get_tmp_dir
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+HTML = """
+<a href="cu102/torch-1.5.1-cp36-cp36m-linux_x86_64.whl">torch</a><br>
+<a href="cpu/torchvision-0.6.1%2Bcpu-cp36-cp36m-linux_x86_64.whl">vision</a><br>
+<a href="cpu/torch-1.5.1%2Bcpu-cp36-cp36m-linux_x86_64.whl">torch</a><br>
+<a href="torchtext-0.6.0-py3-none-any.whl">text</a><br>
+"""
+
+
+@pytest.fixture
+def db_file():
+    with get_tmp_dir() as tmp_dir:
+        yield path.join(tmp_dir, "index.db")
+
+
+def test_DatabaseIndex_roundtrip(subtests, db_file):
+    idx = index.parse_index(HTML, URL)
+    database.write_database_index(db_file, idx, etag='"abc"', last_modified="yesterday")
+
+    with database.DatabaseIndex(db_file, URL) as db_idx:
+        with subtests.test("metadata"):
+            assert db_idx.url == URL
+            assert db_idx.etag == '"abc"'
+            assert db_idx.last_modified == "yesterday"
+            assert db_idx.digest == idx.digest
+            assert db_idx.age >= 0
+
+        with subtests.test("len"):
+            assert len(db_idx) == len(idx)
+
+        with subtests.test("iter"):
+            assert list(db_idx) == list(idx)
+
+        with subtests.test("projects"):
+            assert db_idx.projects == idx.projects
+
+        for project in ("torch", "torchvision", "torchtext"):
+            with subtests.test(project=project):
+                assert db_idx.entries(project) == idx.entries(project)
+
+        with subtests.test("unknown project"):
+            assert not db_idx.entries("unknown")
+
+        for computation_backend in ("cpu", "cu102", "cu92"):
+            with subtests.test(computation_backend=computation_backend):
+                assert db_idx.find_entries(
+                    "Torch", computation_backend
+                ) == idx.find_entries("torch", computation_backend)
+
+
+def test_DatabaseIndex_tags(db_file):
+    database.write_database_index(db_file, index.parse_index(HTML, URL))
+
+    connection = sqlite3.connect(db_file)
+    try:
+        rows = connection.execute(
+            "SELECT backend, python_tag, abi_tag, platform_tag FROM files "
+            "ORDER BY position"
+        ).fetchall()
+    finally:
+        connection.close()
+
+    assert rows == [
+        ("cu102", "cp36", "cp36m", "linux_x86_64"),
+        ("cpu", "cp36", "cp36m", "linux_x86_64"),
+        ("cpu", "cp36", "cp36m", "linux_x86_64"),
+        (None, "py3", "none", "any"),
+    ]
+
+
+def test_DatabaseIndex_refresh(subtests, db_file):
+    old = index.parse_index(HTML, URL)
+    new = index.Index(old.entries("torch"), URL)
+    database.write_database_index(db_file, old, etag='"old"')
+
+    with database.DatabaseIndex(db_file, URL) as before:
+        database.write_database_index(db_file, new, etag='"new"')
+
+        with subtests.test("no open transaction"):
+            assert not before._connection.in_transaction
+
+        with subtests.test("refresh visible"):
+            assert before.etag == '"old"'
+            assert before.projects == ["torch"]
+            assert len(before) == len(new)
+
+        with database.DatabaseIndex(db_file, URL) as after:
+            with subtests.test("refreshed"):
+                assert after.etag == '"new"'
+                assert after.digest == new.digest
+                assert after.projects == ["torch"]
+                assert len(after) == len(new)
+
+    with subtests.test("unchanged"):
+        database.write_database_index(db_file, new, etag='"newer"', updated=0.0)
+        with database.DatabaseIndex(db_file, URL) as db_idx:
+            assert db_idx.etag == '"newer"'
+            assert db_idx.age > 0
+            assert list(db_idx) == list(new)
+
+
+def test_DatabaseIndex_unknown_url(db_file):
+    database.write_database_index(db_file, index.parse_index(HTML, URL))
+
+    with pytest.raises(RuntimeError):
+        database.DatabaseIndex(db_file, "https://example.com/torch_stable.html")
+
+
+def test_get_index_db(mocker):
+    mocker.patch.dict("os.environ", {"PWI_INDEX_DB": "/foo/index.db"})
+    assert database.get_index_db() == "/foo/index.db"
@@ -0,0 +1,33 @@
+import os
+from os import path
+
+from pytorch_wheel_installer import env
+
+from .utils import get_tmp_dir
+
+
+def make_dist_info(site_packages, name, version):
+    dist_info = path.join(site_packages, f"{name}-{version}.dist-info")
+    os.makedirs(dist_info)
+    with open(path.join(dist_info, "METADATA"), "w") as fh:
+        fh.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+
+
+def test_find_site_packages():
+    with get_tmp_dir() as env_dir:
+        site_packages = path.join(env_dir, "lib", "python3.6", "site-packages")
+        os.makedirs(site_packages)
+
+        assert env.find_site_packages(env_dir) == [site_packages]
+
+
+def test_get_installed_distributions():
+    with get_tmp_dir() as site_packages:
+        make_dist_info(site_packages, "torch", "1.5.1+cpu")
+        make_dist_info(site_packages, "Foo_Bar", "0.1")
+        os.makedirs(path.join(site_packages, "broken.dist-info"))
+
+        assert env.get_installed_distributions([site_packages]) == {
+            "torch": "1.5.1+cpu",
+            "foo-bar": "0.1",
+        }
@@ -0,0 +1,117 @@
+import json
+from os import path
+
+import pytest
+from pip._internal.models.target_python import TargetPython
+
+from pytorch_wheel_installer import computation_backend as cb
+from pytorch_wheel_installer import export, index
+
+from .utils import get_tmp_dir
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+FILENAMES = (
+    "cpu/torch-1.5.1%2Bcpu-cp37-cp37m-linux_x86_64.whl",
+    "cpu/torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.5.1%2Bcpu-cp38-cp38-win_amd64.whl",
+    "cu102/torch-1.5.1-cp38-cp38-linux_x86_64.whl",
+    "cu92/torch-1.5.1%2Bcu92-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.5.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torchvision-0.6.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "torchtext-0.6.0-py3-none-any.whl",
+)
+
+
+@pytest.fixture
+def idx():
+    html = "\n".join(
+        f'<a href="{filename}">{path.basename(filename)}</a><br>'
+        for filename in FILENAMES
+    )
+    return index.parse_index(html, URL)
+
+
+def select_filenames(idx, distributions, computation_backends, target_pythons):
+    links = export.select_links(
+        idx, distributions, computation_backends, target_pythons
+    )
+    return [link.url[len(path.dirname(URL)) + 1 :] for link in links]
+
+
+def test_select_links(subtests, idx):
+    linux = TargetPython(py_version_info=(3, 8), platform="linux_x86_64")
+
+    with subtests.test("backend"):
+        assert select_filenames(idx, ["torch"], [cb.CPUBackend()], [linux]) == [
+            "cpu/torch-1.5.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+            "cpu/torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        ]
+
+    with subtests.test("backends"):
+        assert select_filenames(
+            idx,
+            ["torch==1.5.1"],
+            [cb.CUDABackend(10, 2), cb.CUDABackend(9, 2)],
+            [linux],
+        ) == [
+            "cu92/torch-1.5.1%2Bcu92-cp38-cp38-linux_x86_64.whl",
+            "cu102/torch-1.5.1-cp38-cp38-linux_x86_64.whl",
+        ]
+
+    with subtests.test("target_pythons"):
+        target_pythons = [
+            TargetPython(py_version_info=(3, 7), platform="linux_x86_64"),
+            TargetPython(py_version_info=(3, 8), platform="win_amd64"),
+        ]
+        assert select_filenames(
+            idx, ["torch==1.5.1"], [cb.CPUBackend()], target_pythons
+        ) == [
+            "cpu/torch-1.5.1%2Bcpu-cp37-cp37m-linux_x86_64.whl",
+            "cpu/torch-1.5.1%2Bcpu-cp38-cp38-win_amd64.whl",
+        ]
+
+    with subtests.test("projects"):
+        assert select_filenames(
+            idx, ["torch==1.5.1", "torchvision"], [cb.CPUBackend()], [linux]
+        ) == [
+            "cpu/torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+            "cpu/torchvision-0.6.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        ]
+
+
+def test_export_links(mocker, idx):
+    mocker.patch(
+        "pytorch_wheel_installer.export.Resolver.index",
+        new_callable=mocker.PropertyMock,
+        return_value=idx,
+    )
+    target_pythons = [TargetPython(py_version_info=(3, 8), platform="linux_x86_64")]
+
+    with get_tmp_dir() as output_dir:
+        links = export.export_links(
+            output_dir,
+            ["torch==1.5.1", "torchvision"],
+            [cb.CPUBackend()],
+            target_pythons=target_pythons,
+        )
+        assert len(links) == 2
+
+        with open(path.join(output_dir, "index.html")) as fh:
+            page = index.parse_index(fh.read(), URL)
+        assert [entry.url for entry in page] == [link.url for link in links]
+
+        with open(path.join(output_dir, "simple", "index.json")) as fh:
+            root = json.load(fh)
+        assert root["meta"]["api-version"] == "1.0"
+        assert [project["name"] for project in root["projects"]] == [
+            "torch",
+            "torchvision",
+        ]
+
+        with open(path.join(output_dir, "simple", "torch", "index.json")) as fh:
+            project = json.load(fh)
+        assert project["name"] == "torch"
+        assert [file["filename"] for file in project["files"]] == [
+            "torch-1.5.1+cpu-cp38-cp38-linux_x86_64.whl"
+        ]
+        assert project["files"][0]["url"] == links[0].url
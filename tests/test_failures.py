@@ -0,0 +1,124 @@
+import pytest
+from pip._internal.req.constructors import install_req_from_line
+
+from pytorch_wheel_installer import failures, index
+
+from .utils import get_tmp_dir
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+
+
+@pytest.fixture
+def idx():
+    return index.Index(
+        [
+            index.make_entry(f"https://download.pytorch.org/whl/{filename}")
+            for filename in (
+                "cpu/torch-1.4.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                "cpu/torch-1.5.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                "cpu/torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                "cu102/torch-1.5.1-cp38-cp38-linux_x86_64.whl",
+                "cu92/torch-1.5.1%2Bcu92-cp38-cp38-linux_x86_64.whl",
+                "cu101/torch-1.4.0-cp38-cp38-linux_x86_64.whl",
+            )
+        ],
+        URL,
+    )
+
+
+def test_get_failure_key(subtests):
+    key = failures.get_failure_key("digest", ["torch"], "cpu", ["cp38-cp38-linux"])
+
+    with subtests.test("deterministic"):
+        assert key == failures.get_failure_key(
+            "digest", ["torch"], "cpu", ["cp38-cp38-linux"]
+        )
+
+    for args in (
+        ("other", ["torch"], "cpu", ["cp38-cp38-linux"]),
+        ("digest", ["torchvision"], "cpu", ["cp38-cp38-linux"]),
+        ("digest", ["torch"], "cu102", ["cp38-cp38-linux"]),
+        ("digest", ["torch"], "cpu", ["cp37-cp37m-linux"]),
+    ):
+        with subtests.test(args=args):
+            assert failures.get_failure_key(*args) != key
+
+    with subtests.test("consistent"):
+        assert (
+            failures.get_failure_key(
+                "digest", ["torch"], "cpu", ["cp38-cp38-linux"], consistent=True
+            )
+            != key
+        )
+
+
+def test_load_store_failure(subtests):
+    key = failures.get_failure_key("digest", ["torch"], "cpu", [])
+    with get_tmp_dir() as cache_dir:
+        with subtests.test("missing"):
+            assert failures.load_failure(key, cache_dir=cache_dir) is None
+
+        failures.store_failure(key, "message", cache_dir=cache_dir)
+        with subtests.test("roundtrip"):
+            assert failures.load_failure(key, cache_dir=cache_dir) == "message"
+
+        with subtests.test("corrupt"):
+            with open(failures.get_failure_path(cache_dir, key), "w") as fh:
+                fh.write("{")
+            assert failures.load_failure(key, cache_dir=cache_dir) is None
+
+
+def test_explain_not_found(subtests, idx):
+    with subtests.test("project"):
+        message = failures.explain_not_found(
+            idx, install_req_from_line("torchaudio"), "cpu"
+        )
+        assert "contains no distributions of torchaudio" in message
+
+    with subtests.test("backend"):
+        message = failures.explain_not_found(
+            idx, install_req_from_line("torch==1.5.1"), "cu101"
+        )
+        assert "Versions available for cu101: 1.4.0." in message
+        assert "available for torch==1.5.1: cpu, cu92, cu102." in message
+
+    with subtests.test("unknown backend"):
+        message = failures.explain_not_found(
+            idx, install_req_from_line("torch"), "cu110"
+        )
+        assert "No versions are available for cu110." in message
+
+    with subtests.test("tags"):
+        message = failures.explain_not_found(
+            idx, install_req_from_line("torch==1.5.1"), "cpu", tag="cp36-cp36m-win32"
+        )
+        assert "not compatible" in message
+        assert "cp36-cp36m-win32" in message
+
+
+def test_select_nearby_versions(subtests):
+    versions = [failures.parse_version(f"1.{minor}.0") for minor in range(10)]
+
+    with subtests.test("latest"):
+        assert (
+            failures.select_nearby_versions(
+                versions, install_req_from_line("torch").specifier
+            )
+            == versions[-failures.NUM_NEARBY_VERSIONS :]
+        )
+
+    with subtests.test("pinned"):
+        assert (
+            failures.select_nearby_versions(
+                versions, install_req_from_line("torch==1.4.5").specifier
+            )
+            == versions[3:8]
+        )
+
+    with subtests.test("pinned start"):
+        assert (
+            failures.select_nearby_versions(
+                versions, install_req_from_line("torch==0.4.0").specifier
+            )
+            == versions[:5]
+        )
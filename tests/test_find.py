@@ -0,0 +1,411 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os import path
+
+import pytest
+from pip._internal.models.target_python import TargetPython
+
+from pytorch_wheel_installer import computation_backend as cb
+from pytorch_wheel_installer import database, find, index
+
+from .utils import LocalServer, get_tmp_dir, make_wheel
+
+
+def read(file):
+    with open(file, "rb") as fh:
+        return fh.read()
+
+
+class FakeLink:
+    def __init__(self, url, comes_from=None):
+        self.url = url
+        self.comes_from = comes_from
+
+
+@pytest.fixture
+def resolver(mocker):
+    resolver = find.Resolver(computation_backend=cb.CPUBackend())
+    finder = mocker.Mock()
+    finder.find_requirement.side_effect = lambda req, upgrade: FakeLink(
+        f"https://download.pytorch.org/whl/{req.name}.whl"
+    )
+    mocker.patch.object(resolver, "get_finder", return_value=finder)
+    mocker.patch.object(
+        resolver,
+        "get_index",
+        return_value=index.Index((), "https://download.pytorch.org/whl/torch.html"),
+    )
+    return resolver
+
+
+def test_Resolver_resolve_many(resolver):
+    results = resolver.resolve_many(
+        (("torch", "torchvision"), ("Torch",), ("torch==1.5.1",))
+    )
+
+    assert [list(result.keys()) for result in results] == [
+        ["torch", "torchvision"],
+        ["torch"],
+        ["torch==1.5.1"],
+    ]
+    assert results[0]["torch"] == results[1]["torch"]
+
+
+def test_Resolver_resolve_many_deduplicates(resolver):
+    resolver.resolve_many((("torch", "torchvision"), ("torch",)))
+    resolver.resolve(("torchvision",))
+
+    assert resolver.finder.find_requirement.call_count == 2
+
+
+def test_Resolver_memo_expires(resolver):
+    resolver.max_age = 0.0
+
+    resolver.resolve(("torch",))
+    time.sleep(0.01)
+    resolver.resolve(("torch",))
+
+    assert resolver.finder.find_requirement.call_count == 2
+
+
+def make_page(*filenames):
+    return "\n".join(f'<a href="{filename}">{filename}</a>' for filename in filenames)
+
+
+def test_Resolver_sources(subtests):
+    with LocalServer(
+        {"/whl/stable.html": make_page("torch-1.5.1+cpu-py3-none-any.whl")}
+    ) as stable, LocalServer(
+        {
+            "/whl/mirror.html": make_page(
+                "torch-1.6.0+cpu-py3-none-any.whl",
+                "torchvision-0.7.0+cpu-py3-none-any.whl",
+            )
+        }
+    ) as mirror:
+        resolver = find.Resolver(
+            computation_backend=cb.CPUBackend(),
+            cache=False,
+            sources=(f"{stable.url}/whl/stable.html", f"{mirror.url}/whl/mirror.html"),
+        )
+        links = resolver.resolve(("torch", "torchvision"))
+
+        with subtests.test("priority"):
+            assert (
+                links["torch"] == f"{stable.url}/whl/torch-1.5.1+cpu-py3-none-any.whl"
+            )
+
+        with subtests.test("fallback"):
+            assert links["torchvision"].startswith(mirror.url)
+
+        with subtests.test("attribution"):
+            assert resolver.origins[links["torch"]] == f"{stable.url}/whl/stable.html"
+            assert (
+                resolver.origins[links["torchvision"]]
+                == f"{mirror.url}/whl/mirror.html"
+            )
+
+
+def test_Resolver_sources_short_circuit():
+    with LocalServer(
+        {"/stable.html": make_page("torch-1.5.1+cpu-py3-none-any.whl")}
+    ) as stable, LocalServer(delay=10.0) as slow:
+        resolver = find.Resolver(
+            computation_backend=cb.CPUBackend(),
+            cache=False,
+            sources=(
+                index.IndexSource(f"{slow.url}/slow.html", priority=1),
+                index.IndexSource(f"{stable.url}/stable.html", priority=0),
+            ),
+        )
+
+        start = time.perf_counter()
+        resolver.resolve(("torch",))
+        assert time.perf_counter() - start < 5.0
+
+
+@pytest.mark.parametrize("speculative", (True, False))
+def test_Resolver_speculative(mocker, speculative):
+    detect = mocker.patch(
+        "pytorch_wheel_installer.find.detect_computation_backend",
+        return_value=cb.CPUBackend(),
+    )
+    run_in_thread = mocker.spy(find, "run_in_thread")
+
+    with LocalServer(
+        {"/stable.html": make_page("torch-1.5.1+cpu-py3-none-any.whl")}
+    ) as server:
+        resolver = find.Resolver(
+            cache=False, sources=(f"{server.url}/stable.html",), speculative=speculative
+        )
+        links = resolver.resolve(("torch",))
+
+    assert links["torch"].endswith("torch-1.5.1+cpu-py3-none-any.whl")
+    detect.assert_called_once_with(timeout=None)
+    assert (
+        mocker.call(detect, timeout=None) in run_in_thread.call_args_list
+    ) is speculative
+
+
+def test_Resolver_close(mocker):
+    close = mocker.spy(database.DatabaseIndex, "close")
+
+    with get_tmp_dir() as tmp_dir, LocalServer(
+        {"/stable.html": make_page("torch-1.5.1+cpu-py3-none-any.whl")}
+    ) as server:
+        resolver = find.Resolver(
+            computation_backend=cb.CPUBackend(),
+            cache_dir=tmp_dir,
+            sources=(f"{server.url}/stable.html",),
+            index_db=path.join(tmp_dir, "index.db"),
+        )
+        resolver.resolve(("torch",))
+        resolver.close()
+
+    close.assert_called_once()
+
+
+def test_Resolver_consistent(subtests):
+    with get_tmp_dir() as tmp_dir:
+        wheels = {
+            f"/{path.basename(wheel)}": read(wheel)
+            for wheel in (
+                make_wheel(tmp_dir, "torch", "1.5.1+cpu"),
+                make_wheel(tmp_dir, "torch", "1.6.0+cpu"),
+                make_wheel(
+                    tmp_dir,
+                    "torchvision",
+                    "0.6.1+cpu",
+                    requires_dist=(
+                        'torch (==1.5.1); python_version >= "3.6"',
+                        'scipy; extra == "scipy"',
+                    ),
+                ),
+                make_wheel(
+                    tmp_dir,
+                    "torchvision",
+                    "0.7.0+cpu",
+                    requires_dist=("torch (==1.6.0)", 'scipy; extra == "scipy"'),
+                ),
+            )
+        }
+        cache_dir = path.join(tmp_dir, "cache")
+
+        with LocalServer(
+            {"/stable.html": make_page(*[name[1:] for name in wheels]), **wheels}
+        ) as server:
+
+            def resolve(
+                consistent,
+                distributions=("torch==1.5.1", "torchvision"),
+                target_python=None,
+            ):
+                resolver = find.Resolver(
+                    computation_backend=cb.CPUBackend(),
+                    cache_dir=cache_dir,
+                    sources=(f"{server.url}/stable.html",),
+                    consistent=consistent,
+                    target_python=target_python,
+                )
+                return resolver.resolve(distributions)
+
+            with subtests.test("independent"):
+                links = resolve(False)
+                assert links["torchvision"].endswith(
+                    "torchvision-0.7.0+cpu-py3-none-any.whl"
+                )
+
+            with subtests.test("consistent"):
+                links = resolve(True)
+                assert links["torch==1.5.1"].endswith(
+                    "torch-1.5.1+cpu-py3-none-any.whl"
+                )
+                assert links["torchvision"].endswith(
+                    "torchvision-0.6.1+cpu-py3-none-any.whl"
+                )
+
+            with subtests.test("target python"):
+                distributions = ("torch==1.6.0", "torchvision<0.7")
+                links = resolve(
+                    True,
+                    distributions=distributions,
+                    target_python=TargetPython(py_version_info=(3, 5)),
+                )
+                assert links["torchvision<0.7"].endswith(
+                    "torchvision-0.6.1+cpu-py3-none-any.whl"
+                )
+
+                with pytest.raises(find.DistributionNotFound):
+                    resolve(
+                        True,
+                        distributions=distributions,
+                        target_python=TargetPython(py_version_info=(3, 8)),
+                    )
+
+            with subtests.test("only ranges"):
+                assert all(
+                    byte_range is not None
+                    for request, byte_range in zip(server.requests, server.ranges)
+                    if request.endswith(".whl")
+                )
+
+
+def test_Resolver_threads(subtests):
+    page = make_page(
+        "torch-1.5.1+cpu-py3-none-any.whl",
+        "torch-1.6.0+cpu-py3-none-any.whl",
+        "torchvision-0.7.0+cpu-py3-none-any.whl",
+    )
+    with LocalServer({"/stable.html": page}, delay=0.05) as server:
+        resolver = find.Resolver(
+            computation_backend=cb.CPUBackend(),
+            cache=False,
+            sources=(f"{server.url}/stable.html",),
+        )
+        distributions = [("torch", "torchvision"), ("torch==1.5.1",)] * 16
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(resolver.resolve, distributions))
+
+        with subtests.test("results"):
+            assert all(result == results[idx % 2] for idx, result in enumerate(results))
+            assert results[1]["torch==1.5.1"].endswith(
+                "torch-1.5.1+cpu-py3-none-any.whl"
+            )
+
+        with subtests.test("single fetch"):
+            assert server.requests == ["/stable.html"]
+
+
+def test_PytorchPackageFinder_evaluate_links_sharded(mocker):
+    mocker.patch("pytorch_wheel_installer.find.PARALLEL_EVALUATION_THRESHOLD", 0)
+    mocker.patch("pytorch_wheel_installer.find.EVALUATION_SHARD_SIZE", 7)
+    idx = index.parse_index(
+        make_page(
+            *[
+                f"{local}/torch-1.{version}.0-py3-none-any.whl"
+                for version in range(20)
+                for local in ("cpu", "cu102")
+            ],
+            "torch-1.0.0.tar.gz",
+            "torch-1.0.0-cp27-cp27mu-linux_x86_64.whl",
+        ),
+        "https://download.pytorch.org/whl/torch_stable.html",
+    )
+
+    def find_all_candidates(executor=None):
+        finder = find.make_pytorch_packager_finder(
+            computation_backend=cb.CPUBackend(), index=idx, executor=executor
+        )
+        return [
+            (candidate.version, candidate.link.url)
+            for candidate in finder.find_all_candidates("torch")
+        ]
+
+    with ProcessPoolExecutor(2) as executor:
+        assert find_all_candidates(executor) == find_all_candidates()
+
+
+def test_Resolver_timeout(subtests):
+    page = make_page("torch-1.5.1+cpu-py3-none-any.whl")
+    with get_tmp_dir() as cache_dir:
+        with LocalServer({"/stable.html": page}) as server:
+            url = f"{server.url}/stable.html"
+            find.Resolver(
+                computation_backend=cb.CPUBackend(), cache_dir=cache_dir, sources=(url,)
+            ).resolve(("torch",))
+
+            server.delay = 1.0
+
+            def resolve(**kwargs):
+                resolver = find.Resolver(
+                    computation_backend=cb.CPUBackend(),
+                    cache_dir=cache_dir,
+                    max_age=0,
+                    sources=(url,),
+                    timeout=0.2,
+                    **kwargs,
+                )
+                start = time.perf_counter()
+                try:
+                    return resolver.resolve(("torch",))
+                finally:
+                    assert time.perf_counter() - start < 0.8
+
+            with subtests.test("stale"):
+                with pytest.warns(UserWarning):
+                    links = resolve()
+                assert links["torch"].endswith("torch-1.5.1+cpu-py3-none-any.whl")
+
+            with subtests.test("no cache"):
+                with pytest.raises(TimeoutError):
+                    resolve(cache=False)
+
+
+def test_Resolver_failure_cache(subtests, mocker):
+    with get_tmp_dir() as cache_dir:
+        idx = index.Index(
+            (
+                index.IndexEntry(
+                    "torch",
+                    "1.5.1+cpu",
+                    "https://download.pytorch.org/whl/cpu/"
+                    "torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                ),
+            ),
+            "https://download.pytorch.org/whl/torch_stable.html",
+        )
+
+        def make_resolver():
+            resolver = find.Resolver(
+                computation_backend=cb.CUDABackend(10, 2), cache_dir=cache_dir
+            )
+            finder = mocker.Mock()
+            finder.find_requirement.side_effect = find.DistributionNotFound()
+            mocker.patch.object(resolver, "get_finder", return_value=finder)
+            mocker.patch.object(resolver, "get_index", return_value=idx)
+            return resolver, finder
+
+        resolver, finder = make_resolver()
+        with pytest.raises(find.DistributionNotFound) as info:
+            resolver.resolve(("torch==1.5.1",))
+        message = str(info.value)
+
+        with subtests.test("diagnostic"):
+            assert "cu102" in message
+            assert "cpu" in message
+
+        with subtests.test("memory"):
+            with pytest.raises(find.DistributionNotFound):
+                resolver.resolve(("torch==1.5.1",))
+            assert finder.find_requirement.call_count == 1
+
+        with subtests.test("disk"):
+            resolver, finder = make_resolver()
+            with pytest.raises(find.DistributionNotFound) as info:
+                resolver.resolve(("torch==1.5.1",))
+            assert str(info.value) == message
+            finder.find_requirement.assert_not_called()
+
+
+def test_get_requirements_constraints(subtests):
+    reqs = find.get_requirements(
+        ["torch>=1.4", "torchvision"],
+        constraints=["torch<1.6", "torch!=1.5.0", "torchaudio==0.5.0"],
+    )
+
+    assert [find.get_requirement_key(req) for req in reqs] == [
+        "torch!=1.5.0,<1.6,>=1.4",
+        "torchvision",
+    ]
+
+
+def test_get_requirement_key(subtests):
+    for line, key in (
+        ("Torch>=1.5", "torch<1.6,>=1.5"),
+        ("torch[foo,bar]==1.5.1", "torch[bar,foo]<1.6,==1.5.1"),
+        ('torch; python_version >= "3.6"', 'torch<1.6; python_version >= "3.6"'),
+        ("https://foo/torch-1.5.1.tar.gz", "https://foo/torch-1.5.1.tar.gz"),
+    ):
+        with subtests.test(line=line):
+            (req,) = find.get_requirements([line], constraints=["torch<1.6"])
+            assert find.get_requirement_key(req) == key
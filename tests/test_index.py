@@ -0,0 +1,106 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from pytorch_wheel_installer import index
+
+HTML = """
+<html>
+  <body>
+    <a href="cu102/torch-1.5.1-cp36-cp36m-linux_x86_64.whl">torch</a><br>
+    <a href="cpu/torch-1.5.1%2Bcpu-cp36-cp36m-linux_x86_64.whl">torch</a><br>
+    <a href="cpu/torchvision-0.6.1%2Bcpu-cp36-cp36m-linux_x86_64.whl">vision</a><br>
+    <a href="torch_stable.html">not a distribution</a><br>
+    <a>no href</a>
+  </body>
+</html>
+"""
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+
+
+def test_parse_index(subtests):
+    idx = index.parse_index(HTML, URL)
+
+    with subtests.test("projects"):
+        assert idx.projects == ["torch", "torchvision"]
+
+    with subtests.test("len"):
+        assert len(idx) == 3
+
+    with subtests.test("entries"):
+        entry = idx.entries("Torch")[1]
+        assert entry.project == "torch"
+        assert entry.version == "1.5.1+cpu"
+        assert entry.url == (
+            "https://download.pytorch.org/whl/cpu/"
+            "torch-1.5.1%2Bcpu-cp36-cp36m-linux_x86_64.whl"
+        )
+
+    with subtests.test("find_links"):
+        links = idx.find_links("torchvision")
+        assert [link.url for link in links] == [
+            entry.url for entry in idx.entries("torchvision")
+        ]
+
+    with subtests.test("unknown project"):
+        assert not idx.find_links("unknown")
+
+    with subtests.test("find_links computation_backend"):
+        links = idx.find_links("torch", computation_backend="cu102")
+        assert [link.url for link in links] == [
+            "https://download.pytorch.org/whl/cu102/"
+            "torch-1.5.1-cp36-cp36m-linux_x86_64.whl"
+        ]
+        assert not idx.find_links("torch", computation_backend="cu92")
+
+
+def test_get_computation_backend(subtests):
+    for version, url, expected in (
+        ("1.5.1+cpu", "https://download.pytorch.org/whl/cpu/torch.whl", "cpu"),
+        ("1.5.1+cu92", "https://download.pytorch.org/whl/torch.whl", "cu92"),
+        ("1.5.1", "https://download.pytorch.org/whl/cu102/torch.whl", "cu102"),
+        ("1.5.1", "https://download.pytorch.org/whl/torch.whl", None),
+    ):
+        with subtests.test(version=version, url=url):
+            entry = index.IndexEntry("torch", version, url)
+            assert index.get_computation_backend(entry) == expected
+
+
+def test_parse_index_sharded(mocker, subtests):
+    mocker.patch("pytorch_wheel_installer.index.PARALLEL_PARSE_THRESHOLD", 0)
+    html = '<html><head><base href="https://example.com/whl/"></head><body>' + "".join(
+        f'<A HREF="cpu/torch-1.{idx}.0%2Bcpu-py3-none-any.whl">torch</A><br>'
+        for idx in range(100)
+    )
+
+    with subtests.test("shards"):
+        base_url, shards = index.split_html(html, URL, shard_size=100)
+        assert base_url == "https://example.com/whl/"
+        assert len(shards) > 1
+        assert all(shard.startswith("<A ") for shard in shards)
+
+    with subtests.test("parse"):
+        with ProcessPoolExecutor(2) as executor:
+            idx = index.parse_index(html, URL, executor=executor)
+        assert list(idx) == list(index.parse_index(html, URL))
+
+    with subtests.test("base after anchor"):
+        assert index.split_html(html + '<base href="foo/">', URL) is None
+
+
+def test_Index_digest():
+    entries = list(index.parse_index(HTML, URL))
+
+    assert (
+        index.Index(entries, URL).digest == index.Index(reversed(entries), URL).digest
+    )
+    assert index.Index(entries, URL).digest != index.Index(entries[1:], URL).digest
+
+
+def test_split_filename(subtests):
+    for filename, expected in (
+        ("torch-1.5.1-cp36-cp36m-linux_x86_64.whl", ("torch", "1.5.1")),
+        ("Foo_Bar-0.1.tar.gz", ("foo-bar", "0.1")),
+        ("torch-1.5.1.whl", None),
+        ("torch_stable.html", None),
+    ):
+        with subtests.test(filename=filename):
+            assert index.split_filename(filename) == expected
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+from io import StringIO
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import install
+
+
+def test_split_install_cmd(subtests):
+    with subtests.test("str"):
+        assert install.split_install_cmd("pip install --user") == [
+            "pip",
+            "install",
+            "--user",
+        ]
+
+    with subtests.test("quoted str"):
+        assert install.split_install_cmd("'my pip' install") == ["my pip", "install"]
+
+    with subtests.test("sequence"):
+        assert install.split_install_cmd(("pip", "install")) == ["pip", "install"]
+
+
+@pytest.fixture
+def running_pip(mocker):
+    # Bare executables are found next to the running interpreter.
+    def which(executable):
+        if path.dirname(executable):
+            return executable
+        return path.join(path.dirname(sys.executable), executable)
+
+    mocker.patch("pytorch_wheel_installer.install.shutil.which", side_effect=which)
+
+
+def test_get_pip_args(subtests, running_pip):
+    for cmd in (
+        ["pip", "install", "-U"],
+        ["pip3", "install", "-U"],
+        ["pip3.8", "install", "-U"],
+        [path.join(path.dirname(sys.executable), "pip"), "install", "-U"],
+        [sys.executable, "-m", "pip", "install", "-U"],
+    ):
+        with subtests.test(cmd=cmd):
+            assert install.get_pip_args(cmd) == ["install", "-U"]
+
+    for cmd in (
+        ["/foo/bin/pip3", "install", "-U"],
+        ["/foo/bin/python", "-m", "pip", "install", "-U"],
+    ):
+        with subtests.test(cmd=cmd):
+            assert install.get_pip_args(cmd) is None
+
+    for cmd in (["conda", "install"], ["pipenv", "install"], ["pip-sync"]):
+        with subtests.test(cmd=cmd):
+            with pytest.raises(RuntimeError):
+                install.get_pip_args(cmd)
+
+
+def test_install_streams_output():
+    stream = StringIO()
+    cmd = (sys.executable, "-c", "import sys; print(*sys.argv[1:], sep='\\n')")
+
+    install.install(["foo.whl", "bar.whl"], install_cmd=cmd, stream=stream)
+
+    assert stream.getvalue().splitlines() == ["foo.whl", "bar.whl"]
+
+
+def test_install_failure():
+    cmd = (sys.executable, "-c", "import sys; sys.exit(3)")
+
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        install.install(["foo.whl"], install_cmd=cmd, stream=StringIO())
+
+    assert info.value.returncode == 3
+
+
+def test_install_in_process(mocker, running_pip):
+    pip_main = mocker.patch("pip._internal.cli.main.main", return_value=0)
+
+    install.install(["foo.whl"], install_cmd="pip install --user", in_process=True)
+
+    pip_main.assert_called_once_with(["install", "--user", "foo.whl"])
+
+
+def test_install_in_process_failure(mocker, running_pip):
+    mocker.patch("pip._internal.cli.main.main", return_value=1)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        install.install(["foo.whl"], in_process=True)
+
+
+def test_install_in_process_other_interpreter(mocker, running_pip):
+    pip_main = mocker.patch("pip._internal.cli.main.main", return_value=0)
+    run_streamed = mocker.patch("pytorch_wheel_installer.install.run_streamed")
+
+    install.install(["foo.whl"], install_cmd="/foo/bin/pip3 install", in_process=True)
+
+    pip_main.assert_not_called()
+    run_streamed.assert_called_once_with(
+        ["/foo/bin/pip3", "install", "foo.whl"], stream=None
+    )
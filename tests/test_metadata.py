@@ -0,0 +1,125 @@
+import os
+import zipfile
+from os import path
+
+import pytest
+from pip._internal.network.session import PipSession
+from pip._internal.utils.urls import path_to_url
+
+from pytorch_wheel_installer import metadata, utils
+
+from .utils import LocalServer, get_tmp_dir, make_wheel
+
+
+@pytest.fixture
+def tmp_dir():
+    with get_tmp_dir() as tmp_dir:
+        yield tmp_dir
+
+
+def make_large_wheel(tmp_dir, **kwargs):
+    return make_wheel(
+        tmp_dir,
+        files={"foo/data.bin": os.urandom(1024 * 1024)},
+        requires_dist=("torch (==1.5.1)", "numpy"),
+        **kwargs,
+    )
+
+
+def read(file):
+    with open(file, "rb") as fh:
+        return fh.read()
+
+
+def test_fetch_wheel_metadata(subtests, tmp_dir):
+    wheel = read(make_large_wheel(tmp_dir))
+
+    with LocalServer({"/foo.whl": wheel}) as server:
+        content = metadata.fetch_wheel_metadata(PipSession(), f"{server.url}/foo.whl")
+
+    with subtests.test("metadata"):
+        assert "Requires-Dist: torch (==1.5.1)" in content
+
+    with subtests.test("ranges"):
+        assert server.ranges
+        assert all(byte_range is not None for byte_range in server.ranges)
+
+    with subtests.test("stored metadata"):
+        with zipfile.ZipFile(path.join(tmp_dir, "stored.whl"), "w") as zf:
+            zf.writestr("foo-1.0.dist-info/METADATA", "Name: foo\n")
+        with LocalServer({"/foo.whl": read(zf.filename)}) as server:
+            content = metadata.fetch_wheel_metadata(
+                PipSession(), f"{server.url}/foo.whl"
+            )
+        assert content == "Name: foo\n"
+
+
+def test_fetch_wheel_metadata_no_ranges(tmp_dir):
+    wheel = read(make_large_wheel(tmp_dir))
+
+    with LocalServer({"/foo.whl": wheel}, accept_ranges=False) as server:
+        with pytest.raises(RuntimeError):
+            metadata.fetch_wheel_metadata(PipSession(), f"{server.url}/foo.whl")
+
+
+def test_fetch_wheel_metadata_deadline(tmp_dir):
+    wheel = read(make_large_wheel(tmp_dir))
+
+    with LocalServer({"/foo.whl": wheel}, delay=1.0) as server:
+        with pytest.raises(TimeoutError):
+            metadata.fetch_wheel_metadata(
+                PipSession(), f"{server.url}/foo.whl", deadline=utils.Deadline(0.1)
+            )
+
+
+def test_fetch_wheel_metadata_local(tmp_dir):
+    url = path_to_url(make_large_wheel(tmp_dir))
+
+    content = metadata.fetch_wheel_metadata(PipSession(), url)
+
+    assert "Requires-Dist: torch (==1.5.1)" in content
+
+
+def test_fetch_wheel_metadata_zip64(tmp_dir):
+    file = path.join(tmp_dir, "foo-1.0-py3-none-any.whl")
+    with zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("foo/data.bin", os.urandom(1024))
+        with zf.open("foo-1.0.dist-info/METADATA", "w", force_zip64=True) as fh:
+            fh.write(b"Name: foo\nRequires-Dist: bar\n")
+
+    with LocalServer({"/foo.whl": read(file)}) as server:
+        content = metadata.fetch_wheel_metadata(PipSession(), f"{server.url}/foo.whl")
+
+    assert "Requires-Dist: bar" in content
+
+
+def test_get_requires_dist_cache(tmp_dir):
+    wheel = read(make_large_wheel(tmp_dir))
+    cache_dir = path.join(tmp_dir, "cache")
+
+    with LocalServer({"/foo.whl": wheel}) as server:
+        url = f"{server.url}/foo.whl"
+        for _ in range(2):
+            requires_dist = metadata.get_requires_dist(
+                PipSession(), url, cache_dir=cache_dir
+            )
+            assert requires_dist == ["torch (==1.5.1)", "numpy"]
+
+    assert len(set(server.requests)) == 1
+    num_requests = len(server.requests)
+    assert num_requests <= 3
+
+
+def test_get_requires_dist_no_cache(tmp_dir):
+    wheel = read(make_large_wheel(tmp_dir))
+    cache_dir = path.join(tmp_dir, "cache")
+
+    with LocalServer({"/foo.whl": wheel}) as server:
+        url = f"{server.url}/foo.whl"
+        for _ in range(2):
+            metadata.get_requires_dist(
+                PipSession(), url, cache=False, cache_dir=cache_dir
+            )
+
+    assert len(server.requests) > 2
+    assert not path.exists(cache_dir)
@@ -0,0 +1,103 @@
+import json
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import metrics
+
+from .utils import get_tmp_dir
+
+
+@pytest.fixture
+def registry(mocker):
+    registry = metrics.Metrics()
+    registry.enabled = True
+    mocker.patch.object(metrics, "METRICS", registry)
+    return registry
+
+
+def test_Metrics_disabled():
+    registry = metrics.Metrics()
+    registry.increment("foo_total")
+    registry.observe("foo_seconds", 1.0)
+
+    assert registry.format_textfile() == ""
+
+
+def test_Metrics_textfile(registry):
+    registry.increment("index_cache_total", result="hit")
+    registry.increment("index_cache_total", result="hit")
+    registry.increment("index_cache_total", result="miss")
+    registry.observe("resolution_seconds", 0.5)
+    registry.observe("resolution_seconds", 1.5)
+
+    assert registry.format_textfile().splitlines() == [
+        "# TYPE pwi_index_cache_total counter",
+        'pwi_index_cache_total{result="hit"} 2',
+        'pwi_index_cache_total{result="miss"} 1',
+        "# TYPE pwi_resolution_seconds summary",
+        "pwi_resolution_seconds_sum 2.000000",
+        "pwi_resolution_seconds_count 2",
+    ]
+
+
+def test_Metrics_textfile_escape(registry):
+    registry.increment("foo_total", label='a"b\\c\nd')
+
+    assert 'pwi_foo_total{label="a\\"b\\\\c\\nd"} 1' in registry.format_textfile()
+
+
+def test_Metrics_time(subtests, registry):
+    with subtests.test("success"):
+        with registry.time("foo_seconds") as labels:
+            labels["backend"] = "cpu"
+        assert (
+            'pwi_foo_seconds_count{backend="cpu",outcome="success"} 1'
+            in registry.format_textfile()
+        )
+
+    with subtests.test("error"):
+        with pytest.raises(RuntimeError):
+            with registry.time("bar_seconds"):
+                raise RuntimeError
+        assert 'pwi_bar_seconds_count{outcome="error"} 1' in registry.format_textfile()
+
+
+def test_Metrics_log(registry):
+    registry.increment("foo_total", 2, host="example.com")
+
+    with get_tmp_dir() as root:
+        file = path.join(root, "metrics.jsonl")
+        registry.write_log(file)
+        registry.write_log(file)
+
+        with open(file) as fh:
+            events = [json.loads(line) for line in fh]
+
+    assert len(events) == 1
+    event = events[0]
+    assert event["name"] == "pwi_foo_total"
+    assert event["type"] == "counter"
+    assert event["value"] == 2
+    assert event["labels"] == {"host": "example.com"}
+
+
+def test_collect_metrics(subtests, mocker):
+    registry = metrics.Metrics()
+    mocker.patch.object(metrics, "METRICS", registry)
+
+    with subtests.test("disabled"):
+        mocker.patch.dict("os.environ", {}, clear=True)
+        with metrics.collect_metrics() as collected:
+            assert not collected.enabled
+
+    with subtests.test("env"), get_tmp_dir() as root:
+        textfile = path.join(root, "pwi.prom")
+        mocker.patch.dict("os.environ", {"PWI_METRICS_TEXTFILE": textfile})
+        with metrics.collect_metrics() as collected:
+            assert collected.enabled
+            collected.increment("foo_total")
+
+        assert not registry.enabled
+        with open(textfile) as fh:
+            assert "pwi_foo_total 1" in fh.read()
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from pip._vendor.requests import ConnectionError
+
+from pytorch_wheel_installer import metrics, network, utils
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+def test_fetch_retry(subtests, mocker):
+    policy = network.FetchPolicy(retries=2, backoff=0.01)
+
+    with subtests.test("server error"):
+        session = mocker.Mock()
+        session.get.side_effect = [FakeResponse(503), FakeResponse(200)]
+        assert network.fetch(session, "http://foo", policy=policy).status_code == 200
+        assert session.get.call_count == 2
+
+    with subtests.test("connection error"):
+        session = mocker.Mock()
+        session.get.side_effect = [ConnectionError(), FakeResponse(200)]
+        assert network.fetch(session, "http://foo", policy=policy).status_code == 200
+
+    with subtests.test("exhausted"):
+        session = mocker.Mock()
+        session.get.return_value = FakeResponse(503)
+        assert network.fetch(session, "http://foo", policy=policy).status_code == 503
+        assert session.get.call_count == 3
+
+
+def test_fetch_metrics(mocker):
+    registry = metrics.Metrics()
+    registry.enabled = True
+    mocker.patch.object(network, "METRICS", registry)
+    session = mocker.Mock()
+    session.get.side_effect = [FakeResponse(503), FakeResponse(200, content=b"foo")]
+
+    network.fetch(
+        session, "http://foo/bar", policy=network.FetchPolicy(retries=1, backoff=0.01)
+    )
+
+    textfile = registry.format_textfile()
+    assert 'pwi_index_fetch_bytes_total{host="foo"} 3' in textfile
+    assert 'pwi_index_fetch_seconds_count{host="foo",status="200"} 1' in textfile
+    assert 'pwi_index_fetch_seconds_count{host="foo",status="503"} 1' in textfile
+
+
+def test_fetch_deadline(mocker):
+    session = mocker.Mock()
+    session.get.side_effect = lambda *args, **kwargs: time.sleep(1.0)
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        network.fetch(session, "http://foo", deadline=utils.Deadline(0.1))
+    assert time.monotonic() - start < 0.5
+
+
+def test_fetch_hedge(mocker):
+    delays = iter((1.0, 0.0))
+    responses = iter((FakeResponse(201), FakeResponse(200)))
+
+    def get(*args, **kwargs):
+        delay, response = next(delays), next(responses)
+        time.sleep(delay)
+        return response
+
+    session = mocker.Mock()
+    session.get.side_effect = get
+    policy = network.FetchPolicy(hedge=True, hedge_delay=0.1)
+
+    start = time.monotonic()
+    response = network.fetch(session, "http://hedge", policy=policy)
+
+    assert response.status_code == 200
+    assert time.monotonic() - start < 0.5
+
+
+def test_LatencyTracker_quantile():
+    tracker = network.LatencyTracker(min_samples=3)
+    tracker.record("foo", 1.0)
+    assert tracker.quantile("foo", 0.5) is None
+
+    for latency in (2.0, 3.0, 4.0):
+        tracker.record("foo", latency)
+    assert tracker.quantile("foo", 0.5) == 3.0
+    assert tracker.quantile("foo", 0.99) == 4.0
@@ -0,0 +1,78 @@
+from pip._internal.models.target_python import TargetPython
+
+from pytorch_wheel_installer import computation_backend as cb
+from pytorch_wheel_installer import prefetch
+
+
+def test_prefetch(subtests, mocker):
+    load_index = mocker.patch("pytorch_wheel_installer.prefetch.load_index")
+
+    def resolve(self, distributions):
+        local = self.computation_backend.local
+        return {
+            distribution: f"https://download.pytorch.org/whl/{local}/{distribution}.whl"
+            for distribution in distributions
+        }
+
+    mocker.patch.object(prefetch.Resolver, "resolve", resolve)
+    get_stored_wheel = mocker.patch("pytorch_wheel_installer.prefetch.get_stored_wheel")
+
+    steps = prefetch.prefetch(
+        ["torch", "torchvision"],
+        [cb.CPUBackend(), cb.CUDABackend(10, 2)],
+        target_pythons=[
+            TargetPython(py_version_info=(3, 7), platform="linux_x86_64"),
+            TargetPython(py_version_info=(3, 8), platform="linux_x86_64"),
+        ],
+        sources=["https://foo/bar.html", "https://foo/baz.html"],
+        store=True,
+        store_dir="store",
+    )
+
+    with subtests.test("index"):
+        assert [step.target for step in steps if step.kind == "index"] == [
+            "https://foo/bar.html",
+            "https://foo/baz.html",
+        ]
+        for call in load_index.call_args_list:
+            assert call[1]["refresh"]
+
+    with subtests.test("resolve"):
+        targets = [step.target for step in steps if step.kind == "resolve"]
+        assert len(targets) == 4
+        assert "torch, torchvision (cu102, cp38-cp38-linux_x86_64)" in targets
+
+    with subtests.test("store"):
+        # The wheels are identical for the Python versions and thus only stored
+        # once.
+        assert len([step for step in steps if step.kind == "store"]) == 4
+        assert get_stored_wheel.call_count == 4
+
+    with subtests.test("errors"):
+        assert all(step.error is None for step in steps)
+
+
+def test_prefetch_errors(mocker):
+    mocker.patch("pytorch_wheel_installer.prefetch.load_index")
+    mocker.patch.object(
+        prefetch.Resolver, "resolve", side_effect=RuntimeError("no wheel")
+    )
+
+    steps = prefetch.prefetch(
+        ["torch"], [cb.CPUBackend()], sources=["https://foo/bar.html"], store=True
+    )
+
+    assert [(step.kind, step.error) for step in steps] == [
+        ("index", None),
+        ("resolve", "no wheel"),
+    ]
+
+
+def test_prefetch_index_db_env(mocker):
+    load_index = mocker.patch("pytorch_wheel_installer.prefetch.load_index")
+    mocker.patch.object(prefetch.Resolver, "resolve", return_value={})
+    mocker.patch.dict("os.environ", {"PWI_INDEX_DB": "index.db"})
+
+    prefetch.prefetch(["torch"], [cb.CPUBackend()], sources=["https://foo/bar.html"])
+
+    assert load_index.call_args[1]["index_db"] == "index.db"
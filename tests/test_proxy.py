@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pip._internal.network.session import PipSession
+
+from pytorch_wheel_installer import computation_backend as cb
+from pytorch_wheel_installer import find, proxy
+
+from .utils import LocalServer, get_tmp_dir
+
+WHEEL = "torch-1.5.1+cpu-py3-none-any.whl"
+
+
+@pytest.fixture
+def origin():
+    content = os.urandom(512 * 1024)
+    with LocalServer(delay=0.1) as server:
+        server.routes.update(
+            {
+                "/whl/stable.html": (
+                    f'<a href="cpu/{WHEEL}">relative</a>\n'
+                    f'<a href="{server.url}/whl/cu102/{WHEEL}">absolute</a>\n'
+                ),
+                f"/whl/cpu/{WHEEL}": content,
+            }
+        )
+        server.content = content
+        yield server
+
+
+@pytest.fixture
+def proxy_server(origin):
+    with get_tmp_dir() as cache_dir, proxy.ProxyServer(
+        upstream=f"{origin.url}/whl/stable.html", cache_dir=cache_dir
+    ) as server:
+        yield server
+
+
+def get(url, headers=None):
+    return PipSession().get(url, headers=headers or {})
+
+
+def test_ProxyServer_page(subtests, origin, proxy_server):
+    responses = [get(proxy_server.index_url) for _ in range(2)]
+
+    with subtests.test("rewritten"):
+        assert f'href="/whl/cu102/{WHEEL}"' in responses[0].text
+        assert origin.url not in responses[0].text
+
+    with subtests.test("cached"):
+        assert responses[0].text == responses[1].text
+        assert origin.requests.count("/whl/stable.html") == 1
+
+
+def test_ProxyServer_wheel_coalesced(subtests, origin, proxy_server):
+    url = f"{proxy_server.url}/whl/cpu/{WHEEL}"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: get(url), range(8)))
+
+    with subtests.test("content"):
+        assert all(response.content == origin.content for response in responses)
+
+    with subtests.test("single download"):
+        assert origin.requests.count(f"/whl/cpu/{WHEEL}") == 1
+
+    with subtests.test("cached"):
+        assert get(url).content == origin.content
+        assert origin.requests.count(f"/whl/cpu/{WHEEL}") == 1
+
+
+def test_ProxyServer_wheel_range(subtests, origin, proxy_server):
+    url = f"{proxy_server.url}/whl/cpu/{WHEEL}"
+    for cached in (False, True):
+        for byte_range, expected in (
+            ("bytes=10-19", origin.content[10:20]),
+            ("bytes=-16", origin.content[-16:]),
+        ):
+            with subtests.test(cached=cached, byte_range=byte_range):
+                response = get(url, headers={"Range": byte_range})
+                assert response.status_code == 206
+                assert response.content == expected
+
+
+def test_ProxyServer_not_found(proxy_server):
+    assert (
+        get(f"{proxy_server.url}/whl/cpu/missing-1.0-py3-none-any.whl").status_code
+        == 404
+    )
+
+
+def test_ProxyServer_resolve(origin, proxy_server):
+    resolver = find.Resolver(
+        computation_backend=cb.CPUBackend(),
+        cache=False,
+        sources=(proxy_server.index_url,),
+    )
+
+    links = resolver.resolve(("torch",))
+
+    assert links["torch"] == f"{proxy_server.url}/whl/cpu/{WHEEL}"
@@ -0,0 +1,106 @@
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import requirements
+
+from .utils import get_tmp_dir
+
+
+def write(file, *lines):
+    with open(file, "w") as fh:
+        fh.write("".join(f"{line}\n" for line in lines))
+    return file
+
+
+def read(file):
+    with open(file) as fh:
+        return fh.read().splitlines()
+
+
+def test_split_requirements(subtests):
+    with get_tmp_dir() as root:
+        write(path.join(root, "nested.txt"), "torchvision", "numpy>=1.18")
+        requirements_file = write(
+            path.join(root, "requirements.txt"),
+            "# comment",
+            "torch==1.5.1",
+            "requests \\",
+            "    --hash=sha256:abc",
+            "-e ./foo",
+            "-r nested.txt",
+            "torchvision",
+            "torch @ https://example.com/torch.whl",
+        )
+        constraints_file = write(
+            path.join(root, "constraints.txt"), "torchvision<0.7", "numpy<2"
+        )
+
+        with requirements.split_requirements(
+            [requirements_file], [constraints_file]
+        ) as split:
+            with subtests.test("distributions"):
+                assert split.distributions == ["torch==1.5.1", "torchvision"]
+
+            with subtests.test("constraints"):
+                assert split.constraints == ["torchvision<0.7"]
+
+            option, filtered_file = split.install_args[:2]
+            with subtests.test("install_args"):
+                assert option == "-r"
+                assert path.dirname(filtered_file) == root
+                assert split.install_args[2] == "-c"
+
+            with subtests.test("passthrough"):
+                lines = read(filtered_file)
+                assert lines[:3] == [
+                    "# comment",
+                    "requests     --hash=sha256:abc",
+                    "-e ./foo",
+                ]
+                assert lines[-1] == "torch @ https://example.com/torch.whl"
+                assert read(lines[3].split()[1]) == ["numpy>=1.18"]
+
+            with subtests.test("files"):
+                assert split.files == [
+                    requirements_file,
+                    path.join(root, "nested.txt"),
+                    constraints_file,
+                ]
+
+            tmp_files = [file for file in split.install_args if file.endswith(".pwi")]
+
+        with subtests.test("cleanup"):
+            assert tmp_files
+            assert not any(path.exists(file) for file in tmp_files)
+
+
+def test_split_requirements_unchanged(subtests):
+    with get_tmp_dir() as root:
+        file = write(path.join(root, "requirements.txt"), "requests")
+        with requirements.split_requirements([file]) as split:
+            assert split.install_args == ["-r", file]
+
+        file = write(path.join(root, "requirements.txt"), "torch", "# comment")
+        with requirements.split_requirements([file]) as split:
+            assert split.distributions == ["torch"]
+            assert not split.install_args
+
+
+def test_split_requirements_recursive():
+    with get_tmp_dir() as root:
+        file = write(
+            path.join(root, "requirements.txt"), "-r requirements.txt", "torch"
+        )
+        with requirements.split_requirements([file]) as split:
+            assert split.distributions == ["torch"]
+
+
+def test_split_requirements_hashes():
+    with get_tmp_dir() as root:
+        file = write(
+            path.join(root, "requirements.txt"), "torch==1.5.1 --hash=sha256:abc"
+        )
+        with pytest.raises(RuntimeError):
+            with requirements.split_requirements([file]):
+                pass
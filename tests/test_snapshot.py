@@ -0,0 +1,92 @@
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import index, snapshot
+
+from .utils import get_tmp_dir
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+ENTRIES = [
+    index.IndexEntry(project, version, f"https://download.pytorch.org/whl/{idx}.whl")
+    for idx, (project, version) in enumerate(
+        (
+            ("torchvision", "0.6.1"),
+            ("torch", "1.5.1"),
+            ("torchaudio", "0.5.1"),
+            ("torch", "1.5.0"),
+            ("torchvision", "0.6.0"),
+            ("torchtext", "0.6.0"),
+        )
+    )
+]
+
+
+@pytest.fixture
+def snapshot_file():
+    with get_tmp_dir() as tmp_dir:
+        file = path.join(tmp_dir, "index.snapshot")
+        snapshot.write_snapshot(
+            file, index.Index(ENTRIES, URL), etag='"abc"', last_modified="yesterday"
+        )
+        yield file
+
+
+def test_Snapshot_roundtrip(subtests, snapshot_file):
+    idx = index.Index(ENTRIES, URL)
+    with snapshot.Snapshot(snapshot_file) as snap:
+        with subtests.test("metadata"):
+            assert snap.url == URL
+            assert snap.etag == '"abc"'
+            assert snap.last_modified == "yesterday"
+            assert snap.digest == idx.digest
+            assert snap.age >= 0
+
+        with subtests.test("len"):
+            assert len(snap) == len(ENTRIES)
+
+        with subtests.test("projects"):
+            assert snap.projects == sorted(idx.projects)
+
+        for project in ("torch", "torchvision", "torchaudio", "torchtext"):
+            with subtests.test(project=project):
+                assert snap.entries(project) == idx.entries(project)
+
+        with subtests.test("unknown project"):
+            assert not snap.entries("torchfoo")
+            assert not snap.entries("a")
+            assert not snap.entries("z")
+
+        with subtests.test("find_links"):
+            assert [link.url for link in snap.find_links("Torch")] == [
+                entry.url for entry in idx.entries("torch")
+            ]
+
+
+def test_Snapshot_empty():
+    with get_tmp_dir() as tmp_dir:
+        file = path.join(tmp_dir, "index.snapshot")
+        snapshot.write_snapshot(file, index.Index((), URL))
+
+        with snapshot.Snapshot(file) as snap:
+            assert len(snap) == 0
+            assert not snap.entries("torch")
+
+
+def test_Snapshot_corrupted(subtests, snapshot_file):
+    with open(snapshot_file, "rb") as fh:
+        data = bytearray(fh.read())
+
+    for name, corrupt in (
+        ("checksum", lambda data: data[:-1] + bytes([data[-1] ^ 0xFF])),
+        ("magic", lambda data: b"X" + data[1:]),
+        ("version", lambda data: data[:8] + b"\xff\xff" + data[10:]),
+        ("truncated", lambda data: data[:-1]),
+        ("header", lambda data: data[:10]),
+    ):
+        with subtests.test(name):
+            with open(snapshot_file, "wb") as fh:
+                fh.write(corrupt(data))
+
+            with pytest.raises(RuntimeError):
+                snapshot.Snapshot(snapshot_file)
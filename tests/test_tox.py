@@ -0,0 +1,315 @@
+import json
+import os
+import sysconfig
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import computation_backend as cb
+from pytorch_wheel_installer import requirements, unpack
+
+from .utils import create_venv, get_tmp_dir, make_wheel
+
+pytest.importorskip("tox")
+
+from pytorch_wheel_installer import _tox  # noqa: E402 isort:skip
+
+LINK = (
+    "https://download.pytorch.org/whl/cpu/"
+    "torch-1.5.1%2Bcpu-cp38-cp38-linux_x86_64.whl"
+)
+
+
+class FakePath(str):
+    def join(self, *parts):
+        return FakePath(path.join(self, *parts))
+
+
+class FakeConfig:
+    def __init__(self, toxinidir, pytorch_distributions, **options):
+        self.config = type("Config", (), {"toxinidir": toxinidir})()
+        self.envpython = path.join(toxinidir, ".tox", "py", "bin", "python")
+        self.pytorch_distributions = pytorch_distributions
+        self.pytorch_computation_backend = cb.CPUBackend()
+        self.pytorch_install_mode = None
+        self.pytorch_metrics_textfile = None
+        self.pytorch_metrics_log = None
+        for name, value in options.items():
+            setattr(self, name, value)
+
+
+class FakeVenv:
+    def __init__(self, envconfig, mocker):
+        self.envconfig = envconfig
+        self.path = FakePath(path.join(envconfig.config.toxinidir, ".tox", "py"))
+        os.makedirs(self.path, exist_ok=True)
+        self._install = mocker.Mock()
+
+
+def write(file, *lines):
+    with open(file, "w") as fh:
+        fh.write("".join(f"{line}\n" for line in lines))
+    return file
+
+
+@pytest.fixture
+def tmp_dir():
+    with get_tmp_dir() as tmp_dir:
+        yield tmp_dir
+
+
+@pytest.fixture
+def installed(mocker):
+    installed = {"torch": "1.5.1+cpu"}
+    mocker.patch.object(_tox, "find_site_packages", return_value=[])
+    mocker.patch.object(_tox, "get_installed_distributions", return_value=installed)
+    return installed
+
+
+@pytest.fixture
+def find_links(mocker):
+    return mocker.patch.object(_tox, "find_links", return_value=[LINK])
+
+
+@pytest.fixture
+def make_venv(mocker, tmp_dir):
+    def make_venv(pytorch_distributions=("torch",), **options):
+        config = FakeConfig(tmp_dir, list(pytorch_distributions), **options)
+        return FakeVenv(config, mocker)
+
+    return make_venv
+
+
+def install_deps(venv, mocker):
+    action = mocker.Mock()
+    _tox.tox_testenv_install_deps(venv, action)
+    return action
+
+
+def test_tox_addoption_install_mode(subtests, mocker):
+    parser = mocker.Mock()
+    _tox.tox_addoption(parser)
+    postprocess = {
+        call[0][0]: call[1].get("postprocess")
+        for call in parser.add_testenv_attribute.call_args_list
+    }["pytorch_install_mode"]
+
+    with subtests.test("pip"):
+        assert postprocess(None, "pip") is None
+        assert postprocess(None, None) is None
+
+    with subtests.test("link mode"):
+        assert postprocess(None, "hardlink") == "hardlink"
+
+    with subtests.test("unknown"):
+        with pytest.raises(RuntimeError):
+            postprocess(None, "foo")
+
+
+def test_parse_distributions():
+    config = FakeConfig(
+        "root",
+        [
+            "torch",
+            "-r requirements.txt",
+            "--requirement=nested/requirements.txt",
+            "-cconstraints.txt",
+        ],
+    )
+
+    assert _tox.parse_distributions(config) == (
+        ["torch"],
+        [
+            path.join("root", "requirements.txt"),
+            path.join("root", "nested", "requirements.txt"),
+        ],
+        [path.join("root", "constraints.txt")],
+    )
+
+
+def test_tox_testenv_install_deps_no_distributions(mocker, make_venv, find_links):
+    venv = make_venv(())
+
+    install_deps(venv, mocker)
+
+    find_links.assert_not_called()
+    venv._install.assert_not_called()
+
+
+def test_tox_testenv_install_deps(
+    subtests, mocker, tmp_dir, make_venv, installed, find_links
+):
+    write(path.join(tmp_dir, "requirements.txt"), "torch==1.5.1", "numpy")
+    venv = make_venv(("-r requirements.txt",))
+
+    install_deps(venv, mocker)
+
+    with subtests.test("find_links"):
+        find_links.assert_called_once_with(
+            ["torch==1.5.1"], constraints=[], computation_backend=cb.CPUBackend()
+        )
+
+    with subtests.test("install"):
+        (args,), _ = venv._install.call_args
+        assert args[:2] == [LINK, "-r"]
+        assert path.basename(args[2]).startswith(".requirements.txt.")
+
+    with subtests.test("state"):
+        state = _tox.read_state(venv.path.join(_tox.STATE_FILE))
+        assert state["links"] == [LINK]
+        assert state["installed"] == {"torch": "1.5.1+cpu"}
+
+
+def test_tox_testenv_install_deps_up_to_date(
+    mocker, tmp_dir, make_venv, installed, find_links
+):
+    nested = write(path.join(tmp_dir, "nested.txt"), "numpy")
+    write(path.join(tmp_dir, "requirements.txt"), "torch", "-r nested.txt")
+    venv = make_venv(("-r requirements.txt",))
+
+    install_deps(venv, mocker)
+    action = install_deps(venv, mocker)
+
+    assert find_links.call_count == 1
+    assert venv._install.call_count == 1
+    action.setactivity.assert_called_once_with("installdeps-pytorch", "up to date")
+
+    write(nested, "numpy>=1.18")
+    install_deps(venv, mocker)
+
+    assert find_links.call_count == 2
+
+
+def test_tox_testenv_install_deps_reinstall(
+    subtests, mocker, make_venv, installed, find_links
+):
+    state_file = make_venv().path.join(_tox.STATE_FILE)
+
+    def reinstalls(venv=None):
+        if venv is None:
+            venv = make_venv()
+        find_links.reset_mock()
+        install_deps(venv, mocker)
+        return find_links.called
+
+    with subtests.test("missing state"):
+        assert reinstalls()
+        assert not reinstalls()
+
+    with subtests.test("request"):
+        assert reinstalls(make_venv(("torch", "torchvision")))
+
+    with subtests.test("installed version"):
+        reinstalls()
+        installed["torch"] = "1.6.0+cpu"
+        assert reinstalls()
+        installed["torch"] = "1.5.1+cpu"
+
+    with subtests.test("corrupt state"):
+        reinstalls()
+        write(state_file, "{")
+        assert reinstalls()
+
+
+def test_is_up_to_date(subtests, installed):
+    request = {"distributions": ["torch"]}
+    state = {"request": request, "installed": {"torch": "1.5.1+cpu"}}
+
+    with subtests.test("up to date"):
+        assert _tox.is_up_to_date(state, request, [])
+
+    with subtests.test("no state"):
+        assert not _tox.is_up_to_date(None, request, [])
+
+    with subtests.test("request"):
+        assert not _tox.is_up_to_date(state, {"distributions": ["torch==1.6.0"]}, [])
+
+    with subtests.test("nothing installed"):
+        assert not _tox.is_up_to_date({**state, "installed": {}}, request, [])
+
+    with subtests.test("version"):
+        installed["torch"] = "1.6.0+cpu"
+        assert not _tox.is_up_to_date(state, request, [])
+
+
+def test_read_write_state(subtests, tmp_dir, installed):
+    file = path.join(tmp_dir, _tox.STATE_FILE)
+    request = {"distributions": ["torch"]}
+
+    with subtests.test("missing"):
+        assert _tox.read_state(file) is None
+
+    with subtests.test("roundtrip"):
+        _tox.write_state(file, request, [LINK], [])
+        assert _tox.read_state(file) == {
+            "request": request,
+            "links": [LINK],
+            "installed": {"torch": "1.5.1+cpu"},
+        }
+
+    for content in ("{", "null", "foo"):
+        with subtests.test("corrupt", content=content):
+            write(file, content)
+            assert _tox.read_state(file) is None
+
+
+def test_get_request_deterministic(tmp_dir):
+    write(path.join(tmp_dir, "nested.txt"), "torchvision", "numpy")
+    write(path.join(tmp_dir, "requirements.txt"), "torch", "-r nested.txt")
+    config = FakeConfig(tmp_dir, ["-r requirements.txt"])
+
+    def get_request():
+        _, requirement_files, _ = _tox.parse_distributions(config)
+        with requirements.split_requirements(requirement_files) as split:
+            return _tox.get_request(config, split)
+
+    assert get_request() == get_request()
+
+
+def test_tox_testenv_install_deps_install_mode(
+    mocker, tmp_dir, make_venv, installed, find_links
+):
+    install_wheels = mocker.patch.object(_tox, "install_wheels")
+    mocker.patch.object(_tox, "get_scheme", return_value={})
+    write(path.join(tmp_dir, "requirements.txt"), "torch", "numpy")
+    venv = make_venv(("-r requirements.txt",), pytorch_install_mode="hardlink")
+
+    install_deps(venv, mocker)
+
+    install_wheels.assert_called_once_with(
+        [LINK], scheme={}, executable=venv.envconfig.envpython, link_mode="hardlink"
+    )
+    (args,), _ = venv._install.call_args
+    assert args[0] == "-r"
+
+
+def test_tox_testenv_install_deps_install_mode_venv(mocker, tmp_dir, make_venv):
+    venv = make_venv(("foo",), pytorch_install_mode="copy")
+    create_venv(venv.path)
+    wheel = make_wheel(tmp_dir)
+    mocker.patch.object(_tox, "find_links", return_value=[wheel])
+    mocker.patch.object(
+        unpack, "get_store_dir", return_value=path.join(tmp_dir, "store")
+    )
+
+    install_deps(venv, mocker)
+
+    (site_packages,) = _tox.find_site_packages(str(venv.path))
+    assert path.exists(path.join(site_packages, "foo", "__init__.py"))
+    assert not path.exists(path.join(sysconfig.get_paths()["purelib"], "foo"))
+
+
+def test_tox_testenv_install_deps_metrics(
+    mocker, tmp_dir, make_venv, installed, find_links
+):
+    textfile = path.join(tmp_dir, "metrics", "pwi.prom")
+    log = path.join(tmp_dir, "metrics", "pwi.jsonl")
+    venv = make_venv(pytorch_metrics_textfile=textfile, pytorch_metrics_log=log)
+
+    install_deps(venv, mocker)
+
+    with open(textfile) as fh:
+        assert 'pwi_install_seconds_count{method="tox",outcome="success"}' in fh.read()
+    with open(log) as fh:
+        names = {json.loads(line)["name"] for line in fh}
+    assert "pwi_install_seconds" in names
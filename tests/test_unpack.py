@@ -0,0 +1,205 @@
+import csv
+import hashlib
+import os
+import sys
+from os import path
+
+import pytest
+
+from pytorch_wheel_installer import unpack
+
+from .utils import create_venv, get_tmp_dir, make_wheel
+
+
+@pytest.fixture
+def tmp_dir():
+    with get_tmp_dir() as tmp_dir:
+        yield tmp_dir
+
+
+@pytest.fixture
+def scheme(tmp_dir):
+    return unpack.get_scheme(prefix=path.join(tmp_dir, "prefix"))
+
+
+def test_get_scheme_venv(tmp_dir):
+    venv = path.join(tmp_dir, "venv")
+    python = create_venv(venv)
+
+    scheme = unpack.get_scheme(python=python)
+
+    assert path.realpath(scheme["purelib"]).startswith(path.realpath(venv))
+
+
+def read_record(scheme, name, version):
+    root = scheme["purelib"]
+    record = path.join(root, f"{name}-{version}.dist-info", "RECORD")
+    with open(record, newline="") as fh:
+        return {row[0]: row[1:] for row in csv.reader(fh)}
+
+
+def test_install_wheels(subtests, tmp_dir, scheme):
+    wheel = make_wheel(
+        tmp_dir,
+        files={
+            "foo/__init__.py": "",
+            "foo/bar.py": "def main():\n    pass\n",
+            "foo-1.0.data/scripts/baz": "#!python\nprint('baz')\n",
+        },
+        entry_points="[console_scripts]\nfoo-cli = foo.bar:main\n",
+    )
+
+    names = unpack.install_wheels([wheel], scheme=scheme, num_workers=2)
+    root = scheme["purelib"]
+
+    with subtests.test("names"):
+        assert names == ["foo"]
+
+    with subtests.test("files"):
+        assert path.isfile(path.join(root, "foo", "bar.py"))
+
+    with subtests.test("data scripts"):
+        with open(path.join(scheme["scripts"], "baz")) as fh:
+            assert fh.readline().strip() == f"#!{sys.executable}"
+
+    with subtests.test("entry points"):
+        script = path.join(scheme["scripts"], "foo-cli")
+        with open(script) as fh:
+            content = fh.read()
+        assert "from foo.bar import main" in content
+        assert os.access(script, os.X_OK)
+
+    with subtests.test("INSTALLER"):
+        with open(path.join(root, "foo-1.0.dist-info", "INSTALLER")) as fh:
+            assert fh.read().strip() == "pwi"
+
+    with subtests.test("RECORD"):
+        record = read_record(scheme, "foo", "1.0")
+        assert record["foo/bar.py"][0].startswith("sha256=")
+        assert record["foo-1.0.dist-info/RECORD"] == ["", ""]
+        for file in record:
+            assert path.exists(path.normpath(path.join(root, file)))
+
+
+def test_install_wheels_replaces_existing(tmp_dir, scheme):
+    old = make_wheel(tmp_dir, version="1.0", files={"foo/old.py": ""})
+    new = make_wheel(tmp_dir, version="2.0", files={"foo/new.py": ""})
+
+    unpack.install_wheels([old], scheme=scheme)
+    unpack.install_wheels([new], scheme=scheme)
+
+    root = scheme["purelib"]
+    assert not path.exists(path.join(root, "foo", "old.py"))
+    assert not path.exists(path.join(root, "foo-1.0.dist-info"))
+    assert path.exists(path.join(root, "foo", "new.py"))
+
+
+def test_install_wheels_hash_mismatch(tmp_dir, scheme):
+    wheel = make_wheel(tmp_dir)
+    link = f"file://{wheel}#sha256={'0' * 64}"
+
+    with pytest.raises(RuntimeError):
+        unpack.install_wheels([link], scheme=scheme)
+
+
+def test_install_wheels_outside_of_scheme(subtests, tmp_dir, scheme):
+    for filename in (
+        "../../evil.py",
+        "foo/../../evil.py",
+        "/tmp/evil.py",
+        "foo-1.0.data/scripts/../../evil",
+    ):
+        with subtests.test(filename=filename):
+            wheel = make_wheel(tmp_dir, files={"foo/__init__.py": "", filename: ""})
+
+            with pytest.raises(RuntimeError):
+                unpack.install_wheels([wheel], scheme=scheme)
+            assert not path.exists(path.join(tmp_dir, "evil.py"))
+
+
+@pytest.fixture
+def store_dir(tmp_dir):
+    return path.join(tmp_dir, "store")
+
+
+def test_install_wheels_link_mode(subtests, mocker, tmp_dir, store_dir):
+    wheel = make_wheel(
+        tmp_dir,
+        files={
+            "foo/__init__.py": "",
+            "foo/bar.py": "def main():\n    pass\n",
+            "foo-1.0.data/scripts/baz": "#!python\nprint('baz')\n",
+        },
+    )
+    schemes = [
+        unpack.get_scheme(prefix=path.join(tmp_dir, f"prefix{idx}")) for idx in range(2)
+    ]
+    store_wheel = mocker.spy(unpack, "store_wheel")
+
+    for scheme in schemes:
+        names = unpack.install_wheels(
+            [wheel], scheme=scheme, link_mode="hardlink", store_dir=store_dir
+        )
+        assert names == ["foo"]
+
+    with subtests.test("store"):
+        digest = unpack.hash_file(wheel)
+        assert store_wheel.call_count == 2
+        assert store_wheel.spy_return == path.join(store_dir, digest)
+        stored = path.join(store_dir, digest, "files", "foo", "bar.py")
+        assert not os.stat(stored).st_mode & 0o222
+
+    with subtests.test("hardlinks"):
+        files = [path.join(scheme["purelib"], "foo", "bar.py") for scheme in schemes]
+        assert path.samefile(*files)
+
+    with subtests.test("data scripts"):
+        script = path.join(schemes[0]["scripts"], "baz")
+        with open(script) as fh:
+            assert fh.readline().strip() == f"#!{sys.executable}"
+        assert os.stat(script).st_mode & 0o777 == 0o755
+
+    with subtests.test("RECORD"):
+        root = schemes[0]["purelib"]
+        record = read_record(schemes[0], "foo", "1.0")
+        for file, (hash, _) in record.items():
+            if file.endswith("RECORD"):
+                continue
+            with open(path.normpath(path.join(root, file)), "rb") as fh:
+                assert hash == unpack.encode_hash(hashlib.sha256(fh.read()))
+
+
+def test_install_wheels_link_mode_fallback(subtests, mocker, tmp_dir, store_dir):
+    wheel = make_wheel(tmp_dir)
+    mocker.patch.object(unpack.os, "link", side_effect=OSError)
+    mocker.patch.object(unpack, "reflink", side_effect=OSError)
+
+    for link_mode in ("hardlink", "reflink", "copy"):
+        with subtests.test(link_mode):
+            scheme = unpack.get_scheme(prefix=path.join(tmp_dir, link_mode))
+            unpack.install_wheels(
+                [wheel], scheme=scheme, link_mode=link_mode, store_dir=store_dir
+            )
+
+            file = path.join(scheme["purelib"], "foo", "__init__.py")
+            stored = path.join(
+                store_dir, unpack.hash_file(wheel), "files", "foo", "__init__.py"
+            )
+            assert not path.samefile(file, stored)
+            assert os.stat(file).st_mode & 0o777 == 0o644
+
+
+def test_install_wheels_link_mode_outside_of_store(tmp_dir, scheme, store_dir):
+    wheel = make_wheel(tmp_dir, files={"foo/__init__.py": "", "../evil.py": ""})
+
+    with pytest.raises(RuntimeError):
+        unpack.install_wheels(
+            [wheel], scheme=scheme, link_mode="copy", store_dir=store_dir
+        )
+    assert not path.exists(path.join(store_dir, "evil.py"))
+    assert os.listdir(store_dir) == []
+
+
+def test_install_wheels_unknown_link_mode(tmp_dir, scheme):
+    with pytest.raises(RuntimeError):
+        unpack.install_wheels([make_wheel(tmp_dir)], scheme=scheme, link_mode="foo")
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 
 from pytorch_wheel_installer import utils
@@ -29,3 +31,33 @@ def test_get_public_or_private_attr(subtests):
 
         with pytest.raises(AttributeError):
             utils.get_public_or_private_attr(obj, "attr")
+
+
+def test_Deadline(subtests):
+    with subtests.test("no timeout"):
+        deadline = utils.Deadline()
+        assert deadline.remaining is None
+        assert not deadline.expired
+        deadline.check("doing nothing")
+
+    with subtests.test("expired"):
+        deadline = utils.Deadline(0.0)
+        assert deadline.expired
+        with pytest.raises(TimeoutError):
+            deadline.check("doing nothing")
+
+    with subtests.test("result"):
+        future = utils.run_in_thread(time.sleep, 1.0)
+        with pytest.raises(TimeoutError):
+            utils.Deadline(0.05).result(future, "sleeping")
+
+
+def test_parse_python_version(subtests):
+    for version, expected in (("3", (3,)), ("3.8", (3, 8)), ("3.8.5", (3, 8, 5))):
+        with subtests.test(version):
+            assert utils.parse_python_version(version) == expected
+
+    for version in ("", "three", "3.8.5.1"):
+        with subtests.test(version):
+            with pytest.raises(RuntimeError):
+                utils.parse_python_version(version)
@@ -1,9 +1,17 @@
 import contextlib
 import os
+import random
 import shutil
+import subprocess
+import sys
 import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 
-__all__ = ["get_tmp_dir", "cycle_over"]
+__all__ = ["get_tmp_dir", "cycle_over", "make_wheel", "LocalServer"]
 
 
 # Copied from
@@ -42,3 +50,136 @@ def cycle_over(objs):
     objs = list(objs)
     for idx, obj in enumerate(objs):
         yield obj, objs[:idx] + objs[idx + 1 :]
+
+
+def make_wheel(
+    dir, name="foo", version="1.0", files=None, entry_points=None, requires_dist=()
+):
+    if files is None:
+        files = {f"{name}/__init__.py": f"__version__ = '{version}'\n"}
+
+    dist_info = f"{name}-{version}.dist-info"
+    metadata = {
+        f"{dist_info}/METADATA": (
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+            + "".join(f"Requires-Dist: {req}\n" for req in requires_dist)
+        ),
+        f"{dist_info}/WHEEL": (
+            "Wheel-Version: 1.0\nGenerator: tests\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n"
+        ),
+        f"{dist_info}/RECORD": "",
+    }
+    if entry_points is not None:
+        metadata[f"{dist_info}/entry_points.txt"] = entry_points
+
+    path = os.path.join(dir, f"{name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for filename, content in {**files, **metadata}.items():
+            zf.writestr(filename, content)
+    return path
+
+
+def create_venv(dir):
+    subprocess.check_call((sys.executable, "-m", "venv", "--without-pip", dir))
+    bin_dir = "Scripts" if os.name == "nt" else "bin"
+    return os.path.join(dir, bin_dir, "python")
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def parse_range(byte_range, size):
+    start, end = byte_range.split("=", 1)[1].split("-")
+    if not start:
+        return max(size - int(end), 0), size - 1
+    return int(start), min(int(end), size - 1) if end else size - 1
+
+
+class LocalServer:
+    """Local HTTP stand-in for remote servers.
+
+    Args:
+        routes: Maps paths to the content that is served for them.
+        delay: Seconds to wait before each response.
+        failure_rate: Probability to respond with 503 Service Unavailable.
+        seed: Seed for the failure injection.
+        accept_ranges: If ``False``, range requests are answered with the complete
+            content.
+
+    Single byte range requests are supported. All requested paths and ranges are
+    recorded in ``requests`` and ``ranges``. The number of injected failures is
+    recorded in ``failures``.
+    """
+
+    def __init__(
+        self, routes=None, delay=0.0, failure_rate=0.0, seed=0, accept_ranges=True
+    ):
+        self.routes = dict(routes or {})
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.accept_ranges = accept_ranges
+        self.requests = []
+        self.ranges = []
+        self.failures = 0
+        self._random = random.Random(seed)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                if server.delay:
+                    time.sleep(server.delay)
+                if server._random.random() < server.failure_rate:
+                    server.failures += 1
+                    self.send_error(503)
+                    return
+
+                try:
+                    content = server.routes[self.path]
+                except KeyError:
+                    self.send_error(404)
+                    return
+                if isinstance(content, str):
+                    content = content.encode("utf-8")
+
+                byte_range = self.headers.get("Range")
+                server.ranges.append(byte_range)
+                if byte_range is None or not server.accept_ranges:
+                    self.send_response(200)
+                else:
+                    start, end = parse_range(byte_range, len(content))
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end}/{len(content)}"
+                    )
+                    content = content[start : end + 1]
+
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs=dict(poll_interval=0.05),
+            daemon=True,
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()